@@ -4,6 +4,8 @@ from .auth import router as auth_router
 from .routes_db import router as db_router
 from .scans import router as scans_router
 from .admin import router as admin_router
+from .routes_metrics import router as metrics_router
+from .catalog import router as catalog_router
 
 
 api_v1 = APIRouter()
@@ -12,3 +14,5 @@ api_v1.include_router(auth_router, prefix="")
 api_v1.include_router(db_router, prefix="")
 api_v1.include_router(scans_router, prefix="")
 api_v1.include_router(admin_router, prefix="")
+api_v1.include_router(metrics_router, prefix="")
+api_v1.include_router(catalog_router, prefix="")
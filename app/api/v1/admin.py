@@ -1,29 +1,58 @@
+from pathlib import Path
+
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.response import api_response
-from app.db.deps import get_db
-from app.db.models import Disease, Treatment
+from app.db.deps import get_async_db
+from app.db.models import Disease, Treatment, User
+from app.core.principals import PRINCIPALS
 from app.core.security import admin_required
 from app.schemas.catalog import DiseaseIn, DiseaseUpdate, TreatmentIn, TreatmentUpdate
+from app.schemas.auth import UserAdminUpdate, UserOut
+from app.schemas.ml import ModelReloadIn
+from app.core.config import settings
+from app.ml.registry import MODELS
+from app.ml.loader import warmup_batch_sizes
+from app.services.catalog import CATALOG_CACHE, bump_catalog_version
+from app.services.catalog_snapshot import CATALOG_SNAPSHOT
+from app.services.model_state import MODEL_STATE, publish_model_state
+from app.services import search as search_index
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
+async def _commit_catalog_change(db: AsyncSession, label: str):
+    # version bump commits atomically with the write; other workers see it
+    # on their next version check, this worker drops just the touched label
+    version = await db.run_sync(bump_catalog_version)
+    await db.commit()
+    CATALOG_CACHE.invalidate(label, version)
+    CATALOG_SNAPSHOT.invalidate()
+
+
+async def _disease_label(db: AsyncSession, disease_id: str) -> str | None:
+    return await db.scalar(select(Disease.label).where(Disease.id == disease_id))
+
+
 # ---------- Diseases ----------
 @router.post("/diseases")
-def create_disease(
-    data: DiseaseIn, _: str = Depends(admin_required), db: Session = Depends(get_db)
+async def create_disease(
+    data: DiseaseIn,
+    _: str = Depends(admin_required),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    exists = db.query(Disease).filter(Disease.label == data.label).first()
+    exists = await db.scalar(select(Disease).where(Disease.label == data.label))
     if exists:
         return api_response(False, "Disease label already exists", None, None)
     d = Disease(
         label=data.label, display_name=data.display_name, description=data.description
     )
     db.add(d)
-    db.commit()
-    db.refresh(d)
+    await db.run_sync(search_index.index_disease, d)
+    await _commit_catalog_change(db, d.label)
+    await db.refresh(d)
     payload = {
         "id": d.id,
         "label": d.label,
@@ -34,21 +63,22 @@ def create_disease(
 
 
 @router.put("/diseases/{disease_id}")
-def update_disease(
+async def update_disease(
     disease_id: str,
     data: DiseaseUpdate,
     _: str = Depends(admin_required),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    d = db.query(Disease).filter(Disease.id == disease_id).first()
+    d = await db.get(Disease, disease_id)
     if not d:
         return api_response(False, "Disease not found", None, None)
     if data.display_name is not None:
         d.display_name = data.display_name
     if data.description is not None:
         d.description = data.description
-    db.commit()
-    db.refresh(d)
+    await db.run_sync(search_index.index_disease, d)
+    await _commit_catalog_change(db, d.label)
+    await db.refresh(d)
     payload = {
         "id": d.id,
         "label": d.label,
@@ -59,15 +89,19 @@ def update_disease(
 
 
 @router.delete("/diseases/{disease_id}")
-def delete_disease(
-    disease_id: str, _: str = Depends(admin_required), db: Session = Depends(get_db)
+async def delete_disease(
+    disease_id: str,
+    _: str = Depends(admin_required),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    d = db.query(Disease).filter(Disease.id == disease_id).first()
+    d = await db.get(Disease, disease_id)
     if not d:
         return api_response(False, "Disease not found", None, None)
     # prevent delete if treatments exist
     t_count = (
-        db.query(func.count(Treatment.id)).filter(Treatment.disease_id == d.id).scalar()
+        await db.scalar(
+            select(func.count(Treatment.id)).where(Treatment.disease_id == d.id)
+        )
         or 0
     )
     if t_count > 0:
@@ -77,32 +111,38 @@ def delete_disease(
             None,
             {"treatments": t_count},
         )
-    db.delete(d)
-    db.commit()
+    await db.delete(d)
+    await db.run_sync(search_index.remove_disease, d.id)
+    await _commit_catalog_change(db, d.label)
     return api_response(True, "Disease deleted", None, None)
 
 
 @router.get("/diseases")
-def list_diseases(
+async def list_diseases(
     page: int = 1,
     page_size: int = 50,
     search: str | None = None,
     _: str = Depends(admin_required),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(Disease)
     if search:
-        q = q.filter(
-            (Disease.label.ilike(f"%{search}%"))
-            | (Disease.display_name.ilike(f"%{search}%"))
+        # ranked full-text search (FTS5 / tsvector + trigram)
+        items, total = await db.run_sync(
+            search_index.search_diseases,
+            search,
+            limit=page_size,
+            offset=(page - 1) * page_size,
         )
-    total = q.count()
-    items = (
-        q.order_by(Disease.display_name.asc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
-    )
+    else:
+        total = await db.scalar(select(func.count(Disease.id)))
+        items = (
+            await db.scalars(
+                select(Disease)
+                .order_by(Disease.display_name.asc())
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+            )
+        ).all()
     payload = [
         {
             "id": d.id,
@@ -122,10 +162,14 @@ def list_diseases(
 
 # ---------- Treatments ----------
 @router.post("/treatments")
-def create_treatment(
-    data: TreatmentIn, _: str = Depends(admin_required), db: Session = Depends(get_db)
+async def create_treatment(
+    data: TreatmentIn,
+    _: str = Depends(admin_required),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    disease = db.query(Disease).filter(Disease.label == data.disease_label).first()
+    disease = await db.scalar(
+        select(Disease).where(Disease.label == data.disease_label)
+    )
     if not disease:
         return api_response(False, "Disease not found", None, None)
     t = Treatment(
@@ -137,8 +181,9 @@ def create_treatment(
         locale=data.locale,
     )
     db.add(t)
-    db.commit()
-    db.refresh(t)
+    await db.run_sync(search_index.index_treatment, t)
+    await _commit_catalog_change(db, disease.label)
+    await db.refresh(t)
     payload = {
         "id": t.id,
         "disease_id": t.disease_id,
@@ -152,13 +197,13 @@ def create_treatment(
 
 
 @router.put("/treatments/{treatment_id}")
-def update_treatment(
+async def update_treatment(
     treatment_id: str,
     data: TreatmentUpdate,
     _: str = Depends(admin_required),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    t = db.query(Treatment).filter(Treatment.id == treatment_id).first()
+    t = await db.get(Treatment, treatment_id)
     if not t:
         return api_response(False, "Treatment not found", None, None)
     if data.type is not None:
@@ -171,8 +216,9 @@ def update_treatment(
         t.dosage = data.dosage
     if data.locale is not None:
         t.locale = data.locale
-    db.commit()
-    db.refresh(t)
+    await db.run_sync(search_index.index_treatment, t)
+    await _commit_catalog_change(db, await _disease_label(db, t.disease_id))
+    await db.refresh(t)
     payload = {
         "id": t.id,
         "disease_id": t.disease_id,
@@ -186,41 +232,59 @@ def update_treatment(
 
 
 @router.delete("/treatments/{treatment_id}")
-def delete_treatment(
-    treatment_id: str, _: str = Depends(admin_required), db: Session = Depends(get_db)
+async def delete_treatment(
+    treatment_id: str,
+    _: str = Depends(admin_required),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    t = db.query(Treatment).filter(Treatment.id == treatment_id).first()
+    t = await db.get(Treatment, treatment_id)
     if not t:
         return api_response(False, "Treatment not found", None, None)
-    db.delete(t)
-    db.commit()
+    label = await _disease_label(db, t.disease_id)
+    await db.delete(t)
+    await db.run_sync(search_index.remove_treatment, t.id)
+    await _commit_catalog_change(db, label)
     return api_response(True, "Treatment deleted", None, None)
 
 
 @router.get("/treatments")
-def list_treatments(
+async def list_treatments(
     page: int = 1,
     page_size: int = 50,
     disease_label: str | None = None,
     locale: str | None = None,
     type: str | None = None,
+    search: str | None = None,
     _: str = Depends(admin_required),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(Treatment).join(Disease, Disease.id == Treatment.disease_id)
-    if disease_label:
-        q = q.filter(Disease.label == disease_label)
-    if locale:
-        q = q.filter(Treatment.locale == locale)
-    if type:
-        q = q.filter(Treatment.type == type)
-    total = q.count()
-    items = (
-        q.order_by(Treatment.title.asc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
-    )
+    if search:
+        # ranked full-text search over title + instructions
+        items, total = await db.run_sync(
+            search_index.search_treatments,
+            search,
+            limit=page_size,
+            offset=(page - 1) * page_size,
+            locale=locale,
+            type=type,
+            disease_label=disease_label,
+        )
+    else:
+        q = select(Treatment).join(Disease, Disease.id == Treatment.disease_id)
+        if disease_label:
+            q = q.where(Disease.label == disease_label)
+        if locale:
+            q = q.where(Treatment.locale == locale)
+        if type:
+            q = q.where(Treatment.type == type)
+        total = await db.scalar(select(func.count()).select_from(q.subquery()))
+        items = (
+            await db.scalars(
+                q.order_by(Treatment.title.asc())
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+            )
+        ).all()
     payload = [
         {
             "id": t.id,
@@ -239,3 +303,80 @@ def list_treatments(
         payload,
         {"page": page, "page_size": page_size, "total": total},
     )
+
+
+# ---------- Model ----------
+@router.get("/model")
+def model_status(_: str = Depends(admin_required)):
+    return api_response(True, "Model status", MODELS.status(), None)
+
+
+def _allowed_model_path(path: str) -> str:
+    """Resolve an admin-supplied model path; it must stay inside MODEL_DIR."""
+    resolved = Path(path).resolve()
+    if not resolved.is_relative_to(Path(settings.MODEL_DIR).resolve()):
+        raise ValueError(f"model_path must be inside {settings.MODEL_DIR}")
+    return str(resolved)
+
+
+async def _publish_model(db: AsyncSession, path: str, backend: str, version: str | None = None):
+    # other workers pick this up within MODEL_STATE_CHECK_S; this one already has
+    generation = await db.run_sync(publish_model_state, path, backend, version)
+    await db.commit()
+    MODEL_STATE.generation = generation
+
+
+@router.post("/model/reload")
+async def reload_model(
+    data: ModelReloadIn,
+    _: str = Depends(admin_required),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        path = _allowed_model_path(data.model_path) if data.model_path else settings.MODEL_PATH
+    except ValueError as e:
+        return api_response(False, str(e), None, None)
+    backend = data.backend or settings.MODEL_BACKEND
+    if not MODELS.reload(path, backend, warmup_batch_sizes()):
+        return api_response(False, "A reload is already running", MODELS.status(), None)
+    await _publish_model(db, path, backend)
+    # load + warmup happen in the background; poll GET /admin/model
+    return api_response(True, "Reload started", MODELS.status(), None)
+
+
+@router.post("/model/rollback")
+async def rollback_model(
+    _: str = Depends(admin_required),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        # waits for a running load to finish
+        entry = await run_in_threadpool(MODELS.rollback)
+    except RuntimeError as e:
+        return api_response(False, str(e), MODELS.status(), None)
+    await _publish_model(db, entry.path, entry.backend_name, entry.version)
+    return api_response(True, f"Rolled back to {entry.version}", MODELS.status(), None)
+
+
+# ---------- Users ----------
+@router.put("/users/{user_id}")
+async def update_user(
+    user_id: str,
+    data: UserAdminUpdate,
+    _: str = Depends(admin_required),
+    db: AsyncSession = Depends(get_async_db),
+):
+    u = await db.get(User, user_id)
+    if not u:
+        return api_response(False, "User not found", None, None)
+    if data.is_admin is not None:
+        u.is_admin = data.is_admin
+    if data.full_name is not None:
+        u.full_name = data.full_name
+    await db.commit()
+    # other workers pick the change up within AUTH_CACHE_TTL_S
+    PRINCIPALS.invalidate(u.id)
+    payload = UserOut(
+        id=u.id, email=u.email, full_name=u.full_name, is_admin=u.is_admin
+    ).model_dump()
+    return api_response(True, "User updated", payload, None)
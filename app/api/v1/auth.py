@@ -1,36 +1,42 @@
 from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.utils.response import api_response
-from app.db.deps import get_db
+from app.db.deps import get_async_db
 from app.db.models import User
+from app.core.hashing import hash_password_async, verify_password_async
 from app.core.security import (
-    hash_password,
-    verify_password,
     create_access_token,
     create_refresh_token,
     decode_token,
-    get_current_user,
+    get_current_principal,
 )
+from app.core.principals import Principal
 from app.schemas.auth import RegisterIn, UserOut, TokenPairOut, RefreshIn, LoginIn
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+async def _user_by_email(db: AsyncSession, email: str) -> User | None:
+    return await db.scalar(select(User).where(User.email == email))
+
+
+# bcrypt runs on the dedicated hashing pool (app.core.hashing), DB work on
+# the async session; neither holds a threadpool token.
 @router.post("/register")
-def register(data: RegisterIn, db: Session = Depends(get_db)):
+async def register(data: RegisterIn, db: AsyncSession = Depends(get_async_db)):
     email = data.email.lower()
-    if db.query(User).filter(User.email == email).first():
+    if await _user_by_email(db, email):
         return api_response(False, "Email already registered", None, None)
     u = User(
         email=email,
-        password_hash=hash_password(data.password),
+        password_hash=await hash_password_async(data.password),
         full_name=data.full_name or "",
     )
     db.add(u)
-    db.commit()
-    db.refresh(u)
+    await db.commit()
     payload = UserOut(
         id=u.id, email=u.email, full_name=u.full_name, is_admin=u.is_admin
     ).model_dump()
@@ -38,11 +44,18 @@ def register(data: RegisterIn, db: Session = Depends(get_db)):
 
 
 @router.post("/login")
-def login(data: LoginIn, db: Session = Depends(get_db)):
+async def login(data: LoginIn, db: AsyncSession = Depends(get_async_db)):
     email = data.email.lower()
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(data.password, user.password_hash):
+    user = await _user_by_email(db, email)
+    if not user:
+        return api_response(False, "Invalid credentials", None, None)
+    ok, new_hash = await verify_password_async(data.password, user.password_hash)
+    if not ok:
         return api_response(False, "Invalid credentials", None, None)
+    if new_hash:
+        # hash was made with other settings (e.g. BCRYPT_ROUNDS changed)
+        user.password_hash = new_hash
+        await db.commit()
 
     access = create_access_token(user.id)
     refresh = create_refresh_token(user.id)
@@ -61,11 +74,11 @@ def login(data: LoginIn, db: Session = Depends(get_db)):
 
 
 @router.post("/refresh")
-def refresh(data: RefreshIn, db: Session = Depends(get_db)):
+async def refresh(data: RefreshIn, db: AsyncSession = Depends(get_async_db)):
     try:
         decoded = decode_token(data.refresh_token)
         uid = decoded.get("sub")
-        user = db.query(User).filter(User.id == uid).first()
+        user = await db.scalar(select(User).where(User.id == uid))
         if not user:
             return api_response(False, "Invalid refresh token", None, None)
         access = create_access_token(user.id)
@@ -80,7 +93,7 @@ def refresh(data: RefreshIn, db: Session = Depends(get_db)):
 
 
 @router.get("/me")
-def me(user: User = Depends(get_current_user)):
+async def me(user: Principal = Depends(get_current_principal)):
     payload = UserOut(
         id=user.id, email=user.email, full_name=user.full_name, is_admin=user.is_admin
     ).model_dump()
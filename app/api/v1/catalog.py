@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Request, Response
+from app.services.catalog_snapshot import CATALOG_SNAPSHOT
+
+router = APIRouter(tags=["catalog"])
+
+
+def _matches(if_none_match: str, etags: tuple[str, ...]) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return any(e in tags for e in etags)
+
+
+@router.get("/catalog")
+def get_catalog(request: Request):
+    """
+    Whole disease/treatment catalog for offline use. The body is prebuilt
+    once per catalog change; a matching If-None-Match gets a bare 304.
+    """
+    snap = CATALOG_SNAPSHOT.current()
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    inm = request.headers.get("if-none-match")
+    if inm and _matches(inm, (snap.etag, snap.etag_gzip)):
+        use_gzip = "gzip" in request.headers.get("accept-encoding", "")
+        headers["ETag"] = snap.etag_gzip if use_gzip else snap.etag
+        return Response(status_code=304, headers=headers)
+
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["ETag"] = snap.etag_gzip
+        headers["Content-Encoding"] = "gzip"
+        body = snap.body_gzip
+    else:
+        headers["ETag"] = snap.etag
+        body = snap.body
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,33 +1,63 @@
-from fastapi import APIRouter
+import logging
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from datetime import datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.db.deps import get_async_db
 from app.utils.response import api_response
-from app.ml.loader import load_artifacts
+from app.ml.loader import load_artifacts, model_status
 
 router = APIRouter()
+log = logging.getLogger(__name__)
+
+# static part of the liveness payload, built once per process
+_SERVICE_INFO = {"service": settings.APP_NAME, "env": settings.ENV}
 
 
 @router.get("/health", tags=["system"])
-def health():
+async def health():
+    """
+    Liveness: the process is up and serving. Cheap and never loads the model;
+    model fields reflect whatever is already in memory.
+    """
+    status = model_status()
     info = {
-        "service": settings.APP_NAME,
-        "env": settings.ENV,
+        **_SERVICE_INFO,
         "time_utc": datetime.now(timezone.utc).isoformat(),
-        "model_loaded": False,
-        "num_classes": None,
-        "img_size": None,
-        "model_version": None,
+        "model_loaded": status["model_loaded"],
+        "num_classes": status["num_classes"],
+        "img_size": status["img_size"],
+        "model_version": status["model_version"],
     }
+    return api_response(True, "OK", info, None)
+
+
+async def _database_ok(db: AsyncSession) -> bool:
     try:
-        _, idx2label, img_size, version = load_artifacts()
-        info["model_loaded"] = True
-        info["num_classes"] = len(idx2label)
-        info["img_size"] = list(img_size)
-        info["model_version"] = version
-        return api_response(True, "OK", info, None)
-    except Exception as e:
-        # still return 200 with success=false so your frontend can show a helpful state
-        return api_response(False, f"Health check: {e}", info, None)
+        await db.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        log.exception("Readiness DB check failed")
+        return False
+
+
+@router.get("/health/ready", tags=["system"])
+async def ready(db: AsyncSession = Depends(get_async_db)):
+    """
+    Readiness: database reachable and, when eager loading is on, the model
+    loaded and warmed up. With MODEL_EAGER_LOAD off the model loads on the
+    first scan, so only the database gates readiness; `model_loaded` still
+    reports the current state. Never triggers a load. 503 until ready.
+    """
+    status = model_status()
+    warmed = status["warmup"]["state"] == "done"
+    status["database"] = await _database_ok(db)
+    model_ready = status["model_loaded"] and warmed
+    is_ready = status["database"] and (model_ready or not settings.MODEL_EAGER_LOAD)
+    body = api_response(is_ready, "Ready" if is_ready else "Not ready", status, None)
+    return JSONResponse(body, status_code=200 if is_ready else 503)
 
 
 @router.get("/labels", tags=["system"])
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import REGISTRY
+
+router = APIRouter()
+
+
+@router.get("/metrics", tags=["system"], response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,60 +1,135 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Request, Query
-from sqlalchemy.orm import Session
-from PIL import Image
-import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from sqlalchemy import Select, and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+import datetime
+import time
 
 from app.utils.response import api_response
-from app.db.deps import get_db
-from app.db.models import Scan, User
+from app.db.deps import get_async_db
+from app.db.models import Scan
 from app.core.config import settings
-from app.core.security import get_current_user
-from app.services.storage import save_local_image
-from app.services.catalog import get_disease_and_treatments
-from app.utils.urls import public_upload_url
-from app.ml.loader import load_artifacts
-from app.ml.inference import preprocess_pil, topk_indices
+from app.core.metrics import REGISTRY
+from app.core.principals import Principal
+from app.core.security import get_current_principal
+from app.services.ingest import IngestedImage, image_uploads, multipart_body
+from app.services.catalog import get_disease_and_treatments, get_catalog_for_labels
+from app.services.prediction_cache import PREDICTIONS
+from app.services.scan_writer import SCAN_WRITER
+from app.services.thumbnails import THUMBNAILS
+from app.utils.urls import public_upload_url, thumbnail_urls
+from app.utils.cursor import encode_cursor, decode_cursor
+from app.ml.registry import MODELS
+from app.ml.inference import topk_indices
+from app.ml.preprocess import get_preprocessor
 
 router = APIRouter(prefix="/scans", tags=["scans"])
 
+# upload ingestion is timed in app.services.ingest; everything after it here
+STAGE_SECONDS = REGISTRY.histogram(
+    "scan_stage_seconds", "Time per scan-creation stage", labelnames=("route", "stage")
+)
 
-@router.post("")
-def create_scan(
+
+def _stage(route: str, stage: str):
+    return STAGE_SECONDS.labels(route, stage).time()
+
+
+def _top_k(probs, idx2label: dict[int, str], k: int = 5) -> list[dict]:
+    # highest first, so top_k[0] is the predicted label
+    return [
+        {"label": idx2label[i], "confidence": float(probs[i])}
+        for i in topk_indices(probs, k=k)
+    ]
+
+
+# Handlers are async and talk to the DB through AsyncSession; blocking work
+# (file writes, decode + forward pass, the sync caches' own sessions) goes
+# through run_in_threadpool, and the sync catalog/prediction caches are
+# reused on the async connection via AsyncSession.run_sync.
+def _decode_and_predict(predict, img_size, sources, route: str):
+    t0 = time.perf_counter()
+    with get_preprocessor(img_size).batch(sources) as x:
+        t1 = time.perf_counter()
+        probs = predict(x)
+    STAGE_SECONDS.labels(route, "preprocess").observe(t1 - t0)
+    STAGE_SECONDS.labels(route, "predict").observe(time.perf_counter() - t1)
+    return probs
+
+
+def _cached_predictions(db, digests: list[str], model_version: str) -> list:
+    if not settings.PREDICTION_CACHE_ENABLED:
+        return [None] * len(digests)
+    return [PREDICTIONS.get(db, d, model_version) for d in digests]
+
+
+async def _persist_scans(db: AsyncSession, scans: list[Scan]):
+    if settings.SCAN_WRITE_BEHIND:
+        # acknowledged once spooled; SCAN_WRITER inserts them in bulk
+        await run_in_threadpool(SCAN_WRITER.submit, scans)
+    else:
+        db.add_all(scans)
+        await db.commit()  # id and created_at are app-assigned, no refresh needed
+
+
+def _remember_predictions(items: list[tuple[str, list[dict]]], model_version: str):
+    if settings.PREDICTION_CACHE_ENABLED:
+        for digest, top_k in items:
+            PREDICTIONS.put(digest, model_version, top_k)
+
+
+@router.post("", openapi_extra=multipart_body("file"))
+async def create_scan(
     request: Request,
-    file: UploadFile = File(...),
     locale: str | None = None,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_principal),
+    images: list[IngestedImage] = Depends(image_uploads("file", max_files=1)),
 ):
     try:
-        # 1) Save image locally (size + mime are enforced in save_local_image)
-        fs_path, _rel = save_local_image(settings.UPLOAD_DIR, user.id, file)
-
-        # 2) Predict
-        MODEL, IDX2LABEL, IMG_SIZE, MODEL_VERSION = load_artifacts()
-        with Image.open(fs_path) as pil:
-            x = preprocess_pil(pil, IMG_SIZE)
-        probs = MODEL.predict(x, verbose=0)[0]
-        pred_idx = int(np.argmax(probs))
-        label = IDX2LABEL[pred_idx]
-        confidence = float(probs[pred_idx])
-        order = topk_indices(probs, k=5)
-        top_k = [{"label": IDX2LABEL[i], "confidence": float(probs[i])} for i in order]
+        # 1) Image is already stored: streamed, hashed and type-sniffed while
+        #    the body arrived (size + type are enforced in image_uploads)
+        image = images[0]
+        rel, digest = image.rel, image.digest
+        THUMBNAILS.submit(rel)  # rendered in the background
+
+        # 2) Predict, unless this exact image was already scored by this model.
+        #    The model version is pinned so a hot reload can't unload it mid-request.
+        with _stage("single", "model_acquire"):
+            await run_in_threadpool(MODELS.active)  # a cold first load stays off the loop
+        with MODELS.acquire() as model:
+            MODEL_VERSION = model.version
+            with _stage("single", "cache_lookup"):
+                (top_k,) = await db.run_sync(_cached_predictions, [digest], MODEL_VERSION)
+            if top_k is None:
+                # decode from the stored copy (page cache / upload buffer)
+                probs = await run_in_threadpool(
+                    _decode_and_predict, model.predict, model.img_size, [image.file], "single"
+                )
+                top_k = _top_k(probs[0], model.idx2label)
+                await run_in_threadpool(
+                    _remember_predictions, [(digest, top_k)], MODEL_VERSION
+                )
+        label = top_k[0]["label"]
+        confidence = top_k[0]["confidence"]
 
         # 3) Catalog hydrate
-        disease_payload, treatments = get_disease_and_treatments(db, label, locale)
+        with _stage("single", "catalog"):
+            disease_payload, treatments = await db.run_sync(
+                get_disease_and_treatments, label, locale
+            )
 
-        # 4) Persist scan row (store filesystem path in DB)
+        # 4) Persist scan row (image_url is the storage key, not a URL)
         scan = Scan(
             user_id=user.id,
-            image_url=fs_path,
+            image_url=rel,
             predicted_label=label,
             confidence=confidence,
             top_k=top_k,
             model_version=MODEL_VERSION,
         )
-        db.add(scan)
-        db.commit()
-        db.refresh(scan)
+        with _stage("single", "persist"):
+            await _persist_scans(db, [scan])
 
         payload = {
             "scan": {
@@ -62,6 +137,7 @@ def create_scan(
                 "image_url": public_upload_url(
                     request, scan.image_url
                 ),  # public URL for frontend
+                "thumbnails": thumbnail_urls(request, scan.image_url),
                 "predicted_label": scan.predicted_label,
                 "confidence": scan.confidence,
                 "top_k": scan.top_k,
@@ -79,29 +155,172 @@ def create_scan(
         return api_response(False, f"Scan failed: {e}", None, None)
 
 
+@router.post("/batch", openapi_extra=multipart_body("files", many=True))
+async def create_scans_batch(
+    request: Request,
+    locale: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_principal),
+    images: list[IngestedImage] = Depends(
+        image_uploads("files", max_files=settings.MAX_BATCH_FILES)
+    ),
+):
+    try:
+        # 1) All images are already stored (count, size + type are enforced
+        #    in image_uploads)
+        for image in images:
+            THUMBNAILS.submit(image.rel)
+
+        # 2) Serve cached predictions, decode the rest in parallel into one
+        #    stacked array and run a single forward pass over them
+        with _stage("batch", "model_acquire"):
+            await run_in_threadpool(MODELS.active)
+        with MODELS.acquire() as model:
+            MODEL_VERSION = model.version
+            with _stage("batch", "cache_lookup"):
+                top_ks: list[list[dict] | None] = await db.run_sync(
+                    _cached_predictions, [image.digest for image in images], MODEL_VERSION
+                )
+            misses = [i for i, t in enumerate(top_ks) if t is None]
+            if misses:
+                probs = await run_in_threadpool(
+                    _decode_and_predict,
+                    model.backend.predict_batch,
+                    model.img_size,
+                    [images[i].file for i in misses],
+                    "batch",
+                )
+                for i, row in zip(misses, probs):
+                    top_ks[i] = _top_k(row, model.idx2label)
+                await run_in_threadpool(
+                    _remember_predictions,
+                    [(images[i].digest, top_ks[i]) for i in misses],
+                    MODEL_VERSION,
+                )
+
+        # 3) Catalog hydrate once for the distinct predicted labels
+        labels = [t[0]["label"] for t in top_ks]
+        with _stage("batch", "catalog"):
+            catalog = await db.run_sync(get_catalog_for_labels, labels, locale)
+
+        # 4) Persist all scan rows in one transaction (or one spool append)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        scans = [
+            Scan(
+                user_id=user.id,
+                image_url=image.rel,
+                predicted_label=top_k[0]["label"],
+                confidence=top_k[0]["confidence"],
+                top_k=top_k,
+                model_version=MODEL_VERSION,
+                created_at=now,
+            )
+            for image, top_k in zip(images, top_ks)
+        ]
+        with _stage("batch", "persist"):
+            await _persist_scans(db, scans)
+
+        payload = []
+        for scan in scans:
+            disease_payload, treatments = catalog[scan.predicted_label]
+            payload.append(
+                {
+                    "scan": {
+                        "id": scan.id,
+                        "image_url": public_upload_url(request, scan.image_url),
+                        "thumbnails": thumbnail_urls(request, scan.image_url),
+                        "predicted_label": scan.predicted_label,
+                        "confidence": scan.confidence,
+                        "top_k": scan.top_k,
+                        "model_version": scan.model_version,
+                        "created_at": scan.created_at,
+                    },
+                    "disease": disease_payload,
+                    "treatments": treatments,
+                }
+            )
+        return api_response(True, "Scans created", payload, {"count": len(payload)})
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        return api_response(False, f"Batch scan failed: {e}", None, None)
+
+
+def user_scans_query(user_id: str, label: str | None = None) -> Select:
+    q = select(Scan).where(Scan.user_id == user_id)
+    if label:
+        q = q.where(Scan.predicted_label == label)
+    return q
+
+
+def count_query(q: Select) -> Select:
+    return select(func.count()).select_from(q.order_by(None).subquery())
+
+
+def scan_page(
+    q: Select, page_size: int, cursor: tuple[datetime.datetime, str] | None
+) -> Select:
+    """
+    One keyset page, newest first. Walks ix_scans_user_created_id from the
+    cursor position, so cost does not grow with page depth.
+    """
+    if cursor:
+        created_at, scan_id = cursor
+        q = q.where(
+            or_(
+                Scan.created_at < created_at,
+                and_(Scan.created_at == created_at, Scan.id < scan_id),
+            )
+        )
+    return q.order_by(Scan.created_at.desc(), Scan.id.desc()).limit(page_size)
+
+
 @router.get("")
-def list_scans(
+async def list_scans(
     request: Request,
-    page: int = Query(1, ge=1),
+    cursor: str | None = None,
+    page: int | None = Query(None, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     label: str | None = None,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_principal),
 ):
-    q = db.query(Scan).filter(Scan.user_id == user.id)
-    if label:
-        q = q.filter(Scan.predicted_label == label)
-    total = q.count()
-    items = (
-        q.order_by(Scan.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
-    )
+    """
+    Cursor pagination: pass `meta.next_cursor` back as `cursor` for the next
+    page. `page` keeps the legacy OFFSET mode (always with a total).
+    """
+    q = user_scans_query(user.id, label)
+    meta: dict = {"page_size": page_size}
+    if page is not None:
+        items = (
+            await db.scalars(
+                q.order_by(Scan.created_at.desc(), Scan.id.desc())
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+            )
+        ).all()
+        meta.update(page=page, total=await db.scalar(count_query(q)))
+    else:
+        try:
+            position = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return api_response(False, "Invalid cursor", None, None)
+        # one extra row tells us whether there is a next page
+        items = (await db.scalars(scan_page(q, page_size + 1, position))).all()
+        has_more = len(items) > page_size
+        items = items[:page_size]
+        meta["next_cursor"] = (
+            encode_cursor(items[-1].created_at, items[-1].id) if has_more else None
+        )
+        if include_total:
+            meta["total"] = await db.scalar(count_query(q))
     payload = [
         {
             "id": s.id,
             "image_url": public_upload_url(request, s.image_url),
+            "thumbnails": thumbnail_urls(request, s.image_url),
             "predicted_label": s.predicted_label,
             "confidence": s.confidence,
             "model_version": s.model_version,
@@ -109,29 +328,34 @@ def list_scans(
         }
         for s in items
     ]
-    meta = {"page": page, "page_size": page_size, "total": total}
     return api_response(True, "Scans retrieved", payload, meta)
 
 
 @router.get("/{scan_id}")
-def get_scan(
+async def get_scan(
     scan_id: str,
     request: Request,
     locale: str | None = None,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_principal),
 ):
-    s = db.query(Scan).filter(Scan.id == scan_id, Scan.user_id == user.id).first()
+    s = await db.scalar(select(Scan).where(Scan.id == scan_id, Scan.user_id == user.id))
+    if s is None and settings.SCAN_WRITE_BEHIND:
+        # acknowledged but not flushed yet
+        s = SCAN_WRITER.pending(scan_id)
+        if s is not None and s.user_id != user.id:
+            s = None
     if not s:
         return api_response(False, "Scan not found", None, None)
 
-    disease_payload, treatments = get_disease_and_treatments(
-        db, s.predicted_label, locale
+    disease_payload, treatments = await db.run_sync(
+        get_disease_and_treatments, s.predicted_label, locale
     )
     payload = {
         "scan": {
             "id": s.id,
             "image_url": public_upload_url(request, s.image_url),
+            "thumbnails": thumbnail_urls(request, s.image_url),
             "predicted_label": s.predicted_label,
             "confidence": s.confidence,
             "top_k": s.top_k,
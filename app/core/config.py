@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import List
+from typing import List, Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,15 +8,124 @@ class Settings(BaseSettings):
     ENV: str = "local"  # local|dev|prod
     SECRET_KEY: str = "change-me"
     DATABASE_URL: str = "sqlite:///./data/app.db"  # we’ll switch to Postgres later
+
+    # connection pool (sync and async engines each get one)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_S: float = 30.0
+    DB_POOL_RECYCLE_S: int = 1800  # -1 disables
+    DB_POOL_PRE_PING: bool = True  # Postgres only
+
+    # SQLite pragmas applied to every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"  # "" leaves the file's mode alone
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KIB: int = 65536
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
     UPLOAD_DIR: str = "./uploads"
     CORS_ORIGINS: List[str] = ["http://localhost:3000"]
     ACCESS_TOKEN_MINUTES: int = 120
     REFRESH_TOKEN_DAYS: int = 14
 
     MODEL_PATH: str = "models/plant_disease_model.keras"
+    MODEL_BACKEND: str = "keras"  # keras|onnx|remote (onnx: MODEL_PATH points at a .onnx)
+    MODEL_INTRA_OP_THREADS: int = 0  # 0 = runtime default
     LABELS_PATH: str = "models/labels.json"
     META_PATH: str = "models/meta.json"
+    # load + warm the model during startup, before the worker takes traffic
+    MODEL_EAGER_LOAD: bool = False
+    MODEL_WARMUP_BATCH_SIZES: List[int] = []  # empty = every size the API uses
+    # hot reload: versions kept in memory (for instant rollback) and how long
+    # a replaced version may take to drain before it is unloaded anyway
+    MODEL_REGISTRY_MAX_LOADED: int = 2
+    MODEL_DRAIN_TIMEOUT_S: float = 60.0
+    # admin reloads may only load files under this directory
+    MODEL_DIR: str = "models"
+    MODEL_STATE_CHECK_S: float = 2.0  # how long other workers may lag an admin reload
     MAX_UPLOAD_MB: int = 8
+    # /uploads: files are write-once, so clients and CDNs may keep them for good
+    UPLOAD_CACHE_MAX_AGE_S: int = 31536000
+    UPLOAD_STAT_CACHE_MAX_ITEMS: int = 10000
+    UPLOAD_STAT_CACHE_TTL_S: float = 300.0  # 0 disables
+
+    # upload storage: local (UPLOAD_DIR) | s3 (any S3-compatible store)
+    STORAGE_BACKEND: str = "local"
+    # CDN / public origin serving the storage keys; presigned URLs (s3) or
+    # /uploads (local) when empty
+    STORAGE_PUBLIC_BASE_URL: str = ""
+    S3_BUCKET: str = ""
+    S3_PREFIX: str = ""
+    S3_ENDPOINT_URL: str = ""  # e.g. http://localhost:9000 for MinIO
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY_ID: str = ""  # empty = boto3's default credential chain
+    S3_SECRET_ACCESS_KEY: str = ""
+    S3_ADDRESSING_STYLE: Literal["auto", "virtual", "path"] = "auto"
+    S3_MAX_POOL_CONNECTIONS: int = 32
+    S3_MULTIPART_CHUNK_MB: int = 8  # part size; S3's minimum is 5 MB
+    S3_PRESIGN_EXPIRES_S: int = 3600
+    S3_PRESIGN_CACHE_MAX_ITEMS: int = 10000
+
+    # WebP thumbnails under UPLOAD_DIR/thumbs/<size>/ (JSON list in env)
+    THUMBNAIL_SIZES: List[int] = [96, 320]
+    THUMBNAIL_QUALITY: int = 80
+    THUMBNAIL_WORKERS: int = 1
+    # non-local storage: images known to have thumbnails (the rest get the original's URL)
+    THUMBNAIL_READY_CACHE_ITEMS: int = 100_000
+
+    # dynamic micro-batching in front of MODEL.predict
+    INFERENCE_BATCHING: bool = False
+    INFERENCE_MAX_BATCH: int = 8
+    INFERENCE_MAX_WAIT_MS: float = 5.0
+
+    # shared inference server (python -m app.ml.inference_server), used by
+    # API workers with MODEL_BACKEND=remote
+    INFERENCE_SOCKET_PATH: str = "/tmp/plant-inference.sock"
+    INFERENCE_SHM_NAME: str = "plant_inference"
+    INFERENCE_SHM_SLOTS: int = 16
+    INFERENCE_SLOT_ROWS: int = 8
+    INFERENCE_SERVER_PROCESSES: int = 1
+    INFERENCE_SERVER_BACKEND: str = "keras"
+    # how long a new connection waits for a server process with a free slot
+    INFERENCE_CONNECT_TIMEOUT_S: float = 5.0
+    # each open connection holds a slot: idle ones beyond this are closed
+    INFERENCE_IDLE_CONNECTIONS: int = 2
+    INFERENCE_IDLE_TIMEOUT_S: float = 30.0
+
+    # POST /scans/batch
+    MAX_BATCH_FILES: int = 32
+    PREPROCESS_WORKERS: int = 4
+    PREPROCESS_BUFFER_SLOTS: int = 4
+
+    # write-behind scan rows: respond once spooled, bulk-insert in the background
+    SCAN_WRITE_BEHIND: bool = False
+    SCAN_SPOOL_DIR: str = "./data/scan_spool"
+    SCAN_SPOOL_FSYNC: bool = True  # False trades crash durability for latency
+    SCAN_SPOOL_SEGMENT_MB: int = 16
+    SCAN_WRITER_BATCH: int = 500
+    SCAN_WRITER_INTERVAL_MS: float = 50.0
+    # a batch the database keeps rejecting (not a connection/lock error) is
+    # split after this many attempts; rows failing alone go to <spool>/dead
+    SCAN_WRITER_MAX_ATTEMPTS: int = 3
+
+    # (content hash, model version) -> top-k cache
+    PREDICTION_CACHE_ENABLED: bool = True
+    PREDICTION_CACHE_MEMORY_ITEMS: int = 2048
+    PREDICTION_CACHE_MAX_ROWS: int = 100_000
+
+    # (label, locale) -> disease + treatments cache
+    CATALOG_CACHE_MAX_ITEMS: int = 1024
+    CATALOG_CACHE_TTL_S: float = 300.0
+    CATALOG_VERSION_CHECK_S: float = 1.0  # how stale other workers' writes may be
+
+    # password hashing runs on its own small pool; excess load gets 503
+    BCRYPT_ROUNDS: int = 12  # changing it rehashes users on their next login
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE: int = 32
+    PASSWORD_HASH_RETRY_AFTER_S: int = 1
+
+    # user id -> authenticated principal cache (bounds staleness across workers)
+    AUTH_CACHE_MAX_ITEMS: int = 10_000
+    AUTH_CACHE_TTL_S: float = 60.0
 
     model_config = SettingsConfigDict(
         env_file=".env", case_sensitive=False, extra="ignore"
@@ -0,0 +1,105 @@
+"""
+Password hashing off Starlette's shared threadpool.
+
+bcrypt is deliberately slow CPU work (it releases the GIL, so threads are
+enough). A burst of logins used to occupy every threadpool token and make
+scan/catalog requests queue behind it. Hashing now runs on a small dedicated
+executor; at most `workers + queue_size` operations are admitted at once and
+anything beyond that is rejected with 503 + Retry-After instead of queueing.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+HASH_SECONDS = REGISTRY.histogram(
+    "password_hash_seconds",
+    "bcrypt work time per operation",
+    labelnames=("op",),
+)
+HASH_WAIT_SECONDS = REGISTRY.histogram(
+    "password_hash_queue_wait_seconds",
+    "Time spent waiting for a hashing worker",
+)
+HASH_REJECTED = REGISTRY.counter(
+    "password_hash_rejected_total", "Hashing requests shed because the queue was full"
+)
+HASH_INFLIGHT = REGISTRY.gauge(
+    "password_hash_inflight", "Hashing operations running or queued"
+)
+
+pwd = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+
+class HashingOverloaded(Exception):
+    pass
+
+
+class HashingPool:
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="pwhash"
+        )
+        self._slots = threading.BoundedSemaphore(self.workers + max(0, queue_size))
+
+    def _run(self, op: str, fn, args, submitted: float):
+        HASH_WAIT_SECONDS.observe(time.perf_counter() - submitted)
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            HASH_SECONDS.labels(op).observe(time.perf_counter() - t0)
+
+    def _release(self, _future):
+        HASH_INFLIGHT.dec()
+        self._slots.release()
+
+    async def run(self, op: str, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            HASH_REJECTED.inc()
+            raise HashingOverloaded()
+        HASH_INFLIGHT.inc()
+        future = self._executor.submit(self._run, op, fn, args, time.perf_counter())
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+HASHING = HashingPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE)
+
+
+def _overloaded() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, retry shortly",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_S)},
+    )
+
+
+async def hash_password_async(plain: str) -> str:
+    try:
+        return await HASHING.run("hash", pwd.hash, plain)
+    except HashingOverloaded:
+        raise _overloaded()
+
+
+async def verify_password_async(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """
+    (ok, new_hash). new_hash is set when the stored hash used different
+    settings (e.g. BCRYPT_ROUNDS changed) and should be saved.
+    """
+    try:
+        return await HASHING.run("verify", pwd.verify_and_update, plain, hashed)
+    except HashingOverloaded:
+        raise _overloaded()
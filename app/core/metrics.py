@@ -0,0 +1,214 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# default latency buckets in seconds (1ms .. 10s)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def _labels_str(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    """
+    Base of the metric types. Every update (Counter.inc, Gauge.inc/dec,
+    Histogram.observe) takes the metric's lock: `+=` on an attribute is a
+    read-modify-write that the threadpool, the batching thread and the scan
+    writer can interleave, losing updates. Gauge.set is a single store and
+    needs none.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if self.labelnames:
+            for values, child in list(self._children.items()):
+                lines.extend(child._samples_for(self.name, self.labelnames, values))
+        else:
+            lines.extend(self._samples_for(self.name, (), ()))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self.value = 0.0
+
+    def _new_child(self):
+        return Counter(self.name, self.help)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def _samples_for(self, name, names, values):
+        return [f"{name}{_labels_str(names, values)} {_fmt(self.value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), fn=None):
+        super().__init__(name, help, labelnames)
+        self.value = 0.0
+        self._fn = fn  # optional callback evaluated at scrape time
+
+    def _new_child(self):
+        return Gauge(self.name, self.help)
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def set_function(self, fn):
+        """Report fn() at scrape time instead of a stored value."""
+        self._fn = fn
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def _samples_for(self, name, names, values):
+        v = self._fn() if self._fn is not None else self.value
+        return [f"{name}{_labels_str(names, values)} {_fmt(float(v))}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        labelnames: tuple[str, ...] = (),
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+
+    def _new_child(self):
+        return Histogram(self.name, self.help, self.buckets)
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    @contextmanager
+    def time(self):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative, acc = {}, 0
+        for b, c in zip(self.buckets + (float("inf"),), counts):
+            acc += c
+            cumulative[_fmt(b)] = acc
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+    def _samples_for(self, name, names, values):
+        snap = self.snapshot()
+        lines = []
+        for le, c in snap["buckets"].items():
+            le_label = 'le="' + le + '"'
+            lines.append(f"{name}_bucket{_labels_str(names, values, le_label)} {c}")
+        lines.append(f"{name}_sum{_labels_str(names, values)} {_fmt(snap['sum'])}")
+        lines.append(f"{name}_count{_labels_str(names, values)} {snap['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = cls(name, *args, **kwargs)
+                self._metrics[name] = m
+            elif not isinstance(m, cls):
+                raise ValueError(f"Metric {name} already registered as {m.kind}")
+            return m
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), fn=None
+    ) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames, fn)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        labelnames: tuple[str, ...] = (),
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help, buckets, labelnames)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for m in list(self._metrics.values()):
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
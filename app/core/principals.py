@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.db.models import User
+
+CACHE_HITS = REGISTRY.counter("auth_principal_cache_hits_total", "Principal cache hits")
+CACHE_MISSES = REGISTRY.counter("auth_principal_cache_misses_total", "Principal cache misses")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The parts of a User that authorization and /auth/me need."""
+
+    id: str
+    email: str
+    full_name: str | None
+    is_admin: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id, email=user.email, full_name=user.full_name, is_admin=user.is_admin
+        )
+
+
+class PrincipalCache:
+    """
+    Bounded TTL cache of user id -> Principal.
+
+    Changes made through this worker call `invalidate(user_id)`; changes in
+    other workers (or straight in the DB) are picked up once the entry's TTL
+    runs out.
+    """
+
+    def __init__(self, max_items: int, ttl_s: float):
+        self.max_items = max_items
+        self.ttl_s = ttl_s
+        self._items: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped on every invalidation; a put loaded before it is dropped
+        self.generation = 0
+
+    def get(self, user_id: str) -> Principal | None:
+        with self._lock:
+            hit = self._items.get(user_id)
+            if hit is not None and hit[0] > time.monotonic():
+                self._items.move_to_end(user_id)
+                CACHE_HITS.inc()
+                return hit[1]
+        CACHE_MISSES.inc()
+        return None
+
+    def put(self, principal: Principal, generation: int):
+        if self.ttl_s <= 0 or self.max_items <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._items[principal.id] = (time.monotonic() + self.ttl_s, principal)
+            self._items.move_to_end(principal.id)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self.generation += 1
+            self._items.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._items.clear()
+
+    def stats(self) -> dict:
+        hits, misses = CACHE_HITS.value, CACHE_MISSES.value
+        return {
+            "size": len(self._items),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else None,
+        }
+
+
+PRINCIPALS = PrincipalCache(
+    max_items=settings.AUTH_CACHE_MAX_ITEMS, ttl_s=settings.AUTH_CACHE_TTL_S
+)
+
+REGISTRY.gauge(
+    "auth_principal_cache_hit_ratio",
+    "Principal cache hit ratio since start",
+    fn=lambda: PRINCIPALS.stats()["hit_ratio"] or 0.0,
+)
+REGISTRY.gauge(
+    "auth_principal_cache_size", "Cached principals", fn=lambda: len(PRINCIPALS._items)
+)
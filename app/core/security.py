@@ -1,20 +1,22 @@
 import datetime, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jwt import ExpiredSignatureError, InvalidSignatureError, DecodeError
 
 from app.core.config import settings
-from app.db.deps import get_db
+from app.core.hashing import pwd
+from app.core.principals import PRINCIPALS, Principal
+from app.db.deps import get_async_db
 from app.db.models import User
 
-pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # must match your real login URL (with version prefix)
 bearer_scheme = HTTPBearer(bearerFormat="JWT", auto_error=False)
 
 
+# blocking variants for scripts; request handlers use app.core.hashing
 def hash_password(plain: str) -> str:
     return pwd.hash(plain)
 
@@ -44,10 +46,7 @@ def decode_token(token: str) -> dict:
     return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
-) -> User:
+def _token_subject(credentials: HTTPAuthorizationCredentials | None) -> str:
     if not credentials or (credentials.scheme or "").lower() != "bearer":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
@@ -64,15 +63,42 @@ def get_current_user(
         raise HTTPException(status_code=401, detail="Malformed token")
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
+    return payload.get("sub")
 
-    uid = payload.get("sub")
-    user = db.query(User).filter(User.id == uid).first()
+
+async def _load_user(db: AsyncSession, uid: str) -> User:
+    generation = PRINCIPALS.generation
+    user = await db.scalar(select(User).where(User.id == uid))
     if not user:
         raise HTTPException(status_code=401, detail="User not found for token")
+    PRINCIPALS.put(Principal.from_user(user), generation)
     return user
 
 
-def admin_required(user: User = Depends(get_current_user)) -> User:
+async def get_current_principal(
+    db: AsyncSession = Depends(get_async_db),
+    credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
+) -> Principal:
+    """
+    Authenticated user as a cached Principal; no DB round trip on a cache hit
+    (the session only connects on a miss).
+    """
+    uid = _token_subject(credentials)
+    principal = PRINCIPALS.get(uid)
+    if principal is None:
+        principal = Principal.from_user(await _load_user(db, uid))
+    return principal
+
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
+    credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
+) -> User:
+    """Authenticated user as an ORM row; always reads the DB."""
+    return await _load_user(db, _token_subject(credentials))
+
+
+def admin_required(user: Principal = Depends(get_current_principal)) -> Principal:
     if not user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admins only")
     return user
@@ -1,6 +1,10 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.core.config import settings
+from app.db.pool import configure_engine, engine_options
 import os
 
 
@@ -12,18 +16,54 @@ class Base(DeclarativeBase):
 if settings.DATABASE_URL.startswith("sqlite"):
     os.makedirs("./data", exist_ok=True)
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args=(
-        {"check_same_thread": False}
-        if settings.DATABASE_URL.startswith("sqlite")
-        else {}
-    ),
-)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+configure_engine(engine, "sync")
 SessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
+# async drivers for the same database, used by the request handlers.
+# SessionLocal stays the entry point for scripts and background threads.
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "psycopg"}
+
+
+def async_database_url(url: str) -> str:
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend!r}")
+    return u.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+_async_url = async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(_async_url, **engine_options(_async_url, is_async=True))
+configure_engine(async_engine.sync_engine, "async")
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 def init_db():
     from app.db.models import User  # noqa
+    from app.services.search import ensure_search_index
 
     Base.metadata.create_all(engine)
+    # create_all skips indexes on tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    ensure_search_index(engine)
+    _seed_state_rows()
+
+
+def _seed_state_rows():
+    # single-row state tables get their row here, so writers only UPDATE
+    from app.db.models import CatalogState, ModelState
+
+    for model in (CatalogState, ModelState):
+        try:
+            with engine.begin() as conn:
+                if conn.scalar(select(model.id).where(model.id == 1)) is None:
+                    conn.execute(insert(model).values(id=1))
+        except IntegrityError:
+            pass  # another worker seeded it first
@@ -1,4 +1,4 @@
-from app.db.base import SessionLocal
+from app.db.base import AsyncSessionLocal, SessionLocal
 
 
 def get_db():
@@ -7,3 +7,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
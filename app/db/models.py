@@ -4,14 +4,41 @@ from sqlalchemy.sql import func
 from app.db.base import Base
 import uuid
 import datetime
-from sqlalchemy import String, DateTime, Float, Text, JSON, Boolean, ForeignKey, func
+from sqlalchemy import String, DateTime, Float, Text, JSON, Boolean, ForeignKey, Index, func
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql.functions import FunctionElement
 
 
 def _uuid() -> str:
     return str(uuid.uuid4())
 
 
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+# SQLite stores DateTime as text; the ORM writes "YYYY-MM-DD HH:MM:SS.ffffff"
+# but CURRENT_TIMESTAMP has no fraction, and the two do not compare as the
+# instants they represent. Server defaults on keyset columns use this instead.
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%f000"  # %f is SS.SSS
+
+
+class utcnow(FunctionElement):
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    return f"(strftime('{SQLITE_DATETIME_FORMAT}', 'now'))"
+
+
 class User(Base):
     __tablename__ = "users"
     id: Mapped[str] = mapped_column(String, primary_key=True, default=_uuid)
@@ -33,12 +60,21 @@ class Scan(Base):
     confidence: Mapped[float] = mapped_column(Float)
     top_k: Mapped[dict | None] = mapped_column(JSON)
     model_version: Mapped[str | None] = mapped_column(String)
+    # app-assigned (microsecond precision, stable format) so keyset cursors
+    # compare exactly; server_default covers rows inserted outside the ORM in
+    # the same format. Rows from before that default:
+    # app.scripts.normalize_scan_timestamps
     created_at: Mapped[datetime.datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), default=_utcnow, server_default=utcnow()
     )
 
     user: Mapped["User"] = relationship(backref="scans")
 
+    __table_args__ = (
+        # a user's history, newest first: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_scans_user_created_id", "user_id", "created_at", "id"),
+    )
+
 
 class Disease(Base):
     __tablename__ = "diseases"
@@ -71,3 +107,37 @@ class Treatment(Base):
     updated_at: Mapped[datetime.datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+
+
+class PredictionCacheEntry(Base):
+    __tablename__ = "prediction_cache"
+    content_hash: Mapped[str] = mapped_column(String, primary_key=True)
+    model_version: Mapped[str] = mapped_column(String, primary_key=True)
+    top_k: Mapped[list] = mapped_column(JSON)
+    # same text format as the touches PredictionCache writes (see utcnow)
+    last_used_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=utcnow(), index=True
+    )
+
+
+class ModelState(Base):
+    """
+    Single-row table: the model every API worker should serve, as set by
+    the last admin reload or rollback. `generation` is bumped on each.
+    """
+
+    __tablename__ = "model_state"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    generation: Mapped[int] = mapped_column(default=0)
+    path: Mapped[str | None] = mapped_column(String)
+    backend: Mapped[str | None] = mapped_column(String)
+    # rollbacks pin a version: workers must not activate a newer file
+    version: Mapped[str | None] = mapped_column(String)
+
+
+class CatalogState(Base):
+    """Single-row table; `version` is bumped on every catalog write."""
+
+    __tablename__ = "catalog_state"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(default=0)
@@ -0,0 +1,124 @@
+"""
+Engine profile: pool options, SQLite connect-time pragmas and pool metrics.
+
+Both the sync and the async engine are built from the same settings, so
+scripts and request handlers behave the same under contention.
+"""
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+POOL_WAIT_SECONDS = REGISTRY.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to get a connection from the pool (incl. opening a new one)",
+    labelnames=("engine",),
+)
+POOL_TIMEOUTS = REGISTRY.counter(
+    "db_pool_checkout_timeouts_total", "Pool checkouts that timed out", ("engine",)
+)
+
+
+def _timed(base, metric_name: str):
+    # a class per engine kind: engine.dispose() recreates the pool from its
+    # class, so the label can't live on the instance
+    class TimedPool(base):
+        def _do_get(self):
+            t0 = time.perf_counter()
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                POOL_TIMEOUTS.labels(metric_name).inc()
+                raise
+            finally:
+                POOL_WAIT_SECONDS.labels(metric_name).observe(
+                    time.perf_counter() - t0
+                )
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+TimedQueuePool = _timed(QueuePool, "sync")
+TimedAsyncQueuePool = _timed(AsyncAdaptedQueuePool, "async")
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return is_sqlite(url) and make_url(url).database in (None, "", ":memory:")
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """create_engine / create_async_engine keyword arguments for `url`."""
+    opts: dict = {}
+    if is_sqlite(url):
+        opts["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+        if _is_memory_sqlite(url):
+            # in-memory databases keep SQLAlchemy's single-connection pool
+            return opts
+    else:
+        opts["pool_pre_ping"] = settings.DB_POOL_PRE_PING
+    opts.update(
+        poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_S,
+        pool_recycle=settings.DB_POOL_RECYCLE_S,
+    )
+    return opts
+
+
+def sqlite_pragmas() -> list[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}",
+        # negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KIB)}",
+        f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}",
+    ]
+    if settings.SQLITE_JOURNAL_MODE:
+        pragmas.insert(0, f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+    return pragmas
+
+
+def configure_engine(engine: Engine, name: str):
+    """
+    Install connect-time pragmas (SQLite) and pool gauges on `engine`
+    (for an AsyncEngine pass `.sync_engine`). `name` must match the pool
+    class's label: "sync" or "async".
+    """
+    if engine.dialect.name == "sqlite" and not _is_memory_sqlite(str(engine.url)):
+        pragmas = sqlite_pragmas()
+
+        @event.listens_for(engine, "connect")
+        def _set_pragmas(dbapi_conn, _record):
+            cur = dbapi_conn.cursor()
+            try:
+                for p in pragmas:
+                    cur.execute(p)
+            finally:
+                cur.close()
+
+    if isinstance(engine.pool, QueuePool):
+        # read engine.pool at scrape time; dispose() swaps the pool object
+        REGISTRY.gauge(
+            "db_pool_checked_out", "Connections in use", ("engine",)
+        ).labels(name).set_function(lambda: engine.pool.checkedout())
+        REGISTRY.gauge(
+            "db_pool_open", "Connections open (idle + in use)", ("engine",)
+        ).labels(name).set_function(
+            lambda: engine.pool.checkedin() + engine.pool.checkedout()
+        )
+        REGISTRY.gauge(
+            "db_pool_overflow", "Connections above pool_size", ("engine",)
+        ).labels(name).set_function(lambda: max(0, engine.pool.overflow()))
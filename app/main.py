@@ -1,14 +1,50 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.api.v1 import api_v1
-from app.db.base import init_db
+from app.db.base import async_engine, init_db
+from app.utils.request_metrics import RequestMetricsMiddleware
+from app.utils.static_files import UploadStaticFiles
+from app.ml.loader import warmup
+from app.services.model_state import MODEL_STATE
+from app.services.prediction_cache import PREDICTIONS
+from app.services.scan_writer import SCAN_WRITER
 
 setup_logging()
-app = FastAPI(title=settings.APP_NAME)
+log = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # follow admin reloads/rollbacks made on any worker; the first check
+    # adopts a model chosen before this worker started
+    await run_in_threadpool(MODEL_STATE.start)
+    # uvicorn does not accept connections until startup has finished,
+    # so an eager load keeps cold-start latency off real requests
+    if settings.MODEL_EAGER_LOAD:
+        try:
+            warmup()
+        except Exception:
+            # keep serving non-ML routes; /health/ready reports the failure
+            log.exception("Model warmup failed")
+    if settings.SCAN_WRITE_BEHIND:
+        # replays spool left by a crashed worker before taking traffic
+        await run_in_threadpool(SCAN_WRITER.start)
+    PREDICTIONS.start()
+    yield
+    await run_in_threadpool(MODEL_STATE.stop)
+    await run_in_threadpool(SCAN_WRITER.stop)
+    await run_in_threadpool(PREDICTIONS.stop)
+    await async_engine.dispose()
+
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,8 +53,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# outermost, so CORS preflights and error responses are counted too
+app.add_middleware(RequestMetricsMiddleware)
 
-app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
+app.mount("/uploads", UploadStaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 # create tables
 init_db()
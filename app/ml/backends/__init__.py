@@ -0,0 +1,33 @@
+from app.ml.backends.base import InferenceBackend, InputSpec, file_version
+from app.ml.backends.keras import KerasBackend
+from app.ml.backends.onnx_runtime import OnnxBackend
+from app.ml.backends.remote import RemoteBackend
+
+BACKENDS: dict[str, type[InferenceBackend]] = {
+    KerasBackend.name: KerasBackend,
+    OnnxBackend.name: OnnxBackend,
+    RemoteBackend.name: RemoteBackend,
+}
+
+
+def create_backend(name: str, path: str) -> InferenceBackend:
+    """Instantiate (but do not load) the backend registered under `name`."""
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise RuntimeError(
+            f"Unknown MODEL_BACKEND {name!r} (expected one of {sorted(BACKENDS)})"
+        )
+    return cls(path)
+
+
+__all__ = [
+    "BACKENDS",
+    "InferenceBackend",
+    "InputSpec",
+    "KerasBackend",
+    "OnnxBackend",
+    "RemoteBackend",
+    "create_backend",
+    "file_version",
+]
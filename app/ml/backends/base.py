@@ -0,0 +1,49 @@
+import datetime
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class InputSpec:
+    height: int
+    width: int
+    channels: int = 3
+    dtype: str = "float32"
+
+
+def file_version(path: str) -> str:
+    # version from filename + mtime
+    mtime = datetime.datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+    return f"{os.path.basename(path)}@{mtime}"
+
+
+class InferenceBackend:
+    """
+    A loaded model that maps an (N, H, W, C) float32 batch in [0, 1] to
+    (N, num_classes) probabilities.
+
+    Implementations import their runtime inside `load()`, so a worker only
+    pays for the runtime it is configured to use.
+    """
+
+    name = "base"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> None:
+        raise NotImplementedError
+
+    def predict_batch(self, x: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def input_spec(self) -> InputSpec:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the model; the registry calls this when unloading a version."""
+
+    def version(self) -> str:
+        return file_version(self.path)
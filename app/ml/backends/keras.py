@@ -0,0 +1,28 @@
+import numpy as np
+
+from app.ml.backends.base import InferenceBackend, InputSpec
+
+
+class KerasBackend(InferenceBackend):
+    """Full TensorFlow/Keras runtime, loading a .keras/.h5 model."""
+
+    name = "keras"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._model = None
+
+    def load(self) -> None:
+        from tensorflow.keras.models import load_model
+
+        self._model = load_model(self.path)
+
+    def predict_batch(self, x: np.ndarray) -> np.ndarray:
+        return np.asarray(self._model.predict(x, verbose=0))
+
+    def input_spec(self) -> InputSpec:
+        _, h, w, c = self._model.input_shape
+        return InputSpec(height=h, width=w, channels=c)
+
+    def close(self) -> None:
+        self._model = None
@@ -0,0 +1,43 @@
+import numpy as np
+
+from app.core.config import settings
+from app.ml.backends.base import InferenceBackend, InputSpec
+
+
+class OnnxBackend(InferenceBackend):
+    """
+    Exported ONNX graph on onnxruntime's CPU provider. A few tens of MB of
+    runtime instead of the full TensorFlow stack; export with
+    `python -m app.scripts.export_onnx`.
+    """
+
+    name = "onnx"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._session = None
+        self._input_name = None
+
+    def load(self) -> None:
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.MODEL_INTRA_OP_THREADS:
+            opts.intra_op_num_threads = settings.MODEL_INTRA_OP_THREADS
+        self._session = ort.InferenceSession(
+            self.path, sess_options=opts, providers=["CPUExecutionProvider"]
+        )
+        self._input_name = self._session.get_inputs()[0].name
+
+    def predict_batch(self, x: np.ndarray) -> np.ndarray:
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        return self._session.run(None, {self._input_name: x})[0]
+
+    def input_spec(self) -> InputSpec:
+        # exported as NHWC with a dynamic batch dim
+        _, h, w, c = self._session.get_inputs()[0].shape
+        return InputSpec(height=int(h), width=int(w), channels=int(c))
+
+    def close(self) -> None:
+        self._session = None
@@ -0,0 +1,153 @@
+import json
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from app.core.config import settings
+from app.ml import shm_ring
+from app.ml.backends.base import InferenceBackend, InputSpec
+from app.ml.shm_ring import SlotRing, send_frame, recv_frame
+
+_ROWS = struct.Struct("<I")
+
+
+class _Conn:
+    __slots__ = ("sock", "slot", "idle_since")
+
+    def __init__(self, sock: socket.socket, slot: int):
+        self.sock = sock
+        self.slot = slot
+        self.idle_since = 0.0
+
+
+class RemoteBackend(InferenceBackend):
+    """
+    Client for `python -m app.ml.inference_server`. Tensors go through the
+    shared-memory slot ring; the Unix socket only carries control frames.
+    The API worker never imports an ML runtime.
+
+    Each connection leases one slot for as long as it is open, and slots
+    are shared by every API worker. So the pool keeps at most
+    INFERENCE_IDLE_CONNECTIONS idle connections, and a reaper closes any idle
+    longer than INFERENCE_IDLE_TIMEOUT_S, returning their slots to the server.
+    """
+
+    name = "remote"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._ring: SlotRing | None = None
+        self._idle: deque[_Conn] = deque()  # most recently used on the right
+        self._lock = threading.Lock()
+        self._version = None
+        self._stop = threading.Event()
+        self._reaper: threading.Thread | None = None
+
+    def load(self) -> None:
+        self._ring = SlotRing.attach(settings.INFERENCE_SHM_NAME)
+        # one connection up front, to fail fast and learn the model version
+        self._checkin(self._connect())
+        self._stop.clear()
+        self._reaper = threading.Thread(target=self._reap, name="remote-reaper", daemon=True)
+        self._reaper.start()
+
+    def _connect(self) -> _Conn:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(settings.INFERENCE_SOCKET_PATH)
+            # the server says hello once one of its processes has a free slot
+            sock.settimeout(settings.INFERENCE_CONNECT_TIMEOUT_S)
+            try:
+                status, payload = recv_frame(sock)
+            except socket.timeout:
+                raise RuntimeError(
+                    "Inference server refused connection: no free slot within "
+                    f"{settings.INFERENCE_CONNECT_TIMEOUT_S}s"
+                ) from None
+            sock.settimeout(None)
+        except BaseException:
+            sock.close()
+            raise
+        if status != shm_ring.OK:
+            sock.close()
+            raise RuntimeError(f"Inference server refused connection: {payload.decode()}")
+        hello = json.loads(payload)
+        self._version = hello["version"]
+        return _Conn(sock, hello["slot"])
+
+    def _checkout(self) -> _Conn:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def _checkin(self, conn: _Conn):
+        with self._lock:
+            if len(self._idle) < settings.INFERENCE_IDLE_CONNECTIONS:
+                conn.idle_since = time.monotonic()
+                self._idle.append(conn)
+                return
+        conn.sock.close()  # the server frees its slot
+
+    def close_idle(self, older_than: float) -> int:
+        """Close connections idle for more than `older_than` seconds."""
+        cutoff = time.monotonic() - older_than
+        expired = []
+        with self._lock:
+            while self._idle and self._idle[0].idle_since <= cutoff:
+                expired.append(self._idle.popleft())
+        for conn in expired:
+            conn.sock.close()
+        return len(expired)
+
+    def _reap(self):
+        timeout = settings.INFERENCE_IDLE_TIMEOUT_S
+        while not self._stop.wait(max(timeout / 2, 0.05)):
+            self.close_idle(timeout)
+
+    def _run(self, conn: _Conn, x: np.ndarray) -> np.ndarray:
+        n = len(x)
+        self._ring.input(conn.slot)[:n] = x
+        send_frame(conn.sock, shm_ring.OK, _ROWS.pack(n))
+        status, payload = recv_frame(conn.sock)
+        if status != shm_ring.OK:
+            raise RuntimeError(f"Remote inference failed: {payload.decode()}")
+        return self._ring.output(conn.slot)[:n].copy()
+
+    def predict_batch(self, x: np.ndarray) -> np.ndarray:
+        rows = self._ring.slot_rows
+        conn = self._checkout()
+        try:
+            if len(x) <= rows:
+                out = self._run(conn, x)
+            else:
+                out = np.concatenate(
+                    [self._run(conn, x[i : i + rows]) for i in range(0, len(x), rows)]
+                )
+        except BaseException:
+            # connection state is unknown; drop it and free the slot server-side
+            conn.sock.close()
+            raise
+        self._checkin(conn)
+        return out
+
+    def input_spec(self) -> InputSpec:
+        h, w, c = self._ring.input_shape
+        return InputSpec(height=h, width=w, channels=c)
+
+    def version(self) -> str:
+        return self._version
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._reaper is not None:
+            self._reaper.join()
+            self._reaper = None
+        self.close_idle(older_than=-1)
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
@@ -0,0 +1,115 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from app.core.metrics import REGISTRY
+
+BATCH_SIZE = REGISTRY.histogram(
+    "inference_batch_size",
+    "Number of images per model predict call",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+QUEUE_WAIT = REGISTRY.histogram(
+    "inference_queue_wait_seconds",
+    "Time a request waited in the batching queue before its batch ran",
+)
+
+_STOP = object()
+
+
+class _Item:
+    __slots__ = ("x", "future", "enqueued")
+
+    def __init__(self, x: np.ndarray):
+        self.x = x
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class BatchScheduler:
+    """
+    Gathers concurrent predict requests into one batch.
+
+    A batch is dispatched as soon as it holds `max_batch_size` rows or the first
+    request in it has waited `max_wait_ms`. `predict_fn` takes an (N, H, W, C)
+    array and returns (N, num_classes) probabilities, so any stub works.
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self._predict = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: queue.Queue = queue.Queue()
+        self._pending: _Item | None = None  # overflow carried into the next batch
+        self._thread = threading.Thread(
+            target=self._run, name="inference-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, x: np.ndarray) -> Future:
+        """Queue an (N, H, W, C) or (H, W, C) array; the future yields (N, K) probs."""
+        if x.ndim == 3:
+            x = np.expand_dims(x, 0)
+        item = _Item(x)
+        self._queue.put(item)
+        return item.future
+
+    def predict(self, x: np.ndarray, timeout: float | None = None) -> np.ndarray:
+        return self.submit(x).result(timeout=timeout)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join(timeout=5)
+
+    def _next(self, timeout: float | None):
+        if self._pending is not None:
+            item, self._pending = self._pending, None
+            return item
+        return self._queue.get(timeout=timeout) if timeout is not None else self._queue.get()
+
+    def _gather(self) -> list[_Item] | None:
+        first = self._next(None)
+        if first is _STOP:
+            return None
+        batch, rows = [first], len(first.x)
+        deadline = first.enqueued + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._next(remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            if rows + len(item.x) > self.max_batch_size:
+                self._pending = item
+                break
+            batch.append(item)
+            rows += len(item.x)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._gather()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            for item in batch:
+                QUEUE_WAIT.observe(started - item.enqueued)
+            try:
+                xs = batch[0].x if len(batch) == 1 else np.concatenate([i.x for i in batch])
+                BATCH_SIZE.observe(len(xs))
+                probs = np.asarray(self._predict(xs))
+            except Exception as e:  # hand the failure to every caller in the batch
+                for item in batch:
+                    item.future.set_exception(e)
+                continue
+            offset = 0
+            for item in batch:
+                n = len(item.x)
+                item.future.set_result(probs[offset : offset + n])
+                offset += n
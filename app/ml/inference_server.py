@@ -0,0 +1,188 @@
+"""
+Dedicated inference process(es) fed over shared memory.
+
+    python -m app.ml.inference_server [--processes 2] [--backend keras]
+
+The parent creates the shared-memory slot ring and the Unix socket, then
+forks `--processes` children. Each child loads its own copy of the model,
+owns a disjoint share of the slots and serves connections from API workers
+(MODEL_BACKEND=remote). Requests from every connected API worker go through
+one BatchScheduler per child, so batching also works across API processes.
+
+A child only accepts while it has a free slot, so connections queue on the
+shared listener for whichever child frees one first: no child turns a
+client away while another has capacity. A client that is not accepted
+within INFERENCE_CONNECT_TIMEOUT_S gives up.
+
+Per connection:
+  server -> client  hello {slot, version}
+  client -> server  n rows written into the slot's input region
+  server -> client  OK once probabilities are in the slot's output region
+"""
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import queue
+import signal
+import socket
+import struct
+import threading
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.ml import shm_ring
+from app.ml.shm_ring import SlotRing, send_frame, recv_frame
+
+log = logging.getLogger(__name__)
+
+_ROWS = struct.Struct("<I")
+
+
+def _read_meta() -> tuple[tuple[int, int, int], int]:
+    with open(settings.META_PATH, "r") as f:
+        s = int(json.load(f).get("img_size", 224))
+    with open(settings.LABELS_PATH, "r") as f:
+        num_classes = len(json.load(f))
+    return (s, s, 3), num_classes
+
+
+def _serve_connection(
+    conn, slot: int, ring: SlotRing, free: queue.SimpleQueue, scheduler, version
+):
+    try:
+        try:
+            send_frame(conn, shm_ring.OK, json.dumps({"slot": slot, "version": version}).encode())
+        except OSError:
+            return  # the client gave up waiting in the listen backlog
+        while True:
+            try:
+                _, payload = recv_frame(conn)
+            except ConnectionError:
+                return
+            (n,) = _ROWS.unpack(payload)
+            try:
+                if not 0 < n <= ring.slot_rows:
+                    raise ValueError(f"batch of {n} rows does not fit a slot")
+                probs = scheduler.predict(ring.input(slot)[:n])
+                ring.output(slot)[:n] = probs
+            except Exception as e:
+                send_frame(conn, shm_ring.ERROR, str(e).encode())
+                continue
+            send_frame(conn, shm_ring.OK)
+    finally:
+        free.put(slot)
+        conn.close()
+
+
+def _child_main(index: int, processes: int, listener: socket.socket, backend_name: str):
+    from app.ml.backends import create_backend
+    from app.ml.batching import BatchScheduler
+
+    setup_logging()
+    # the parent handles Ctrl-C for the whole group and terminates us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    ring = SlotRing.attach(settings.INFERENCE_SHM_NAME, untrack=False)
+
+    backend = create_backend(backend_name, settings.MODEL_PATH)
+    backend.load()
+    h, w, c = ring.input_shape
+    # warm up and check the model matches the ring layout
+    out = backend.predict_batch(np.zeros((1, h, w, c), dtype=np.float32))
+    if out.shape[-1] != ring.num_classes:
+        raise RuntimeError(
+            f"model has {out.shape[-1]} outputs, labels file has {ring.num_classes}"
+        )
+    version = backend.version()
+    scheduler = BatchScheduler(
+        backend.predict_batch,
+        max_batch_size=settings.INFERENCE_MAX_BATCH,
+        max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+    )
+
+    # slots are partitioned between children so no cross-process locking is needed
+    free: queue.SimpleQueue = queue.SimpleQueue()
+    for slot in range(index, ring.slots, processes):
+        free.put(slot)
+
+    log.info("Inference worker %d ready (%s, pid %d)", index, version, os.getpid())
+    while True:
+        # with every slot leased, leave new connections to the other children
+        slot = free.get()
+        conn, _ = listener.accept()
+        threading.Thread(
+            target=_serve_connection,
+            args=(conn, slot, ring, free, scheduler, version),
+            daemon=True,
+        ).start()
+
+
+def serve(processes: int, backend_name: str):
+    if backend_name == "remote":
+        raise SystemExit("The inference server needs a local backend (keras|onnx)")
+    input_shape, num_classes = _read_meta()
+    ring = SlotRing.create(
+        settings.INFERENCE_SHM_NAME,
+        slots=settings.INFERENCE_SHM_SLOTS,
+        slot_rows=settings.INFERENCE_SLOT_ROWS,
+        input_shape=input_shape,
+        num_classes=num_classes,
+    )
+    path = settings.INFERENCE_SOCKET_PATH
+    if os.path.exists(path):
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(256)
+
+    ctx = mp.get_context("fork")
+    children = [
+        ctx.Process(
+            target=_child_main,
+            args=(i, processes, listener, backend_name),
+            name=f"inference-{i}",
+            daemon=True,
+        )
+        for i in range(processes)
+    ]
+    for p in children:
+        p.start()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    log.info(
+        "Inference server on %s, %d process(es), shm %s (%d slots)",
+        path, processes, settings.INFERENCE_SHM_NAME, ring.slots,
+    )
+    try:
+        while not stop.wait(1.0):
+            if not any(p.is_alive() for p in children):
+                log.error("All inference workers exited")
+                break
+    finally:
+        for p in children:
+            p.terminate()
+        for p in children:
+            p.join(timeout=5)
+        listener.close()
+        if os.path.exists(path):
+            os.unlink(path)
+        ring.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the shared inference server")
+    ap.add_argument("--processes", type=int, default=settings.INFERENCE_SERVER_PROCESSES)
+    ap.add_argument("--backend", default=settings.INFERENCE_SERVER_BACKEND)
+    args = ap.parse_args()
+    setup_logging()
+    serve(args.processes, args.backend)
+
+
+if __name__ == "__main__":
+    main()
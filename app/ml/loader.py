@@ -1,45 +1,69 @@
-import os, json, datetime, threading
-from tensorflow.keras.models import load_model
+import logging
 from app.core.config import settings
+from app.ml.registry import MODELS
 
-
-_MODEL = None
-_IDX2LABEL = None
-_IMG_SIZE = (224, 224)
-_MODEL_VERSION = None
-_LOCK = threading.Lock()
+log = logging.getLogger(__name__)
 
 
 def load_artifacts():
     """
-    Lazy load and cache (model, labels, img_size, version).
-    Safe to call from any endpoint; loads exactly once per process.
+    Lazy load and cache (model, labels, img_size, version) of the active
+    model version. `model` is an InferenceBackend (see app/ml/backends)
+    chosen by MODEL_BACKEND. Safe to call from any endpoint.
+
+    Request paths that predict should use `MODELS.acquire()` instead, so a
+    hot reload cannot unload the version they are using.
+    """
+    entry = MODELS.active()
+    return entry.backend, entry.idx2label, entry.img_size, entry.version
+
+
+def warmup_batch_sizes() -> list[int]:
+    """Every batch size the API can send to predict, unless configured explicitly."""
+    if settings.MODEL_WARMUP_BATCH_SIZES:
+        return sorted(set(settings.MODEL_WARMUP_BATCH_SIZES))
+    # /scans/batch predicts its cache misses, anywhere from 1 to MAX_BATCH_FILES
+    largest = settings.MAX_BATCH_FILES
+    if settings.INFERENCE_BATCHING:
+        largest = max(largest, settings.INFERENCE_MAX_BATCH)
+    return list(range(1, largest + 1))
+
+
+def warmup(batch_sizes: list[int] | None = None):
+    """
+    Load the model and run one predict per batch size so graph tracing and
+    allocator growth happen before the first real request.
     """
-    global _MODEL, _IDX2LABEL, _IMG_SIZE, _MODEL_VERSION
-    if _MODEL is not None:
-        return _MODEL, _IDX2LABEL, _IMG_SIZE, _MODEL_VERSION
-
-    with _LOCK:
-        if _MODEL is None:
-            if not os.path.exists(settings.MODEL_PATH):
-                raise RuntimeError(f"Model not found at {settings.MODEL_PATH}")
-            _MODEL = load_model(settings.MODEL_PATH)
-
-            # version from filename + mtime
-            mtime = datetime.datetime.fromtimestamp(
-                os.path.getmtime(settings.MODEL_PATH)
-            ).isoformat()
-            _MODEL_VERSION = f"{os.path.basename(settings.MODEL_PATH)}@{mtime}"
-
-            # labels
-            with open(settings.LABELS_PATH, "r") as f:
-                # labels.json is { "0": "Tomato___Early_blight", ... }
-                _IDX2LABEL = {int(k): v for k, v in json.load(f).items()}
-
-            # meta
-            with open(settings.META_PATH, "r") as f:
-                meta = json.load(f)
-                s = int(meta.get("img_size", 224))
-                _IMG_SIZE = (s, s)
-
-    return _MODEL, _IDX2LABEL, _IMG_SIZE, _MODEL_VERSION
+    batch_sizes = batch_sizes or warmup_batch_sizes()
+    entry = MODELS.active()
+    entry.warm(batch_sizes)
+
+    # build the per-process preprocessor too, so its first use is cheap
+    from app.ml.preprocess import get_preprocessor
+
+    get_preprocessor(entry.img_size)
+    log.info(
+        "Warmup done for batch sizes %s in %.2fs", batch_sizes, entry.warmup["seconds"]
+    )
+
+
+def model_status() -> dict:
+    """Current load/warmup state. Never triggers a load."""
+    if not MODELS.is_loaded():
+        return {
+            "model_loaded": False,
+            "model_version": None,
+            "num_classes": None,
+            "img_size": None,
+            "load_seconds": None,
+            "warmup": {"state": "pending", "seconds": None, "batch_sizes": [], "error": None},
+        }
+    entry = MODELS.active()
+    return {
+        "model_loaded": True,
+        "model_version": entry.version,
+        "num_classes": len(entry.idx2label),
+        "img_size": list(entry.img_size),
+        "load_seconds": entry.load_seconds,
+        "warmup": dict(entry.warmup),
+    }
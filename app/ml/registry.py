@@ -0,0 +1,323 @@
+import gc
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.ml.backends import InferenceBackend, create_backend
+from app.ml.batching import BatchScheduler
+
+log = logging.getLogger(__name__)
+
+# loads and warmups run for seconds to minutes, not milliseconds
+_SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+LOAD_SECONDS = REGISTRY.histogram(
+    "model_load_seconds", "Loading one model version", _SLOW_BUCKETS, ("backend",)
+)
+WARMUP_SECONDS = REGISTRY.histogram(
+    "model_warmup_seconds", "Warmup predicts of one model version", _SLOW_BUCKETS, ("backend",)
+)
+LOAD_FAILURES = REGISTRY.counter(
+    "model_load_failures_total", "Model loads or warmups that failed", ("backend", "phase")
+)
+
+
+def _read_labels(path: str) -> dict[int, str]:
+    with open(path, "r") as f:
+        # labels.json is { "0": "Tomato___Early_blight", ... }
+        return {int(k): v for k, v in json.load(f).items()}
+
+
+def _read_img_size(path: str) -> tuple[int, int]:
+    with open(path, "r") as f:
+        s = int(json.load(f).get("img_size", 224))
+    return (s, s)
+
+
+class ModelEntry:
+    """One loaded model version plus the bookkeeping needed to drain it."""
+
+    def __init__(
+        self,
+        backend: InferenceBackend,
+        idx2label: dict[int, str],
+        img_size: tuple[int, int],
+        load_seconds: float,
+    ):
+        self.backend = backend
+        self.version = backend.version()
+        self.path = backend.path
+        self.backend_name = backend.name
+        self.idx2label = idx2label
+        self.img_size = img_size
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.warmup = {"state": "pending", "seconds": None, "batch_sizes": [], "error": None}
+        self.scheduler: BatchScheduler | None = None
+        if settings.INFERENCE_BATCHING:
+            self.scheduler = BatchScheduler(
+                backend.predict_batch,
+                max_batch_size=settings.INFERENCE_MAX_BATCH,
+                max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+            )
+        self._inflight = 0
+        self._cond = threading.Condition()
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        """Predict x, going through this version's batch scheduler when batching is on."""
+        if self.scheduler is not None:
+            return self.scheduler.predict(x)
+        return self.backend.predict_batch(x)
+
+    def warm(self, batch_sizes: list[int]):
+        """Run one predict per batch size so tracing happens before real traffic."""
+        self.warmup.update(state="running", batch_sizes=batch_sizes, error=None)
+        t0 = time.perf_counter()
+        try:
+            w, h = self.img_size
+            for n in batch_sizes:
+                self.backend.predict_batch(np.zeros((n, h, w, 3), dtype=np.float32))
+        except Exception as e:
+            self.warmup.update(state="failed", error=str(e))
+            LOAD_FAILURES.labels(self.backend.name, "warmup").inc()
+            raise
+        self.warmup.update(state="done", seconds=time.perf_counter() - t0)
+        WARMUP_SECONDS.labels(self.backend.name).observe(self.warmup["seconds"])
+
+    def _enter(self):
+        with self._cond:
+            self._inflight += 1
+
+    def _exit(self):
+        with self._cond:
+            self._inflight -= 1
+            if self._inflight == 0:
+                self._cond.notify_all()
+
+    def drain(self, timeout: float) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self._inflight == 0, timeout=timeout)
+
+    def unload(self):
+        if self.scheduler is not None:
+            self.scheduler.close()
+            self.scheduler = None
+        self.backend.close()
+
+    def status(self) -> dict:
+        return {
+            "version": self.version,
+            "backend": self.backend_name,
+            "path": self.path,
+            "num_classes": len(self.idx2label),
+            "img_size": list(self.img_size),
+            "load_seconds": self.load_seconds,
+            "loaded_at": self.loaded_at,
+            "inflight": self._inflight,
+            "warmup": dict(self.warmup),
+        }
+
+
+class ModelRegistry:
+    """
+    Keeps up to `max_loaded` model versions in memory with one of them active.
+
+    Requests pin the active version with `acquire()`. `reload()` loads and
+    warms a new version in the background, then swaps it in atomically;
+    requests already holding the old version finish on it, and versions
+    pushed out of the registry are unloaded in the background once drained.
+    `rollback()` re-activates the previously active version.
+
+    The registry is per process; app.services.model_state carries admin
+    reloads and rollbacks to the other workers.
+    """
+
+    def __init__(self, max_loaded: int = 2):
+        self.max_loaded = max(1, max_loaded)
+        self._entries: dict[str, ModelEntry] = {}  # insertion = activation order
+        self._active: ModelEntry | None = None
+        self._history: list[str] = []  # previously active versions, newest last
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()  # one load at a time
+        self.reload_state = {"state": "idle", "error": None, "target": None}
+        # what a lazy first request loads; follows successful reloads
+        self.target = (settings.MODEL_PATH, settings.MODEL_BACKEND)
+
+    # ----- request path -----
+
+    def active(self) -> ModelEntry:
+        entry = self._active
+        if entry is not None:
+            return entry
+        with self._load_lock:
+            if self._active is None:
+                self._activate(self._load(*self.target))
+        return self._active
+
+    @contextmanager
+    def acquire(self):
+        """Pin the active version for the duration of a request."""
+        while True:
+            entry = self.active()
+            entry._enter()
+            # lost a race with a swap that already evicted this entry
+            if entry.version in self._entries:
+                break
+            entry._exit()
+        try:
+            yield entry
+        finally:
+            entry._exit()
+
+    def is_loaded(self) -> bool:
+        return self._active is not None
+
+    # ----- lifecycle -----
+
+    def _load(self, path: str, backend_name: str) -> ModelEntry:
+        if backend_name != "remote" and not os.path.exists(path):
+            raise RuntimeError(f"Model not found at {path}")
+        t0 = time.perf_counter()
+        backend = create_backend(backend_name, path)
+        try:
+            backend.load()
+        except Exception:
+            LOAD_FAILURES.labels(backend_name, "load").inc()
+            raise
+        entry = ModelEntry(
+            backend,
+            _read_labels(settings.LABELS_PATH),
+            _read_img_size(settings.META_PATH),
+            time.perf_counter() - t0,
+        )
+        LOAD_SECONDS.labels(backend_name).observe(entry.load_seconds)
+        log.info("Loaded %s in %.2fs", entry.version, entry.load_seconds)
+        return entry
+
+    def _activate(self, entry: ModelEntry):
+        evicted: list[ModelEntry] = []
+        with self._lock:
+            self._entries.pop(entry.version, None)
+            self._entries[entry.version] = entry
+            previous = self._active
+            self._active = entry  # the atomic swap
+            if previous is not None and previous is not entry:
+                self._history = [v for v in self._history if v != previous.version]
+                self._history.append(previous.version)
+            while len(self._entries) > self.max_loaded:
+                oldest = next(iter(self._entries))
+                evicted.append(self._entries.pop(oldest))
+            self._history = [v for v in self._history if v in self._entries]
+        log.info("Activated model %s", entry.version)
+        for old in evicted:
+            # draining can take MODEL_DRAIN_TIMEOUT_S; don't hold up the caller
+            threading.Thread(
+                target=self._retire, args=(old,), name="model-retire", daemon=True
+            ).start()
+
+    def _retire(self, entry: ModelEntry):
+        if not entry.drain(timeout=settings.MODEL_DRAIN_TIMEOUT_S):
+            log.warning("Unloading %s with requests still in flight", entry.version)
+        entry.unload()
+        gc.collect()
+
+    def load_and_activate(
+        self,
+        path: str,
+        backend_name: str,
+        batch_sizes: list[int],
+        version: str | None = None,
+    ) -> ModelEntry:
+        """
+        Load, warm and activate the model at `path`. With `version`, fail
+        instead of activating anything else (the file changed since).
+        """
+        with self._load_lock:
+            entry = self._entries.get(version) if version else None
+            if entry is None:
+                entry = self._load(path, backend_name)
+                if version and entry.version != version:
+                    entry.unload()
+                    raise RuntimeError(f"{path} is now {entry.version}, not {version}")
+                existing = self._entries.get(entry.version)
+                if existing is not None:
+                    # same file already loaded; just make it active
+                    entry.unload()
+                    entry = existing
+                else:
+                    entry.warm(batch_sizes)
+            self._activate(entry)
+            self.target = (path, backend_name)
+        return entry
+
+    def reload(
+        self,
+        path: str,
+        backend_name: str,
+        batch_sizes: list[int],
+        version: str | None = None,
+    ) -> bool:
+        """Start a background load + warm + swap. False if one is already running."""
+        if self.reload_state["state"] == "running":
+            return False
+        self.reload_state = {"state": "running", "error": None, "target": version or path}
+
+        def _run():
+            try:
+                entry = self.load_and_activate(path, backend_name, batch_sizes, version)
+                self.reload_state = {"state": "done", "error": None, "target": entry.version}
+            except Exception as e:
+                log.exception("Model reload failed")
+                self.reload_state = {"state": "failed", "error": str(e), "target": path}
+
+        threading.Thread(target=_run, name="model-reload", daemon=True).start()
+        return True
+
+    def activate_loaded(self, version: str) -> ModelEntry | None:
+        """Make an already loaded version active; None if it is not loaded here."""
+        with self._load_lock:
+            entry = self._entries.get(version)
+            if entry is not None:
+                self._activate(entry)
+                self.target = (entry.path, entry.backend_name)
+        return entry
+
+    def rollback(self) -> ModelEntry:
+        """Re-activate the previously active version (must still be loaded)."""
+        with self._load_lock:
+            with self._lock:
+                if not self._history:
+                    raise RuntimeError("No previous model version loaded to roll back to")
+                entry = self._entries[self._history.pop()]
+            self._activate(entry)
+            # activating pushed the version we rolled back from onto history;
+            # drop it so repeated rollbacks walk further back
+            with self._lock:
+                if self._history:
+                    self._history.pop()
+            self.target = (entry.path, entry.backend_name)
+        return entry
+
+    def status(self) -> dict:
+        with self._lock:
+            entries = list(self._entries.values())
+            active = self._active
+            history = list(self._history)
+        return {
+            "active": active.version if active else None,
+            "versions": [e.status() for e in entries],
+            "rollback_to": history[-1] if history else None,
+            "reload": dict(self.reload_state),
+        }
+
+
+MODELS = ModelRegistry(max_loaded=settings.MODEL_REGISTRY_MAX_LOADED)
+REGISTRY.gauge("model_versions_loaded", "Model versions held in memory").set_function(
+    lambda: len(MODELS._entries)
+)
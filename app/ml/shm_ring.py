@@ -0,0 +1,118 @@
+"""
+Shared-memory slot ring used between API workers and the inference server.
+
+One named segment holds a small header followed by `slots` fixed-size slots.
+Each slot has an input region (slot_rows x H x W x C float32) and an output
+region (slot_rows x num_classes float32). Tensors never cross the socket;
+only tiny control frames do (see `send_frame` / `recv_frame`).
+"""
+import socket
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+MAGIC = 0x504C414E54  # "PLANT"
+_HEADER_FIELDS = 8  # magic, slots, slot_rows, h, w, c, num_classes, reserved
+HEADER_BYTES = 64
+_ALIGN = 64
+
+_FRAME = struct.Struct("<iI")  # status, payload length
+
+# frame statuses
+OK = 0
+ERROR = 1
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class SlotRing:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        if int(header[0]) != MAGIC:
+            raise RuntimeError(f"Shared memory {shm.name!r} is not an inference ring")
+        _, self.slots, self.slot_rows, h, w, c, self.num_classes, _ = map(int, header)
+        self.input_shape = (h, w, c)
+        self._in_bytes = _align(self.slot_rows * h * w * c * 4)
+        self._out_bytes = _align(self.slot_rows * self.num_classes * 4)
+        self._slot_bytes = self._in_bytes + self._out_bytes
+
+    @staticmethod
+    def size_for(slots: int, slot_rows: int, input_shape, num_classes: int) -> int:
+        h, w, c = input_shape
+        per_slot = _align(slot_rows * h * w * c * 4) + _align(slot_rows * num_classes * 4)
+        return HEADER_BYTES + slots * per_slot
+
+    @classmethod
+    def create(cls, name: str, slots: int, slot_rows: int, input_shape, num_classes: int):
+        size = cls.size_for(slots, slot_rows, input_shape, num_classes)
+        try:
+            # stale segment from a crashed server
+            old = shared_memory.SharedMemory(name=name)
+            old.close()
+            old.unlink()
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = [MAGIC, slots, slot_rows, *input_shape, num_classes, 0]
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, untrack: bool = True):
+        shm = shared_memory.SharedMemory(name=name)
+        if untrack:
+            # the server owns the segment; without this the resource tracker
+            # of an API worker would unlink it when that worker exits.
+            # Forked server children share the owner's tracker and skip this.
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    def _offset(self, slot: int) -> int:
+        if not 0 <= slot < self.slots:
+            raise IndexError(f"slot {slot} out of range")
+        return HEADER_BYTES + slot * self._slot_bytes
+
+    def input(self, slot: int) -> np.ndarray:
+        return np.ndarray(
+            (self.slot_rows, *self.input_shape),
+            dtype=np.float32,
+            buffer=self.shm.buf,
+            offset=self._offset(slot),
+        )
+
+    def output(self, slot: int) -> np.ndarray:
+        return np.ndarray(
+            (self.slot_rows, self.num_classes),
+            dtype=np.float32,
+            buffer=self.shm.buf,
+            offset=self._offset(slot) + self._in_bytes,
+        )
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def send_frame(sock: socket.socket, status: int, payload: bytes = b""):
+    sock.sendall(_FRAME.pack(status, len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("inference socket closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def recv_frame(sock: socket.socket) -> tuple[int, bytes]:
+    status, length = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    return status, _recv_exact(sock, length) if length else b""
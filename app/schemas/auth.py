@@ -28,3 +28,8 @@ class TokenPairOut(BaseModel):
 
 class RefreshIn(BaseModel):
     refresh_token: str
+
+
+class UserAdminUpdate(BaseModel):
+    is_admin: bool | None = None
+    full_name: str | None = None
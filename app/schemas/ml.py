@@ -0,0 +1,8 @@
+from typing import Literal
+from pydantic import BaseModel
+
+
+class ModelReloadIn(BaseModel):
+    # defaults to MODEL_PATH / MODEL_BACKEND, i.e. "pick up the file that was replaced on disk"
+    model_path: str | None = None
+    backend: Literal["keras", "onnx", "remote"] | None = None
@@ -0,0 +1,74 @@
+"""
+Render missing thumbnails for every stored scan image.
+
+    python -m app.scripts.backfill_thumbnails [--workers 4] [--batch 1000] [--force]
+
+Safe to re-run: sizes that already exist are skipped (unless --force).
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.db.models import Scan
+from app.services.thumbnails import render_thumbnails
+from app.utils.urls import upload_rel_path
+
+
+def _stored_path_batches(batch: int):
+    # keyset over the distinct stored paths keeps memory flat on big tables
+    last = ""
+    with SessionLocal() as db:
+        while True:
+            rows = db.scalars(
+                select(Scan.image_url)
+                .where(Scan.image_url > last)
+                .group_by(Scan.image_url)
+                .order_by(Scan.image_url)
+                .limit(batch)
+            ).all()
+            if not rows:
+                return
+            yield rows
+            last = rows[-1]
+
+
+def backfill(workers: int, batch: int, force: bool) -> dict:
+    stats = {"images": 0, "written": 0, "missing": 0, "failed": 0}
+
+    def one(stored: str):
+        rel = upload_rel_path(stored)
+        try:
+            return len(render_thumbnails(rel, force=force, trigger="backfill"))
+        except FileNotFoundError:
+            return "missing"
+        except Exception:
+            return "failed"
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # one batch in flight at a time, so the queue stays bounded
+        for rows in _stored_path_batches(batch):
+            for result in pool.map(one, rows):
+                stats["images"] += 1
+                if isinstance(result, int):
+                    stats["written"] += result
+                else:
+                    stats[result] += 1
+            print(f"... {stats}")
+    return stats
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Render missing scan thumbnails")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--batch", type=int, default=1000)
+    ap.add_argument("--force", action="store_true", help="re-render existing thumbnails")
+    args = ap.parse_args()
+    print(f"Sizes {settings.THUMBNAIL_SIZES} in {settings.STORAGE_BACKEND} storage")
+    print(backfill(args.workers, args.batch, args.force))
+
+
+if __name__ == "__main__":
+    main()
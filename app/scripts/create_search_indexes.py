@@ -0,0 +1,28 @@
+"""
+Create the Postgres search structures: the pg_trgm extension and the GIN
+full-text and trigram indexes used by app.services.search.
+
+    DATABASE_URL=postgresql://owner@host/db python -m app.scripts.create_search_indexes
+
+CREATE EXTENSION needs a superuser (or, on managed Postgres, the owner role
+the provider allows), so this is a deploy step rather than part of app
+startup. Until it has run, search works without the indexes and fuzzy
+matches use ILIKE; restart the API workers afterwards to switch them to
+pg_trgm. Safe to re-run. SQLite needs nothing: init_db maintains FTS5.
+"""
+from sqlalchemy import create_engine
+
+from app.core.config import settings
+from app.services.search import create_search_indexes
+
+
+def main():
+    engine = create_engine(settings.DATABASE_URL)
+    if engine.dialect.name != "postgresql":
+        raise SystemExit(f"Nothing to do for {engine.dialect.name}")
+    create_search_indexes(engine)
+    print("pg_trgm and search indexes are in place")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Export the Keras model to ONNX for MODEL_BACKEND=onnx.
+
+    python -m app.scripts.export_onnx [--src models/plant_disease_model.keras] [--out models/plant_disease_model.onnx]
+
+Needs tensorflow and tf2onnx at export time only; serving the result needs
+just onnxruntime.
+"""
+import argparse
+from pathlib import Path
+
+from app.core.config import settings
+
+
+def export(src: str, out: str, opset: int = 17) -> str:
+    import tensorflow as tf
+    import tf2onnx
+
+    model = tf.keras.models.load_model(src)
+    _, h, w, c = model.input_shape
+    # dynamic batch dim so one graph serves every batch size
+    spec = (tf.TensorSpec((None, h, w, c), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=out)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export the Keras model to ONNX")
+    ap.add_argument("--src", default=settings.MODEL_PATH)
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--opset", type=int, default=17)
+    args = ap.parse_args()
+    out = args.out or str(Path(args.src).with_suffix(".onnx"))
+    print(f"Exported {export(args.src, out, args.opset)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Rewrite legacy Scan.image_url values (filesystem paths, "./uploads/..."
+strings) to the storage key new scans record ("blobs/ab/cd/<digest>.jpg").
+
+    python -m app.scripts.migrate_image_keys [--batch 1000] [--after SCAN_ID] [--dry-run]
+
+Walks scans in primary-key order with one short transaction per batch, so
+it can run next to live traffic and be stopped at any point. Re-running is
+safe and picks up where it stopped: migrated rows no longer match. On big
+tables, pass the last id from a progress line as --after to skip the rows
+already walked. Run it again after draining a write-behind spool written
+by an older release.
+"""
+import argparse
+
+from sqlalchemy import select, update
+
+from app.db.base import SessionLocal
+from app.db.models import Scan
+from app.utils.urls import KEY_PREFIXES, upload_rel_path
+
+
+def _legacy_batches(batch: int, after: str):
+    # keyset over the primary key; rows already stored as keys are skipped in SQL
+    last = after
+    while True:
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(Scan.id, Scan.image_url)
+                .where(Scan.id > last)
+                .where(*(Scan.image_url.not_like(f"{p}%") for p in KEY_PREFIXES))
+                .order_by(Scan.id)
+                .limit(batch)
+            ).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1].id
+
+
+def migrate(batch: int, after: str = "", dry_run: bool = False) -> dict:
+    stats = {"legacy": 0, "rewritten": 0, "unchanged": 0}
+    for rows in _legacy_batches(batch, after):
+        changes = []
+        for scan_id, stored in rows:
+            rel = upload_rel_path(stored)
+            if rel == stored:
+                stats["unchanged"] += 1  # already a key, or an absolute path outside UPLOAD_DIR
+            else:
+                changes.append({"id": scan_id, "image_url": rel})
+        stats["legacy"] += len(rows)
+        stats["rewritten"] += len(changes)
+        if changes and not dry_run:
+            with SessionLocal() as db:
+                db.execute(update(Scan), changes)  # bulk UPDATE ... WHERE id = ?
+                db.commit()
+        print(f"... {stats} last_id={rows[-1].id}")
+    return stats
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Store storage keys in Scan.image_url")
+    ap.add_argument("--batch", type=int, default=1000)
+    ap.add_argument("--after", default="", help="resume after this scan id")
+    ap.add_argument("--dry-run", action="store_true", help="count, do not write")
+    args = ap.parse_args()
+    print(migrate(args.batch, args.after, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Rewrite Scan.created_at values SQLite stored without microseconds
+("YYYY-MM-DD HH:MM:SS", from the old CURRENT_TIMESTAMP server default) to
+the "YYYY-MM-DD HH:MM:SS.ffffff" text the ORM writes. Mixed formats do
+not compare as the instants they represent, and keyset cursors over
+(created_at, id) revisit rows.
+
+    python -m app.scripts.normalize_scan_timestamps [--batch 1000] [--dry-run]
+
+One short transaction per batch; safe to stop and re-run. Postgres stores
+timestamptz natively and needs nothing. SQLite cannot change the default
+of an existing column, so tables created before the new default keep the
+old one: re-run this after inserting scans outside the app.
+"""
+import argparse
+
+from sqlalchemy import func, not_, select, update
+
+from app.db.base import SessionLocal, engine
+from app.db.models import SQLITE_DATETIME_FORMAT, Scan
+
+# what DateTime columns hold on SQLite when written by SQLAlchemy
+_NORMALISED_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9].[0-9][0-9][0-9][0-9][0-9][0-9]"
+
+
+def _normalised(column):
+    return func.strftime(SQLITE_DATETIME_FORMAT, column)
+
+
+def normalize(batch: int, dry_run: bool = False) -> dict:
+    stats = {"legacy": 0, "rewritten": 0}
+    if engine.dialect.name != "sqlite":
+        return stats
+    # strftime() is NULL for text it cannot parse: leave those alone
+    legacy = (
+        select(Scan.id)
+        .where(not_(Scan.created_at.op("GLOB")(_NORMALISED_GLOB)))
+        .where(_normalised(Scan.created_at).is_not(None))
+    )
+    with SessionLocal() as db:
+        stats["legacy"] = db.scalar(select(func.count()).select_from(legacy.subquery()))
+    if dry_run:
+        return stats
+    while True:
+        with SessionLocal() as db:
+            n = db.execute(
+                update(Scan)
+                .where(Scan.id.in_(legacy.limit(batch).scalar_subquery()))
+                .values(created_at=_normalised(Scan.created_at))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+        if not n:
+            return stats
+        stats["rewritten"] += n
+        print(f"... {stats}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Normalise SQLite Scan.created_at text")
+    ap.add_argument("--batch", type=int, default=1000)
+    ap.add_argument("--dry-run", action="store_true", help="count, do not write")
+    args = ap.parse_args()
+    print(normalize(args.batch, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
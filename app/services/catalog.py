@@ -1,31 +1,213 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
-from app.db.models import Disease, Treatment
 
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.db.models import CatalogState, Disease, Treatment
 
-def get_disease_and_treatments(db: Session, label: str, locale: str | None):
+CACHE_HITS = REGISTRY.counter("catalog_cache_hits_total", "Catalog cache hits")
+CACHE_MISSES = REGISTRY.counter("catalog_cache_misses_total", "Catalog cache misses")
+
+
+def _disease_payload(disease: Disease) -> dict:
+    return {
+        "label": disease.label,
+        "display_name": disease.display_name,
+        "description": disease.description,
+    }
+
+
+def _treatment_payload(t: Treatment) -> dict:
+    return {
+        "id": t.id,
+        "type": t.type,
+        "title": t.title,
+        "instructions": t.instructions,
+        "dosage": t.dosage,
+        "locale": t.locale,
+    }
+
+
+# ---------- catalog version (cross-worker consistency) ----------
+def read_catalog_version(db: Session) -> int:
+    return db.execute(select(CatalogState.version).where(CatalogState.id == 1)).scalar() or 0
+
+
+def bump_catalog_version(db: Session) -> int:
+    """
+    Increment the catalog version inside the caller's transaction, so it
+    commits (or rolls back) together with the catalog write. The row is
+    seeded by init_db, so concurrent first writes just serialize on it.
+    """
+    res = db.execute(
+        update(CatalogState)
+        .where(CatalogState.id == 1)
+        .values(version=CatalogState.version + 1)
+    )
+    if res.rowcount == 0:
+        raise RuntimeError("catalog_state has no row; run app.db.base.init_db()")
+    return read_catalog_version(db)
+
+
+class CatalogCache:
+    """
+    Bounded TTL cache of (label, locale) -> (disease_payload, treatments).
+
+    Writes in this worker invalidate exactly the touched label. Writes in
+    other workers are noticed through the `catalog_state.version` counter,
+    re-read at most every `version_check_s`, and clear the whole cache.
+    Cached payloads are shared: callers must not mutate them.
+    """
+
+    def __init__(self, max_items: int, ttl_s: float, version_check_s: float):
+        self.max_items = max_items
+        self.ttl_s = ttl_s
+        self.version_check_s = version_check_s
+        self._items: OrderedDict[tuple[str, str | None], tuple[float, tuple]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        self._checked_at = 0.0
+        # bumped on every invalidation; a put computed before it is dropped
+        self.generation = 0
+
+    def _sync_version(self, db: Session):
+        now = time.monotonic()
+        if now - self._checked_at < self.version_check_s:
+            return
+        version = read_catalog_version(db)
+        with self._lock:
+            if version != self._version:
+                self._items.clear()
+                self._version = version
+                self.generation += 1
+            self._checked_at = now
+
+    def current_version(self, db: Session) -> int:
+        self._sync_version(db)
+        return self._version
+
+    def get(self, db: Session, label: str, locale: str | None):
+        self._sync_version(db)
+        key = (label, locale)
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None and hit[0] > time.monotonic():
+                self._items.move_to_end(key)
+                CACHE_HITS.inc()
+                return hit[1]
+        CACHE_MISSES.inc()
+        return None
+
+    def put(self, label: str, locale: str | None, value: tuple, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return  # loaded before a concurrent invalidation; don't cache it
+            self._items[(label, locale)] = (time.monotonic() + self.ttl_s, value)
+            self._items.move_to_end((label, locale))
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def invalidate(self, label: str, new_version: int | None = None):
+        """Drop every locale of `label` after a local write committed `new_version`."""
+        with self._lock:
+            self.generation += 1
+            for key in [k for k in self._items if k[0] == label]:
+                del self._items[key]
+            # only adopt the new version if ours was the sole write since the
+            # last sync; otherwise the next sync clears everything
+            if new_version is not None and self._version == new_version - 1:
+                self._version = new_version
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._items.clear()
+            self._version = None
+
+    def stats(self) -> dict:
+        hits, misses = CACHE_HITS.value, CACHE_MISSES.value
+        return {
+            "size": len(self._items),
+            "version": self._version,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else None,
+        }
+
+
+CATALOG_CACHE = CatalogCache(
+    max_items=settings.CATALOG_CACHE_MAX_ITEMS,
+    ttl_s=settings.CATALOG_CACHE_TTL_S,
+    version_check_s=settings.CATALOG_VERSION_CHECK_S,
+)
+
+
+# ---------- lookups ----------
+def _load_disease_and_treatments(db: Session, label: str, locale: str | None):
     disease = db.query(Disease).filter(Disease.label == label).first()
     disease_payload = None
     if disease:
-        disease_payload = {
-            "label": disease.label,
-            "display_name": disease.display_name,
-            "description": disease.description,
-        }
+        disease_payload = _disease_payload(disease)
     q = (
         db.query(Treatment)
         .join(Disease, Disease.id == Treatment.disease_id)
         .filter(Disease.label == label)
     )
     items = q.filter(Treatment.locale.in_([locale, "en"])).all() if locale else q.all()
-    treatments = [
-        {
-            "id": t.id,
-            "type": t.type,
-            "title": t.title,
-            "instructions": t.instructions,
-            "dosage": t.dosage,
-            "locale": t.locale,
-        }
-        for t in items
-    ]
+    treatments = [_treatment_payload(t) for t in items]
     return disease_payload, treatments
+
+
+def get_disease_and_treatments(db: Session, label: str, locale: str | None):
+    cached = CATALOG_CACHE.get(db, label, locale)
+    if cached is not None:
+        return cached
+    generation = CATALOG_CACHE.generation
+    value = _load_disease_and_treatments(db, label, locale)
+    CATALOG_CACHE.put(label, locale, value, generation)
+    return value
+
+
+def get_catalog_for_labels(
+    db: Session, labels: list[str], locale: str | None
+) -> dict[str, tuple[dict | None, list[dict]]]:
+    """
+    Bulk variant of get_disease_and_treatments: cache hits are served from
+    memory and every miss is fetched in two queries total.
+    Returns {label: (disease_payload, treatments)}.
+    """
+    out: dict[str, tuple[dict | None, list[dict]]] = {}
+    misses = []
+    for label in dict.fromkeys(labels):
+        cached = CATALOG_CACHE.get(db, label, locale)
+        if cached is not None:
+            out[label] = cached
+        else:
+            misses.append(label)
+    if not misses:
+        return out
+
+    generation = CATALOG_CACHE.generation
+    fetched: dict[str, tuple[dict | None, list[dict]]] = {l: (None, []) for l in misses}
+    diseases = db.query(Disease).filter(Disease.label.in_(misses)).all()
+    for d in diseases:
+        fetched[d.label] = (_disease_payload(d), [])
+
+    q = (
+        db.query(Disease.label, Treatment)
+        .join(Disease, Disease.id == Treatment.disease_id)
+        .filter(Disease.label.in_(misses))
+    )
+    if locale:
+        q = q.filter(Treatment.locale.in_([locale, "en"]))
+    for label, t in q.all():
+        fetched[label][1].append(_treatment_payload(t))
+
+    for label, value in fetched.items():
+        CATALOG_CACHE.put(label, locale, value, generation)
+    out.update(fetched)
+    return out
@@ -0,0 +1,93 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.db.models import Disease, Treatment
+from app.services.catalog import read_catalog_version
+from app.utils.response import api_response
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    etag: str  # strong ETag of the identity body
+    etag_gzip: str  # strong ETag of the gzip body (different bytes, different tag)
+    body: bytes
+    body_gzip: bytes
+
+
+def build_snapshot(db: Session, version: int) -> Snapshot:
+    """Every label with its treatments grouped by locale, serialized and gzipped once."""
+    by_disease: dict[str, dict[str, list[dict]]] = {}
+    for t in db.query(Treatment).order_by(Treatment.locale, Treatment.title).all():
+        by_disease.setdefault(t.disease_id, {}).setdefault(t.locale, []).append(
+            {
+                "id": t.id,
+                "type": t.type,
+                "title": t.title,
+                "instructions": t.instructions,
+                "dosage": t.dosage,
+            }
+        )
+    diseases = [
+        {
+            "label": d.label,
+            "display_name": d.display_name,
+            "description": d.description,
+            "treatments": by_disease.get(d.id, {}),
+        }
+        for d in db.query(Disease).order_by(Disease.label).all()
+    ]
+    payload = {"version": version, "diseases": diseases}
+    body = json.dumps(
+        api_response(True, "Catalog snapshot", payload, {"total": len(diseases)}),
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    body_gzip = gzip.compress(body, compresslevel=9, mtime=0)
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return Snapshot(version, f'"{digest}"', f'"{digest}-gz"', body, body_gzip)
+
+
+class SnapshotHolder:
+    """
+    Holds the current snapshot. The catalog version is re-read at most every
+    `version_check_s`; in between, requests (and every 304) are answered
+    without touching the database.
+    """
+
+    def __init__(self, version_check_s: float):
+        self.version_check_s = version_check_s
+        self._snapshot: Snapshot | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> Snapshot:
+        snap = self._snapshot
+        if snap is not None and time.monotonic() - self._checked_at < self.version_check_s:
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and time.monotonic() - self._checked_at < self.version_check_s:
+                return snap
+            with SessionLocal() as db:
+                version = read_catalog_version(db)
+                if snap is None or snap.version != version:
+                    snap = build_snapshot(db, version)
+            self._snapshot = snap
+            self._checked_at = time.monotonic()
+            return snap
+
+    def invalidate(self):
+        # forces a version check (and rebuild) on the next request
+        self._checked_at = 0.0
+
+
+CATALOG_SNAPSHOT = SnapshotHolder(version_check_s=settings.CATALOG_VERSION_CHECK_S)
@@ -0,0 +1,258 @@
+"""
+Single-pass upload ingestion.
+
+The multipart body is parsed as it arrives instead of being spooled by
+Starlette and copied again: each file part is sniffed (magic bytes),
+hashed and written to its storage sink in the same pass, and rejected as
+soon as Content-Length or the running byte count exceeds the limit.
+With local storage that is one disk write per upload.
+
+Routes take the result as a dependency, declared after the auth
+dependency so unauthenticated requests are refused before the body is read:
+
+    images: list[IngestedImage] = Depends(image_uploads("file", max_files=1))
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from fastapi import HTTPException, Request
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+from app.core.metrics import REGISTRY
+from app.services.storage import get_storage
+from app.services.storage.base import (
+    ALLOWED,
+    SNIFF_BYTES,
+    UploadSink,
+    blob_rel_path,
+    bytes_limit,
+    sniff_image_type,
+    too_large,
+)
+
+REJECTED = REGISTRY.counter(
+    "uploads_rejected_total", "Uploads refused during ingestion", ("reason",)
+)
+INGEST_SECONDS = REGISTRY.histogram(
+    "upload_ingest_seconds", "Receiving a whole upload body (includes client transfer time)"
+)
+STORAGE_SECONDS = REGISTRY.histogram(
+    "upload_storage_seconds", "Sink writes + commit for one upload request (storage work only)"
+)
+
+# multipart framing allowance per file part (boundary + part headers)
+PART_OVERHEAD = 16 * 1024
+
+
+@dataclass
+class IngestedImage:
+    rel: str  # storage key; what Scan.image_url records
+    digest: str  # sha256 of the content
+    content_type: str  # sniffed, not the client's claim
+    size: int
+    file: BinaryIO  # readable copy for decoding; closed after the request
+
+
+class _FilePart:
+    def __init__(self):
+        self.head = b""
+        self.content_type: str | None = None
+        self.size = 0
+        self.hash = hashlib.sha256()
+        self.sink: UploadSink | None = None
+        self.pending: list[bytes] = []
+        self.done = False
+
+
+def _reject(status_code: int, reason: str, detail: str) -> HTTPException:
+    REJECTED.labels(reason).inc()
+    return HTTPException(status_code=status_code, detail=detail)
+
+
+def _flush(parts: list[_FilePart]):
+    # worker thread: sink writes and hashing for one received chunk
+    storage = get_storage()
+    for part in parts:
+        if part.sink is None:
+            part.sink = storage.open_sink()
+        for data in part.pending:
+            part.hash.update(data)
+            part.sink.write(data)
+        part.pending.clear()
+
+
+def _commit(part: _FilePart) -> IngestedImage:
+    digest = part.hash.hexdigest()
+    rel = blob_rel_path(digest, ALLOWED[part.content_type])
+    f = part.sink.commit(rel, part.content_type)
+    return IngestedImage(
+        rel=rel,
+        digest=digest,
+        content_type=part.content_type,
+        size=part.size,
+        file=f,
+    )
+
+
+def _discard(parts: list[_FilePart], images: list[IngestedImage]):
+    # parts are committed in order: images[i] came from parts[i]
+    for part in parts[len(images):]:
+        if part.sink is not None:
+            part.sink.abort()
+    for image in images:
+        image.file.close()
+
+
+async def receive_images(request: Request, field: str, max_files: int) -> list[IngestedImage]:
+    """Stream every file part named `field` into storage; see the module docstring."""
+    ctype, params = parse_options_header(request.headers.get("content-type", ""))
+    if ctype != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data")
+
+    limit = bytes_limit()
+    body_limit = max_files * (limit + PART_OVERHEAD)
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > body_limit:
+        raise _reject(413, "too_large", too_large().detail)
+
+    parts: list[_FilePart] = []
+    images: list[IngestedImage] = []
+    current: _FilePart | None = None
+    header_field = header_value = b""
+    headers: dict[bytes, bytes] = {}
+
+    def on_part_begin():
+        nonlocal current
+        current = None
+        headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int):
+        nonlocal header_field
+        header_field += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        nonlocal header_value
+        header_value += data[start:end]
+
+    def on_header_end():
+        nonlocal header_field, header_value
+        headers[header_field.lower()] = header_value
+        header_field = header_value = b""
+
+    def on_headers_finished():
+        nonlocal current
+        _, disp = parse_options_header(headers.get(b"content-disposition", b""))
+        if disp.get(b"name", b"").decode("latin-1") != field or b"filename" not in disp:
+            return  # other fields are skipped, not buffered
+        if len(parts) >= max_files:
+            raise _reject(413, "too_many_files", f"Too many files (max {max_files} per request)")
+        current = _FilePart()
+        parts.append(current)
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if current is None:
+            return
+        chunk = data[start:end]
+        current.size += len(chunk)
+        if current.size > limit:
+            raise _reject(413, "too_large", too_large().detail)
+        if current.content_type is None:
+            current.head += chunk[: SNIFF_BYTES - len(current.head)]
+            if len(current.head) >= SNIFF_BYTES:
+                _sniff(current)
+        current.pending.append(chunk)
+
+    def on_part_end():
+        if current is None:
+            return
+        if current.content_type is None:
+            _sniff(current)  # shorter than SNIFF_BYTES
+        current.done = True
+
+    def _sniff(part: _FilePart):
+        part.content_type = sniff_image_type(part.head)
+        if part.content_type is None:
+            raise _reject(415, "unsupported_type", "Unsupported image type")
+
+    parser = MultipartParser(
+        params[b"boundary"],
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        },
+    )
+    received = 0
+    t0 = time.perf_counter()
+    storage_s = 0.0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_limit:
+                raise _reject(413, "too_large", too_large().detail)
+            parser.write(chunk)
+            # blocking sink work happens off the loop, once per received chunk
+            t1 = time.perf_counter()
+            writes = [p for p in parts if p.pending]
+            if writes:
+                await run_in_threadpool(_flush, writes)
+            for part in parts[len(images):]:
+                if not part.done:
+                    break
+                images.append(await run_in_threadpool(_commit, part))
+            storage_s += time.perf_counter() - t1
+        parser.finalize()
+    except MultipartParseError:
+        await run_in_threadpool(_discard, parts, images)
+        raise HTTPException(status_code=400, detail="Malformed multipart body")
+    except BaseException:
+        await run_in_threadpool(_discard, parts, images)
+        raise
+    if not images:
+        raise HTTPException(status_code=422, detail=f"Missing file field {field!r}")
+    INGEST_SECONDS.observe(time.perf_counter() - t0)
+    STORAGE_SECONDS.observe(storage_s)
+    return images
+
+
+def image_uploads(field: str, max_files: int):
+    """Dependency yielding the ingested images; their readable copies are closed afterwards."""
+
+    async def dependency(request: Request):
+        images = await receive_images(request, field, max_files)
+        try:
+            yield images
+        finally:
+            for image in images:
+                image.file.close()
+
+    return dependency
+
+
+def multipart_body(field: str, many: bool = False) -> dict:
+    """openapi_extra for routes that read their files through image_uploads."""
+    binary = {"type": "string", "format": "binary"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": [field],
+                        "properties": {
+                            field: {"type": "array", "items": binary} if many else binary
+                        },
+                    }
+                }
+            },
+        }
+    }
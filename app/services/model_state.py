@@ -0,0 +1,98 @@
+"""
+Cross-worker model selection. Every API worker has its own ModelRegistry;
+an admin reload or rollback records the wanted model in the single-row
+model_state table, and each worker's watcher applies it within
+MODEL_STATE_CHECK_S (the catalog_state.version pattern, for models).
+"""
+import logging
+import threading
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.db.models import ModelState
+from app.ml.loader import warmup_batch_sizes
+from app.ml.registry import MODELS, ModelRegistry
+
+log = logging.getLogger(__name__)
+
+
+def read_model_state(db: Session):
+    """(generation, path, backend, version) row, or None before init_db seeded it."""
+    return db.execute(
+        select(ModelState.generation, ModelState.path, ModelState.backend, ModelState.version)
+        .where(ModelState.id == 1)
+    ).first()
+
+
+def publish_model_state(
+    db: Session, path: str, backend: str, version: str | None = None
+) -> int:
+    """Record the model to serve inside the caller's transaction; returns the new generation."""
+    db.execute(
+        update(ModelState)
+        .where(ModelState.id == 1)
+        .values(
+            generation=ModelState.generation + 1, path=path, backend=backend, version=version
+        )
+    )
+    return db.scalar(select(ModelState.generation).where(ModelState.id == 1))
+
+
+class ModelStateWatcher:
+    """Polls model_state and reloads or re-activates this worker's model to match."""
+
+    def __init__(self, registry: ModelRegistry, interval_s: float):
+        self.registry = registry
+        self.interval_s = interval_s
+        self.generation: int | None = None  # last state applied in this worker
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        # a worker started after a reload serves what the admin chose, not MODEL_PATH
+        try:
+            self.poll()
+        except Exception:
+            log.exception("Model state check failed")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-state", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.poll()
+            except Exception:
+                log.exception("Model state check failed")
+
+    def poll(self):
+        with SessionLocal() as db:
+            state = read_model_state(db)
+        if state is None or state.generation == self.generation:
+            return
+        if state.generation == 0 or self.apply(state.path, state.backend, state.version):
+            self.generation = state.generation
+
+    def apply(self, path: str, backend: str, version: str | None) -> bool:
+        """False when a reload is already running here; the next poll retries."""
+        registry = self.registry
+        if version is not None and registry.activate_loaded(version) is not None:
+            return True
+        if not registry.is_loaded():
+            # lazy worker: load the chosen model on first use
+            registry.target = (path, backend)
+            return True
+        log.info("Applying model state: %s (%s) %s", path, backend, version or "")
+        return registry.reload(path, backend, warmup_batch_sizes(), version)
+
+
+MODEL_STATE = ModelStateWatcher(MODELS, settings.MODEL_STATE_CHECK_S)
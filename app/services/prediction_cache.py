@@ -0,0 +1,178 @@
+import datetime
+import logging
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.db.models import PredictionCacheEntry
+
+log = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """
+    Two-tier cache of top-k predictions keyed by (content hash, model version).
+
+    Tier 1 is a bounded in-process LRU. Tier 2 is the `prediction_cache`
+    table, shared by all workers and pruned to `max_rows` (least recently
+    used first) every `prune_every` inserts.
+
+    Hits in either tier refresh the row's `last_used_at`. `get` runs on the
+    request path (on the event loop, via AsyncSession.run_sync), so hits
+    are only collected there; a background thread writes them in one
+    UPDATE per `touch_every` hits or `touch_interval_s`, on the cache's
+    own session like `put`.
+    """
+
+    def __init__(
+        self,
+        max_items: int,
+        max_rows: int,
+        prune_every: int = 256,
+        touch_every: int = 256,
+        touch_interval_s: float = 5.0,
+    ):
+        self.max_items = max_items
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self.touch_every = touch_every
+        self.touch_interval_s = touch_interval_s
+        self._mem: OrderedDict[tuple[str, str], list[dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._touched: dict[tuple[str, str], datetime.datetime] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="prediction-touches", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write what it has not written yet."""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush_touches()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.touch_interval_s)
+            self._wake.clear()
+            try:
+                self.flush_touches()
+            except Exception:
+                # touches are best effort; a missed refresh only ages a row
+                log.exception("Writing prediction cache touches failed")
+
+    def get(self, db: Session, digest: str, model_version: str) -> list[dict] | None:
+        key = (digest, model_version)
+        with self._lock:
+            top_k = self._mem.get(key)
+            if top_k is not None:
+                self._mem.move_to_end(key)
+        if top_k is None:
+            row = db.get(PredictionCacheEntry, key)
+            if row is None:
+                return None
+            top_k = row.top_k
+            self._remember(key, top_k)
+        self._touch(key)
+        return top_k
+
+    def _touch(self, key: tuple[str, str]):
+        # in memory only: never a database write on the caller's thread
+        with self._lock:
+            self._touched[key] = datetime.datetime.now(datetime.timezone.utc)
+            due = len(self._touched) >= self.touch_every
+        if due:
+            self._wake.set()
+
+    def flush_touches(self):
+        """Write collected hits to last_used_at in one executemany UPDATE."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if not touched:
+            return
+        table = PredictionCacheEntry.__table__
+        stmt = (
+            update(table)
+            .where(
+                table.c.content_hash == bindparam("k_hash"),
+                table.c.model_version == bindparam("k_version"),
+            )
+            .values(last_used_at=bindparam("k_used_at"))
+        )
+        with SessionLocal() as db:
+            # rows pruned in the meantime just match nothing
+            db.execute(
+                stmt,
+                [
+                    {"k_hash": h, "k_version": v, "k_used_at": at}
+                    for (h, v), at in touched.items()
+                ],
+            )
+            db.commit()
+
+    def put(self, digest: str, model_version: str, top_k: list[dict]):
+        key = (digest, model_version)
+        self._remember(key, top_k)
+
+        # own short transaction so a concurrent insert of the same key
+        # never fails the caller's scan commit
+        with SessionLocal() as db:
+            db.add(
+                PredictionCacheEntry(
+                    content_hash=digest, model_version=model_version, top_k=top_k
+                )
+            )
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                return
+            self._puts += 1
+            if self._puts % self.prune_every == 0:
+                self._prune(db)
+
+    def clear_memory(self):
+        with self._lock:
+            self._mem.clear()
+
+    def _remember(self, key: tuple[str, str], top_k: list[dict]):
+        with self._lock:
+            self._mem[key] = top_k
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_items:
+                self._mem.popitem(last=False)
+
+    def _prune(self, db: Session):
+        cutoff = db.execute(
+            select(PredictionCacheEntry.last_used_at)
+            .order_by(PredictionCacheEntry.last_used_at.desc())
+            .offset(self.max_rows)
+            .limit(1)
+        ).scalar()
+        if cutoff is None:
+            return
+        db.execute(
+            delete(PredictionCacheEntry).where(
+                PredictionCacheEntry.last_used_at <= cutoff
+            )
+        )
+        db.commit()
+
+
+PREDICTIONS = PredictionCache(
+    max_items=settings.PREDICTION_CACHE_MEMORY_ITEMS,
+    max_rows=settings.PREDICTION_CACHE_MAX_ROWS,
+)
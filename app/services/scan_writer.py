@@ -0,0 +1,344 @@
+"""
+Write-behind persistence for scan rows (SCAN_WRITE_BEHIND).
+
+create_scan assigns the id and created_at itself, appends the row to a
+local spool file and responds; a background thread bulk-inserts queued
+rows every SCAN_WRITER_INTERVAL_MS (or as soon as SCAN_WRITER_BATCH rows
+are waiting). A row is acknowledged only once the spool is fsync'd -
+concurrent requests share one fsync - so a crash loses no acknowledged
+scan: at startup every spool segment not held by a live process is
+replayed with INSERT ... ON CONFLICT DO NOTHING (rows flushed before the
+crash are skipped) and deleted.
+
+Segments are per process (scans-<pid>-<seq>.jsonl, flock'd while open)
+and rotate at SCAN_SPOOL_SEGMENT_MB; a sealed segment is deleted once all
+of its rows are in the database.
+
+Connection and lock errors are retried until the database is back. A
+batch that fails otherwise SCAN_WRITER_MAX_ATTEMPTS times is bisected;
+rows the database rejects on their own are appended to
+<spool>/dead/scans-<pid>.jsonl with the error (scan_writer_dead_letter_rows_total)
+so one bad row cannot stall the rest.
+
+A new scan shows up in list_scans after the next flush; get_scan also
+looks at rows that are still queued.
+"""
+import datetime
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.db.base import SessionLocal
+from app.db.models import Scan
+
+log = logging.getLogger(__name__)
+
+FSYNC_SECONDS = REGISTRY.histogram(
+    "scan_spool_fsync_seconds", "fsync of the scan spool (one per group of requests)"
+)
+FLUSH_SECONDS = REGISTRY.histogram(
+    "scan_writer_flush_seconds", "One bulk INSERT of queued scan rows"
+)
+FLUSHED = REGISTRY.counter("scan_writer_rows_total", "Scan rows written by the background writer")
+FLUSH_ERRORS = REGISTRY.counter(
+    "scan_writer_flush_errors_total", "Bulk inserts that failed and were retried"
+)
+QUEUE_DEPTH = REGISTRY.gauge("scan_writer_queue_depth", "Scan rows waiting to be inserted")
+DEAD_LETTERED = REGISTRY.counter(
+    "scan_writer_dead_letter_rows_total",
+    "Scan rows the database rejected on their own, set aside in <spool>/dead",
+)
+
+_COLUMNS = [c.key for c in Scan.__table__.columns]
+
+
+def scan_row(scan: Scan) -> dict:
+    row = {k: getattr(scan, k) for k in _COLUMNS}
+    row["created_at"] = row["created_at"].isoformat()
+    return row
+
+
+def _db_row(row: dict) -> dict:
+    return {**row, "created_at": datetime.datetime.fromisoformat(row["created_at"])}
+
+
+def _insert_ignore(dialect: str):
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(Scan)
+    return dialect_insert(Scan).on_conflict_do_nothing(index_elements=["id"])
+
+
+def _transient(e: Exception) -> bool:
+    # database down, locked or connection lost: retrying the same rows can succeed
+    if isinstance(e, (OperationalError, InterfaceError)):
+        return True
+    return isinstance(e, DBAPIError) and e.connection_invalidated
+
+
+def insert_rows(rows: list[dict]):
+    """Bulk insert spooled rows; ids that already exist are skipped."""
+    with SessionLocal() as db:
+        db.execute(_insert_ignore(db.get_bind().dialect.name), [_db_row(r) for r in rows])
+        db.commit()
+
+
+class ScanWriter:
+    def __init__(self, spool_dir: str, batch: int, interval_s: float, segment_bytes: int):
+        self.spool_dir = Path(spool_dir)
+        self.batch = batch
+        self.interval_s = interval_s
+        self.segment_bytes = segment_bytes
+        # _lock guards the spool segment and the queue bookkeeping; the
+        # fsync itself runs outside it, under _sync_lock
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._queue: deque[tuple[int, dict]] = deque()  # (segment seq, row)
+        self._pending: dict[str, Scan] = {}
+        self._outstanding: dict[int, int] = {}  # segment seq -> rows not yet inserted
+        self._sealed: dict[int, Path] = {}
+        self._seq = 0
+        self._seg = None
+        self._seg_path: Path | None = None
+        self._seg_size = 0
+        self._written = 0  # bytes appended by this process, across segments
+        self._synced = 0
+        self._attempts = 0  # non-transient failures of the batch at the queue head
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # lifecycle
+
+    def start(self):
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        replayed = self.recover()
+        if replayed:
+            log.info("Replayed %d spooled scan rows", replayed)
+        with self._lock:
+            self._open_segment()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scan-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Flush what is queued; the spool is kept if the database refused it."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        with self._lock:
+            self._seg.close()
+            self._seg = None
+            if not self._queue:
+                self._seg_path.unlink(missing_ok=True)
+
+    def recover(self) -> int:
+        """Insert and delete every spool segment no live process holds."""
+        n = 0
+        for path in sorted(self.spool_dir.glob("scans-*.jsonl")):
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue  # recovered by another worker meanwhile
+            with f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # a live writer's segment
+                rows = []
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        break  # torn tail of a crashed append; never acknowledged
+                for i in range(0, len(rows), self.batch):
+                    self._insert_isolating(rows[i : i + self.batch])
+                path.unlink(missing_ok=True)
+                n += len(rows)
+        return n
+
+    # request side
+
+    def submit(self, scans: list[Scan]):
+        """Spool `scans` durably and queue them for insertion. Blocks on fsync."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for s in scans:
+            # what the column defaults would assign at flush time
+            s.id = s.id or str(uuid.uuid4())
+            s.created_at = s.created_at or now
+        rows = [scan_row(s) for s in scans]
+        data = "".join(json.dumps(r, default=str) + "\n" for r in rows).encode()
+        with self._lock:
+            if self._seg is None:
+                raise RuntimeError("Scan writer is not running")
+            self._seg.write(data)
+            self._seg_size += len(data)
+            self._written += len(data)
+            mark = self._written
+            for s, r in zip(scans, rows):
+                self._queue.append((self._seq, r))
+                self._pending[s.id] = s
+            self._outstanding[self._seq] = self._outstanding.get(self._seq, 0) + len(rows)
+            if self._seg_size >= self.segment_bytes:
+                self._rotate()
+        self._sync(mark)
+        if len(self._queue) >= self.batch:
+            self._wake.set()
+
+    def pending(self, scan_id: str) -> Scan | None:
+        """A submitted scan that is not in the database yet."""
+        return self._pending.get(scan_id)
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    # internals
+
+    def _sync(self, mark: int):
+        if not settings.SCAN_SPOOL_FSYNC or self._synced >= mark:
+            return
+        with self._sync_lock:
+            if self._synced >= mark:
+                return  # another request's fsync covered our bytes
+            # everything appended so far is in this segment or in a rotated
+            # one (fsync'd on rotation), so one fsync covers `target`
+            with self._lock:
+                target = self._written
+                fd = os.dup(self._seg.fileno())
+            t0 = time.perf_counter()
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            FSYNC_SECONDS.observe(time.perf_counter() - t0)
+            with self._lock:
+                self._synced = max(self._synced, target)
+
+    def _open_segment(self):
+        while True:
+            path = self.spool_dir / f"scans-{os.getpid()}-{self._seq:06d}.jsonl"
+            f = open(path, "ab", buffering=0)
+            fcntl.flock(f, fcntl.LOCK_EX)
+            # recovery in another worker may have grabbed and deleted the
+            # file between open and flock; only keep it if it is still linked
+            try:
+                if os.stat(path).st_ino == os.fstat(f.fileno()).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            f.close()
+        self._seg, self._seg_path, self._seg_size = f, path, 0
+
+    def _rotate(self):
+        if settings.SCAN_SPOOL_FSYNC:
+            os.fsync(self._seg.fileno())
+            self._synced = max(self._synced, self._written)
+        self._seg.close()
+        if self._outstanding.get(self._seq, 0):
+            self._sealed[self._seq] = self._seg_path
+        else:
+            self._seg_path.unlink(missing_ok=True)
+        self._seq += 1
+        self._open_segment()
+
+    def _insert_isolating(self, rows: list[dict]):
+        """
+        Insert rows, bisecting on failure down to the rows the database
+        rejects on their own, which are dead-lettered. Transient errors raise.
+        """
+        try:
+            insert_rows(rows)
+        except Exception as e:
+            if _transient(e):
+                raise
+            if len(rows) == 1:
+                self._dead_letter(rows[0], e)
+                return
+            mid = len(rows) // 2
+            self._insert_isolating(rows[:mid])
+            self._insert_isolating(rows[mid:])
+
+    def _dead_letter(self, row: dict, error: Exception):
+        dead_dir = self.spool_dir / "dead"
+        dead_dir.mkdir(exist_ok=True)
+        cause = getattr(error, "orig", None) or error
+        record = {
+            "row": row,
+            "error": f"{type(cause).__name__}: {cause}",
+            "at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        # durable before the row's spool segment can be deleted
+        with open(dead_dir / f"scans-{os.getpid()}.jsonl", "ab") as f:
+            f.write((json.dumps(record, default=str) + "\n").encode())
+            if settings.SCAN_SPOOL_FSYNC:
+                os.fsync(f.fileno())
+        DEAD_LETTERED.inc()
+        log.error("Dead-lettered scan row %s: %s", row.get("id"), record["error"])
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        while True:
+            with self._lock:
+                batch = [self._queue.popleft() for _ in range(min(self.batch, len(self._queue)))]
+            if not batch:
+                return
+            rows = [r for _, r in batch]
+            t0 = time.perf_counter()
+            try:
+                if self._attempts >= settings.SCAN_WRITER_MAX_ATTEMPTS:
+                    self._insert_isolating(rows)
+                else:
+                    insert_rows(rows)
+            except Exception as e:
+                # rows stay spooled and queued; retried on the next tick
+                log.exception("Bulk insert of %d scan rows failed", len(batch))
+                FLUSH_ERRORS.inc()
+                if not _transient(e):
+                    self._attempts += 1
+                with self._lock:
+                    self._queue.extendleft(reversed(batch))
+                return
+            self._attempts = 0
+            FLUSH_SECONDS.observe(time.perf_counter() - t0)
+            FLUSHED.inc(len(batch))
+            with self._lock:
+                for seq, row in batch:
+                    self._pending.pop(row["id"], None)
+                    self._outstanding[seq] -= 1
+                for seq in [s for s, n in self._outstanding.items() if n == 0]:
+                    del self._outstanding[seq]
+                    path = self._sealed.pop(seq, None)
+                    if path is not None:
+                        path.unlink(missing_ok=True)
+
+
+SCAN_WRITER = ScanWriter(
+    settings.SCAN_SPOOL_DIR,
+    batch=settings.SCAN_WRITER_BATCH,
+    interval_s=settings.SCAN_WRITER_INTERVAL_MS / 1000,
+    segment_bytes=settings.SCAN_SPOOL_SEGMENT_MB * 1024 * 1024,
+)
+QUEUE_DEPTH.set_function(SCAN_WRITER.queue_depth)
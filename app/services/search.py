@@ -0,0 +1,298 @@
+"""
+Ranked full-text search over the disease/treatment catalog.
+
+SQLite: an FTS5 table `catalog_fts` (one row per disease or treatment),
+kept in sync by the admin write handlers via `index_disease` /
+`index_treatment` / `remove_*`.
+
+Postgres: GIN expression indexes on to_tsvector(...) plus pg_trgm indexes
+for fuzzy/substring matches, created by `python -m
+app.scripts.create_search_indexes` (CREATE EXTENSION needs more than the
+app role usually has). Without pg_trgm, fuzzy matching degrades to ILIKE.
+Expression indexes follow the base tables, so the sync hooks are no-ops
+there.
+"""
+import logging
+import re
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.models import Disease, Treatment
+
+log = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+_DISEASE_DOC = (
+    "coalesce(label, '') || ' ' || coalesce(display_name, '') || ' ' || coalesce(description, '')"
+)
+_TREATMENT_DOC = "coalesce(title, '') || ' ' || coalesce(instructions, '')"
+
+
+def _is_sqlite(bind) -> bool:
+    return bind.dialect.name == "sqlite"
+
+
+# ---------- schema ----------
+def ensure_search_index(engine: Engine):
+    """SQLite: create catalog_fts if missing and bring it in line with the catalog."""
+    if not _is_sqlite(engine):
+        return
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS catalog_fts USING fts5("
+                "kind UNINDEXED, ref_id UNINDEXED, locale UNINDEXED, title, body, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        )
+        _sync_sqlite(conn)
+
+
+def _sync_sqlite(conn):
+    # diff by id: rows written without the sync hooks (imports, an older
+    # release, a crash between write and index) are added, deleted ones dropped
+    for kind, table, columns in (
+        ("disease", "diseases", "NULL, label || ' ' || display_name, description"),
+        ("treatment", "treatments", "locale, title, instructions"),
+    ):
+        conn.execute(
+            text(
+                "INSERT INTO catalog_fts (kind, ref_id, locale, title, body) "
+                f"SELECT :kind, id, {columns} FROM {table} "
+                "WHERE id NOT IN (SELECT ref_id FROM catalog_fts WHERE kind = :kind)"
+            ),
+            {"kind": kind},
+        )
+        conn.execute(
+            text(
+                "DELETE FROM catalog_fts WHERE kind = :kind "
+                f"AND ref_id NOT IN (SELECT id FROM {table})"
+            ),
+            {"kind": kind},
+        )
+
+
+def create_search_indexes(engine: Engine):
+    """Postgres: pg_trgm and the GIN indexes. Run as a role allowed to create extensions."""
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for stmt in (
+            f"CREATE INDEX IF NOT EXISTS ix_diseases_fts ON diseases "
+            f"USING gin (to_tsvector('simple', {_DISEASE_DOC}))",
+            f"CREATE INDEX IF NOT EXISTS ix_treatments_fts ON treatments "
+            f"USING gin (to_tsvector('simple', {_TREATMENT_DOC}))",
+            "CREATE INDEX IF NOT EXISTS ix_diseases_trgm ON diseases "
+            "USING gin ((label || ' ' || display_name) gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS ix_treatments_trgm ON treatments "
+            "USING gin (title gin_trgm_ops)",
+        ):
+            conn.execute(text(stmt))
+
+
+_has_trgm: bool | None = None  # checked once per process
+
+
+def _pg_trgm(db: Session) -> bool:
+    global _has_trgm
+    if _has_trgm is None:
+        _has_trgm = bool(
+            db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar()
+        )
+        if not _has_trgm:
+            log.warning(
+                "pg_trgm is not installed; fuzzy search falls back to ILIKE "
+                "(run python -m app.scripts.create_search_indexes)"
+            )
+    return _has_trgm
+
+
+def _fuzzy(db: Session, expr: str, params: dict) -> tuple[str, str]:
+    """(match condition, rank expression) for fuzzy matches of :term against expr."""
+    if _pg_trgm(db):
+        return f"({expr}) % :term", f"similarity({expr}, :term)"
+    escaped = re.sub(r"([\\%_])", r"\\\1", params["term"])
+    params["like"] = f"%{escaped}%"
+    return f"({expr}) ILIKE :like", "0"
+
+
+# ---------- sync hooks (call before commit, inside the write transaction) ----------
+def _upsert(db: Session, kind: str, ref_id: str, locale: str | None, title: str, body: str):
+    _remove(db, kind, ref_id)
+    db.execute(
+        text(
+            "INSERT INTO catalog_fts (kind, ref_id, locale, title, body) "
+            "VALUES (:kind, :ref_id, :locale, :title, :body)"
+        ),
+        {"kind": kind, "ref_id": ref_id, "locale": locale, "title": title, "body": body},
+    )
+
+
+def _remove(db: Session, kind: str, ref_id: str):
+    db.execute(
+        text("DELETE FROM catalog_fts WHERE kind = :kind AND ref_id = :ref_id"),
+        {"kind": kind, "ref_id": ref_id},
+    )
+
+
+def index_disease(db: Session, d: Disease):
+    if _is_sqlite(db.get_bind()):
+        db.flush()  # make sure d.id is assigned
+        _upsert(db, "disease", d.id, None, f"{d.label} {d.display_name}", d.description or "")
+
+
+def remove_disease(db: Session, disease_id: str):
+    if _is_sqlite(db.get_bind()):
+        _remove(db, "disease", disease_id)
+
+
+def index_treatment(db: Session, t: Treatment):
+    if _is_sqlite(db.get_bind()):
+        db.flush()
+        _upsert(db, "treatment", t.id, t.locale, t.title, t.instructions or "")
+
+
+def remove_treatment(db: Session, treatment_id: str):
+    if _is_sqlite(db.get_bind()):
+        _remove(db, "treatment", treatment_id)
+
+
+# ---------- queries ----------
+def _fts5_query(term: str) -> str | None:
+    # quote every token (no FTS syntax injection); prefix-match the last one
+    tokens = _TOKEN.findall(term)
+    if not tokens:
+        return None
+    quoted = [f'"{t}"' for t in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _page(db: Session, select_sql: str, count_sql: str, params: dict) -> tuple[list[str], int]:
+    ids = [r[0] for r in db.execute(text(select_sql), params).all()]
+    total = db.execute(text(count_sql), params).scalar()
+    return ids, total
+
+
+def _disease_ids(db: Session, term: str, limit: int, offset: int) -> tuple[list[str], int]:
+    params = {"limit": limit, "offset": offset}
+    if _is_sqlite(db.get_bind()):
+        params.update(q=_fts5_query(term), kind="disease")
+        if params["q"] is None:
+            return [], 0
+        where = "catalog_fts MATCH :q AND kind = :kind"
+        # title (label + name) matches weigh more than description matches
+        return _page(
+            db,
+            f"SELECT ref_id FROM catalog_fts WHERE {where} "
+            "ORDER BY bm25(catalog_fts, 0, 0, 0, 10.0, 1.0) LIMIT :limit OFFSET :offset",
+            f"SELECT count(*) FROM catalog_fts WHERE {where}",
+            params,
+        )
+
+    params["term"] = term
+    fuzzy, fuzzy_rank = _fuzzy(db, "label || ' ' || display_name", params)
+    where = (
+        f"to_tsvector('simple', {_DISEASE_DOC}) @@ websearch_to_tsquery('simple', :term) "
+        f"OR {fuzzy}"
+    )
+    return _page(
+        db,
+        f"SELECT id FROM diseases WHERE {where} ORDER BY greatest("
+        f"ts_rank(to_tsvector('simple', {_DISEASE_DOC}), websearch_to_tsquery('simple', :term)), "
+        f"{fuzzy_rank}) DESC LIMIT :limit OFFSET :offset",
+        f"SELECT count(*) FROM diseases WHERE {where}",
+        params,
+    )
+
+
+def _treatment_ids(
+    db: Session,
+    term: str,
+    limit: int,
+    offset: int,
+    locale: str | None,
+    type: str | None,
+    disease_label: str | None,
+) -> tuple[list[str], int]:
+    params = {
+        "limit": limit,
+        "offset": offset,
+        "locale": locale,
+        "type": type,
+        "disease_label": disease_label,
+    }
+    filters = ""
+    if type:
+        filters += " AND treatments.type = :type"
+    if disease_label:
+        filters += " AND diseases.label = :disease_label"
+
+    if _is_sqlite(db.get_bind()):
+        params.update(q=_fts5_query(term), kind="treatment")
+        if params["q"] is None:
+            return [], 0
+        src = "catalog_fts"
+        if filters:
+            # only pay for the joins when a filter needs the base tables
+            src += (
+                " JOIN treatments ON treatments.id = catalog_fts.ref_id"
+                " JOIN diseases ON diseases.id = treatments.disease_id"
+            )
+        where = "catalog_fts MATCH :q AND catalog_fts.kind = :kind" + filters
+        if locale:
+            where += " AND catalog_fts.locale = :locale"
+        return _page(
+            db,
+            f"SELECT catalog_fts.ref_id FROM {src} WHERE {where} "
+            "ORDER BY bm25(catalog_fts, 0, 0, 0, 10.0, 1.0) LIMIT :limit OFFSET :offset",
+            f"SELECT count(*) FROM {src} WHERE {where}",
+            params,
+        )
+
+    params["term"] = term
+    src = "treatments JOIN diseases ON diseases.id = treatments.disease_id"
+    doc = _TREATMENT_DOC.replace("title", "treatments.title").replace(
+        "instructions", "treatments.instructions"
+    )
+    if locale:
+        filters += " AND treatments.locale = :locale"
+    fuzzy, fuzzy_rank = _fuzzy(db, "treatments.title", params)
+    where = (
+        f"(to_tsvector('simple', {doc}) @@ websearch_to_tsquery('simple', :term) "
+        f"OR {fuzzy}){filters}"
+    )
+    return _page(
+        db,
+        f"SELECT treatments.id FROM {src} WHERE {where} ORDER BY greatest("
+        f"ts_rank(to_tsvector('simple', {doc}), websearch_to_tsquery('simple', :term)), "
+        f"{fuzzy_rank}) DESC LIMIT :limit OFFSET :offset",
+        f"SELECT count(*) FROM {src} WHERE {where}",
+        params,
+    )
+
+
+def search_diseases(
+    db: Session, term: str, limit: int, offset: int
+) -> tuple[list[Disease], int]:
+    """Diseases matching `term` in label, name or description, best first."""
+    ids, total = _disease_ids(db, term, limit, offset)
+    by_id = {d.id: d for d in db.query(Disease).filter(Disease.id.in_(ids)).all()}
+    return [by_id[i] for i in ids if i in by_id], total
+
+
+def search_treatments(
+    db: Session,
+    term: str,
+    limit: int,
+    offset: int,
+    locale: str | None = None,
+    type: str | None = None,
+    disease_label: str | None = None,
+) -> tuple[list[Treatment], int]:
+    """Treatments matching `term` in title or instructions, best first."""
+    ids, total = _treatment_ids(db, term, limit, offset, locale, type, disease_label)
+    by_id = {t.id: t for t in db.query(Treatment).filter(Treatment.id.in_(ids)).all()}
+    return [by_id[i] for i in ids if i in by_id], total
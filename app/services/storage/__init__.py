@@ -0,0 +1,53 @@
+"""
+Upload storage. STORAGE_BACKEND picks where blobs and thumbnails live:
+
+  local : UPLOAD_DIR on this node, served by /uploads (single host)
+  s3    : an S3-compatible bucket shared by every API node
+"""
+import threading
+
+from app.core.config import settings
+from app.services.storage.base import ALLOWED, StorageBackend, UploadSink, blob_rel_path
+from app.services.storage.local import LocalStorage
+from app.services.storage.s3 import S3Storage
+
+BACKENDS: dict[str, type[StorageBackend]] = {
+    LocalStorage.name: LocalStorage,
+    S3Storage.name: S3Storage,
+}
+
+_storage: StorageBackend | None = None
+_lock = threading.Lock()
+
+
+def create_storage(name: str) -> StorageBackend:
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise RuntimeError(
+            f"Unknown STORAGE_BACKEND {name!r} (expected one of {sorted(BACKENDS)})"
+        )
+    return cls()
+
+
+def get_storage() -> StorageBackend:
+    """The process-wide backend (and its connection pool), built on first use."""
+    global _storage
+    if _storage is None:
+        with _lock:
+            if _storage is None:
+                _storage = create_storage(settings.STORAGE_BACKEND)
+    return _storage
+
+
+__all__ = [
+    "ALLOWED",
+    "BACKENDS",
+    "LocalStorage",
+    "S3Storage",
+    "StorageBackend",
+    "UploadSink",
+    "blob_rel_path",
+    "create_storage",
+    "get_storage",
+]
@@ -0,0 +1,108 @@
+import tempfile
+from typing import BinaryIO
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+
+ALLOWED = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp"}
+CHUNK = 1024 * 1024
+# bytes needed to tell the ALLOWED formats apart
+SNIFF_BYTES = 12
+
+
+def sniff_image_type(head: bytes) -> str | None:
+    """Content type of an ALLOWED image from its first SNIFF_BYTES, or None."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def bytes_limit() -> int:
+    return int(settings.MAX_UPLOAD_MB) * 1024 * 1024
+
+
+def too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413, detail=f"File too large (>{settings.MAX_UPLOAD_MB} MB)"
+    )
+
+
+def blob_rel_path(digest: str, ext: str) -> str:
+    # content-addressed layout: blobs/ab/cd/abcd...<ext>
+    return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+class UploadSink:
+    """
+    Destination of one upload whose key (its content hash) is only known
+    once the last byte is in. write() receives the body as it arrives;
+    commit() files it under `rel` and returns a readable copy for decoding,
+    which the caller closes; abort() drops it.
+    """
+
+    def write(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def commit(self, rel: str, content_type: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        raise NotImplementedError
+
+
+class BufferedSink(UploadSink):
+    """Buffers the body (in memory up to MAX_UPLOAD_MB), then put()s it if new."""
+
+    def __init__(self, storage: "StorageBackend"):
+        self.storage = storage
+        self._buf = tempfile.SpooledTemporaryFile(max_size=bytes_limit())
+
+    def write(self, data: bytes) -> None:
+        self._buf.write(data)
+
+    def commit(self, rel: str, content_type: str) -> BinaryIO:
+        if not self.storage.exists(rel):
+            self._buf.seek(0)
+            self.storage.put(rel, self._buf, content_type)
+        self._buf.seek(0)
+        return self._buf
+
+    def abort(self) -> None:
+        self._buf.close()
+
+
+class StorageBackend:
+    """
+    Where uploads and their derivatives live. Objects are addressed by a
+    posix key relative to the storage root ("blobs/ab/cd/<digest>.jpg",
+    "thumbs/96/..."), which is also the path under /uploads for the local
+    backend and what Scan.image_url records. Objects are write-once: a key
+    never changes content.
+
+    Every method blocks; call from a worker thread.
+    """
+
+    name = "base"
+
+    def put(self, rel: str, src: BinaryIO, content_type: str) -> None:
+        """Stream `src` (from its current position) to `rel`, replacing it atomically."""
+        raise NotImplementedError
+
+    def exists(self, rel: str) -> bool:
+        raise NotImplementedError
+
+    def open(self, rel: str) -> BinaryIO:
+        """Readable, seekable file for `rel`; FileNotFoundError if missing."""
+        raise NotImplementedError
+
+    def open_sink(self) -> UploadSink:
+        return BufferedSink(self)
+
+    def url(self, request: Request, rel: str) -> str:
+        """Client-facing URL of `rel`; bytes should not go through the API."""
+        raise NotImplementedError
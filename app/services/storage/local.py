@@ -0,0 +1,104 @@
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import BinaryIO
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.services.storage.base import CHUNK, StorageBackend, UploadSink
+
+
+def _ensure_dir(p: Path):
+    p.mkdir(parents=True, exist_ok=True)
+
+
+class LocalSink(UploadSink):
+    """
+    Writes the body once, into a temp file next to its destination; commit
+    is a rename (or dropping the temp file when identical bytes are already
+    stored), and the returned copy is read back from the page cache.
+    """
+
+    def __init__(self, storage: "LocalStorage"):
+        self.storage = storage
+        self.tmp_path = storage._tmp_path()
+        self._f = open(self.tmp_path, "wb")
+
+    def write(self, data: bytes) -> None:
+        self._f.write(data)
+
+    def commit(self, rel: str, content_type: str) -> BinaryIO:
+        self._f.close()
+        fs_path = self.storage._path(rel)
+        if fs_path.exists():
+            # same content already stored
+            self.tmp_path.unlink(missing_ok=True)
+        else:
+            _ensure_dir(fs_path.parent)
+            os.replace(self.tmp_path, fs_path)
+        return open(fs_path, "rb")
+
+    def abort(self) -> None:
+        self._f.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+class LocalStorage(StorageBackend):
+    """
+    Files under UPLOAD_DIR on this node, served by the /uploads mount (or
+    by a CDN/reverse proxy in front of it when STORAGE_PUBLIC_BASE_URL is set).
+    """
+
+    name = "local"
+
+    def __init__(self, base_dir: str | None = None):
+        self.base_dir = base_dir or settings.UPLOAD_DIR
+        self.root = Path(self.base_dir).resolve()
+        self._mount_path: str | None = None
+
+    def _path(self, rel: str) -> Path:
+        # keys come from stored rows and request paths: never leave the root
+        p = (self.root / rel).resolve()
+        if not p.is_relative_to(self.root):
+            raise FileNotFoundError(rel)
+        return p
+
+    def _tmp_path(self) -> Path:
+        tmp_dir = self.root / "blobs" / "tmp"
+        _ensure_dir(tmp_dir)
+        return tmp_dir / f"{uuid.uuid4()}.part"
+
+    def put(self, rel: str, src: BinaryIO, content_type: str) -> None:
+        dst = self._path(rel)
+        tmp = self._tmp_path()
+        try:
+            with open(tmp, "wb") as f:
+                shutil.copyfileobj(src, f, CHUNK)
+            _ensure_dir(dst.parent)
+            os.replace(tmp, dst)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def exists(self, rel: str) -> bool:
+        try:
+            return self._path(rel).is_file()
+        except FileNotFoundError:
+            return False
+
+    def open(self, rel: str) -> BinaryIO:
+        return open(self._path(rel), "rb")
+
+    def open_sink(self) -> UploadSink:
+        return LocalSink(self)
+
+    def url(self, request: Request, rel: str) -> str:
+        if settings.STORAGE_PUBLIC_BASE_URL:
+            return f"{settings.STORAGE_PUBLIC_BASE_URL.rstrip('/')}/{rel}"
+        if self._mount_path is None:
+            # starlette StaticFiles mount name is "uploads"; routes are fixed
+            # at startup, so resolve it once instead of per URL
+            self._mount_path = request.app.url_path_for("uploads", path="")
+        # what request.url_for("uploads", path=rel) builds, minus the route walk
+        return f"{str(request.base_url).rstrip('/')}{self._mount_path}{rel}"
@@ -0,0 +1,130 @@
+import io
+import threading
+import time
+from collections import OrderedDict
+from typing import BinaryIO
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.services.storage.base import StorageBackend
+
+MiB = 1024 * 1024
+
+
+class S3Storage(StorageBackend):
+    """
+    S3-compatible bucket (AWS, MinIO, R2, ...); needs boto3. One client per
+    process, with a connection pool sized by S3_MAX_POOL_CONNECTIONS that
+    every request thread shares. Uploads stream in S3_MULTIPART_CHUNK_MB
+    parts, holding one part in memory: a single PUT when the object fits in
+    one part, a multipart upload otherwise.
+
+    Clients fetch objects directly: from STORAGE_PUBLIC_BASE_URL (a CDN or
+    a public bucket) when set, otherwise from presigned GET URLs. A URL is
+    reused for half its lifetime so repeat views hit the browser cache.
+
+    For a local stand-in, point S3_ENDPOINT_URL at MinIO (or `moto_server`)
+    and set S3_ADDRESSING_STYLE=path.
+    """
+
+    name = "s3"
+
+    def __init__(self):
+        import boto3
+        from botocore.config import Config
+
+        if not settings.S3_BUCKET:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs S3_BUCKET")
+        self.bucket = settings.S3_BUCKET
+        self.prefix = settings.S3_PREFIX.strip("/")
+        self._client = boto3.session.Session().client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+            config=Config(
+                signature_version="s3v4",
+                max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                retries={"max_attempts": 3, "mode": "standard"},
+                s3={"addressing_style": settings.S3_ADDRESSING_STYLE},
+            ),
+        )
+        # S3 rejects parts under 5 MB (except the last one)
+        self._part_size = max(5, settings.S3_MULTIPART_CHUNK_MB) * MiB
+        self._cache_control = f"public, max-age={settings.UPLOAD_CACHE_MAX_AGE_S}, immutable"
+        self._urls: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._urls_lock = threading.Lock()
+
+    def _key(self, rel: str) -> str:
+        return f"{self.prefix}/{rel}" if self.prefix else rel
+
+    def put(self, rel: str, src: BinaryIO, content_type: str) -> None:
+        # not upload_fileobj: it closes `src`, which callers still decode from
+        obj = {"Bucket": self.bucket, "Key": self._key(rel)}
+        meta = {"ContentType": content_type, "CacheControl": self._cache_control}
+        chunk = src.read(self._part_size)
+        if len(chunk) < self._part_size:
+            self._client.put_object(Body=chunk, **obj, **meta)
+            return
+        upload_id = self._client.create_multipart_upload(**obj, **meta)["UploadId"]
+        parts = []
+        try:
+            while chunk:
+                n = len(parts) + 1
+                r = self._client.upload_part(Body=chunk, PartNumber=n, UploadId=upload_id, **obj)
+                parts.append({"ETag": r["ETag"], "PartNumber": n})
+                chunk = src.read(self._part_size)
+            self._client.complete_multipart_upload(
+                UploadId=upload_id, MultipartUpload={"Parts": parts}, **obj
+            )
+        except BaseException:
+            self._client.abort_multipart_upload(UploadId=upload_id, **obj)
+            raise
+
+    def exists(self, rel: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=self._key(rel))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def open(self, rel: str) -> BinaryIO:
+        from botocore.exceptions import ClientError
+
+        try:
+            obj = self._client.get_object(Bucket=self.bucket, Key=self._key(rel))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                raise FileNotFoundError(rel) from e
+            raise
+        # PIL needs a seekable file; uploads are capped at MAX_UPLOAD_MB
+        with obj["Body"] as body:
+            return io.BytesIO(body.read())
+
+    def url(self, request: Request, rel: str) -> str:
+        if settings.STORAGE_PUBLIC_BASE_URL:
+            return f"{settings.STORAGE_PUBLIC_BASE_URL.rstrip('/')}/{self._key(rel)}"
+        now = time.monotonic()
+        with self._urls_lock:
+            hit = self._urls.get(rel)
+            if hit is not None and hit[0] > now:
+                self._urls.move_to_end(rel)
+                return hit[1]
+        expires = settings.S3_PRESIGN_EXPIRES_S
+        url = self._client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._key(rel)},
+            ExpiresIn=expires,
+        )
+        with self._urls_lock:
+            self._urls[rel] = (now + expires / 2, url)
+            self._urls.move_to_end(rel)
+            while len(self._urls) > settings.S3_PRESIGN_CACHE_MAX_ITEMS:
+                self._urls.popitem(last=False)
+        return url
@@ -0,0 +1,146 @@
+"""
+WebP thumbnails of uploaded scans.
+
+Derivatives live next to the originals in upload storage, keyed by the
+original's storage key, so they are served the same way (the /uploads
+mount, a CDN, or the bucket):
+
+    blobs/ab/cd/<digest>.jpg  ->  thumbs/96/blobs/ab/cd/<digest>.jpg.webp
+
+New uploads are rendered in the background right after they are saved;
+older uploads are rendered on first request (local storage, see
+app.utils.static_files) or in bulk with `python -m app.scripts.backfill_thumbnails`.
+
+Object storage cannot render on request, so until this process has seen
+an image's thumbnails stored, app.utils.urls hands out the original's URL
+for them and queues a check (and render) here.
+"""
+import io
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.services.storage import get_storage
+
+log = logging.getLogger(__name__)
+
+RENDER_SECONDS = REGISTRY.histogram(
+    "thumbnail_render_seconds", "Time to render every size of one image"
+)
+RENDERED = REGISTRY.counter(
+    "thumbnails_rendered_total", "Images rendered", ("trigger",)
+)
+
+THUMBS_PREFIX = "thumbs"
+
+
+def thumbnail_rel_path(rel: str, size: int) -> str:
+    return f"{THUMBS_PREFIX}/{size}/{rel}.webp"
+
+
+def source_rel_path(thumb_rel: str) -> tuple[str, int] | None:
+    """Inverse of thumbnail_rel_path: (original rel, size), or None."""
+    parts = thumb_rel.split("/", 2)
+    if len(parts) != 3 or parts[0] != THUMBS_PREFIX or not parts[2].endswith(".webp"):
+        return None
+    try:
+        size = int(parts[1])
+    except ValueError:
+        return None
+    return parts[2][: -len(".webp")], size
+
+
+def render_thumbnails(
+    rel: str, sizes: list[int] | None = None, force: bool = False, trigger: str = "upload"
+) -> list[str]:
+    """
+    Render the missing sizes of the stored upload <rel>. Decodes the original
+    once (JPEG draft mode at the largest size) and stores each WebP
+    atomically. Returns the keys written.
+    """
+    storage = get_storage()
+    sizes = sorted(sizes or settings.THUMBNAIL_SIZES, reverse=True)
+    targets = {s: thumbnail_rel_path(rel, s) for s in sizes}
+    if not force:
+        targets = {s: t for s, t in targets.items() if not storage.exists(t)}
+    if not targets:
+        return []
+
+    t0 = time.perf_counter()
+    written = []
+    with storage.open(rel) as src, Image.open(src) as im:
+        biggest = max(targets)
+        im.draft("RGB", (biggest, biggest))
+        im = ImageOps.exif_transpose(im).convert("RGB")
+        # largest first, each size downscaled from the previous one
+        for size in sorted(targets, reverse=True):
+            im.thumbnail((size, size), Image.Resampling.LANCZOS)
+            buf = io.BytesIO()
+            im.save(buf, "WEBP", quality=settings.THUMBNAIL_QUALITY, method=4)
+            buf.seek(0)
+            storage.put(targets[size], buf, "image/webp")
+            written.append(targets[size])
+    RENDER_SECONDS.observe(time.perf_counter() - t0)
+    RENDERED.labels(trigger).inc()
+    return written
+
+
+class ThumbnailQueue:
+    """
+    Small background executor; the same image is never queued twice, nor
+    once its thumbnails are known to be stored (remembered for up to
+    `max_ready` images, least recently used first out).
+    """
+
+    def __init__(self, workers: int, max_ready: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="thumbs"
+        )
+        self.max_ready = max_ready
+        self._pending: set[str] = set()
+        self._ready: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, rel: str):
+        if not settings.THUMBNAIL_SIZES:
+            return
+        with self._lock:
+            if rel in self._pending or rel in self._ready:
+                return
+            self._pending.add(rel)
+        self._executor.submit(self._run, rel)
+
+    def is_ready(self, rel: str) -> bool:
+        """True once every size of `rel` is known to be in storage."""
+        with self._lock:
+            if rel in self._ready:
+                self._ready.move_to_end(rel)
+                return True
+        return False
+
+    def _run(self, rel: str):
+        try:
+            # renders only the sizes that are missing; [] when all exist
+            render_thumbnails(rel)
+        except Exception:
+            # clients fall back to lazy generation on first request
+            log.exception("Thumbnail rendering failed for %s", rel)
+            with self._lock:
+                self._pending.discard(rel)
+            return
+        with self._lock:
+            self._pending.discard(rel)
+            self._ready[rel] = None
+            while len(self._ready) > self.max_ready:
+                self._ready.popitem(last=False)
+
+
+THUMBNAILS = ThumbnailQueue(
+    settings.THUMBNAIL_WORKERS, max_ready=settings.THUMBNAIL_READY_CACHE_ITEMS
+)
@@ -0,0 +1,19 @@
+import base64
+import datetime
+import json
+
+
+def encode_cursor(created_at: datetime.datetime, row_id: str) -> str:
+    """Opaque keyset cursor for the (created_at, id) position of the last row."""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, str]:
+    """Raises ValueError on anything that is not a cursor we issued."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.datetime.fromisoformat(created_at), str(row_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,52 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import REGISTRY
+
+REQUESTS = REGISTRY.counter(
+    "http_requests_total", "Requests by route template and status", ("method", "route", "status")
+)
+LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Time until the last response byte was handed to the server",
+    labelnames=("method", "route"),
+)
+
+
+def _route_label(scope: Scope) -> str:
+    # the router writes the match back into the shared scope; templates
+    # ("/api/v1/scans/{scan_id}") keep label cardinality bounded
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope and scope.get("root_path"):
+        return scope["root_path"]  # a Mount, e.g. /uploads
+    return "<unmatched>"
+
+
+class RequestMetricsMiddleware:
+    """Per-route request counts and latency; plain ASGI, no per-request allocations beyond a closure."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = _route_label(scope)
+            REQUESTS.labels(scope["method"], route, status).inc()
+            LATENCY.labels(scope["method"], route).observe(time.perf_counter() - t0)
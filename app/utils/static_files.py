@@ -0,0 +1,175 @@
+"""
+/uploads delivery.
+
+Everything under UPLOAD_DIR is write-once (content-addressed blobs, uuid
+names, thumbnails keyed by their original), so responses are marked
+immutable and the stat() behind each lookup is cached per file.
+"""
+import os
+import re
+import stat
+import threading
+import time
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.db.base import SessionLocal
+from app.db.models import Scan
+from app.services.storage import LocalStorage, get_storage
+from app.services.thumbnails import render_thumbnails, source_rel_path
+from app.utils.urls import legacy_rel_path
+
+STAT_HITS = REGISTRY.counter("upload_stat_cache_hits_total", "Upload lookups served from the stat cache")
+STAT_MISSES = REGISTRY.counter("upload_stat_cache_misses_total", "Upload lookups that hit the filesystem")
+
+# what app.services.storage.blob_rel_path produces for a sha256 digest
+_BLOB_KEY = re.compile(r"blobs/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.\w+")
+# pre-blob uploads: <user id>/YYYY/MM/DD/<name>
+_LEGACY_KEY = re.compile(r"([^/]+)/\d{4}/\d{2}/\d{2}/[^/]+")
+
+
+def lazy_source(rel: str) -> bool:
+    """
+    Whether a missing thumbnail of `rel` may be rendered on request: only
+    originals - a content-addressed blob, or a legacy upload one of its
+    owner's scans still references. Never a thumbnail (thumbs of thumbs
+    would nest without bound) or anything else that happens to be on disk.
+    Blocks on the database for legacy keys.
+    """
+    if _BLOB_KEY.fullmatch(rel):
+        return True
+    m = _LEGACY_KEY.fullmatch(rel)
+    if m is None:
+        return False
+    escaped = re.sub(r"([\\%_])", r"\\\1", rel)
+    with SessionLocal() as db:
+        stored = db.scalars(
+            select(Scan.image_url)
+            .where(Scan.user_id == m.group(1))
+            .where(Scan.image_url.like(f"%{escaped}", escape="\\"))
+            .limit(20)
+        ).all()
+    return any(legacy_rel_path(s) == rel for s in stored)
+
+
+class StatCache:
+    """
+    Bounded TTL cache of request path -> (full_path, stat_result). Only
+    regular files are kept: a miss may become a hit (lazy thumbnails), and
+    the TTL bounds how long a deleted or rewritten file is still announced.
+    """
+
+    def __init__(self, max_items: int, ttl_s: float):
+        self.max_items = max_items
+        self.ttl_s = ttl_s
+        self._items: OrderedDict[str, tuple[float, str, os.stat_result]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> tuple[str, os.stat_result] | None:
+        with self._lock:
+            hit = self._items.get(path)
+            if hit is not None and hit[0] > time.monotonic():
+                self._items.move_to_end(path)
+                return hit[1], hit[2]
+        return None
+
+    def put(self, path: str, full_path: str, stat_result: os.stat_result):
+        if self.ttl_s <= 0:
+            return
+        with self._lock:
+            self._items[path] = (time.monotonic() + self.ttl_s, full_path, stat_result)
+            self._items.move_to_end(path)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class UploadFileResponse(FileResponse):
+    """
+    FileResponse that hands whole-file bodies to the server when it supports
+    the ASGI zero-copy send extension (sendfile(2) from the fd). Starlette
+    already covers `http.response.pathsend` and range requests; everything
+    else falls back to chunked reads.
+    """
+
+    chunk_size = 256 * 1024
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self._zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        await super().__call__(scope, receive, send)
+
+    async def _handle_simple(self, send: Send, send_header_only: bool, send_pathsend: bool):
+        if send_header_only or send_pathsend or not self._zerocopy:
+            return await super()._handle_simple(send, send_header_only, send_pathsend)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        with open(self.path, "rb") as f:
+            await send({"type": "http.response.zerocopysend", "file": f, "more_body": False})
+
+
+class UploadStaticFiles(StaticFiles):
+    """
+    /uploads mount: immutable Cache-Control, validators (ETag/Last-Modified
+    -> 304), Range requests, and a stat cache so repeat requests skip the
+    threadpool hop and the directory walk. A missing thumbnail of an
+    original upload (scans saved before thumbnails existed) is rendered on
+    first request, then served; see lazy_source.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stat_cache = StatCache(
+            settings.UPLOAD_STAT_CACHE_MAX_ITEMS, settings.UPLOAD_STAT_CACHE_TTL_S
+        )
+        self.cache_control = f"public, max-age={settings.UPLOAD_CACHE_MAX_AGE_S}, immutable"
+
+    def lookup_path(self, path: str):
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+            self.stat_cache.put(path, full_path, stat_result)
+        return full_path, stat_result
+
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200):
+        response = UploadFileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        # set before the 304 check: NotModifiedResponse keeps Cache-Control
+        response.headers["cache-control"] = self.cache_control
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    async def get_response(self, path: str, scope: Scope):
+        if scope["method"] in ("GET", "HEAD"):
+            hit = self.stat_cache.get(path)
+            if hit is not None:
+                STAT_HITS.inc()
+                return self.file_response(hit[0], hit[1], scope)
+        STAT_MISSES.inc()
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as e:
+            if e.status_code != 404:
+                raise
+            src = source_rel_path(path.replace("\\", "/"))
+            if src is None or src[1] not in settings.THUMBNAIL_SIZES:
+                raise
+            if not isinstance(get_storage(), LocalStorage):
+                raise  # thumbnails live in the bucket, not behind this mount
+            if not await run_in_threadpool(lazy_source, src[0]):
+                raise
+            try:
+                await run_in_threadpool(render_thumbnails, src[0], trigger="lazy")
+            except (FileNotFoundError, OSError):
+                raise e
+            return await super().get_response(path, scope)
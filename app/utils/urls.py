@@ -1,31 +1,80 @@
+import posixpath
 from pathlib import Path
 from fastapi import Request
 from app.core.config import settings
+from app.services.storage import get_storage
+from app.services.thumbnails import THUMBNAILS, THUMBS_PREFIX, thumbnail_rel_path
 
 
-def public_upload_url(request: Request, stored_path: str) -> str:
+# what new rows store: storage keys under these prefixes
+KEY_PREFIXES = ("blobs/", f"{THUMBS_PREFIX}/")
+
+# legacy rows stored UPLOAD_DIR/<rel>, as configured or resolved; both forms
+# are computed once here so parsing them needs no filesystem calls
+_UPLOAD_ROOTS = tuple(
+    dict.fromkeys(
+        posixpath.normpath(root.replace("\\", "/")) + "/"
+        for root in (settings.UPLOAD_DIR, Path(settings.UPLOAD_DIR).resolve().as_posix())
+    )
+)
+
+
+def legacy_rel_path(stored: str) -> str:
+    """
+    Storage key of a pre-key Scan.image_url: a path inside UPLOAD_DIR
+    (absolute or relative) or a string with an 'uploads/' component. Any
+    other relative value already is a key (including the "<uid>/YYYY/MM/DD/
+    <name>" layout legacy rows reduce to) and is returned normalised, so
+    parsing a parsed value changes nothing. Absolute paths outside every
+    upload root cannot be mapped and come back unchanged. Pure string work;
+    app.scripts.migrate_image_keys rewrites these rows.
+    """
+    s = stored.replace("\\", "/")
+    norm = posixpath.normpath(s)
+    for root in _UPLOAD_ROOTS:
+        if norm.startswith(root):
+            return norm[len(root):]
+    # handle old rows that stored "./uploads/..." relative to another cwd
+    if "/uploads/" in s:
+        return posixpath.normpath(s.split("/uploads/", 1)[1])
+    if s.startswith("uploads/"):
+        return posixpath.normpath(s[len("uploads/"):])
+    if posixpath.isabs(s):
+        return stored
+    return norm
+
+
+def upload_rel_path(stored: str) -> str:
+    """Storage key of a Scan.image_url: the value itself, or parsed from a legacy path."""
+    if stored.startswith(KEY_PREFIXES):
+        return stored
+    return legacy_rel_path(stored)
+
+
+def public_upload_url(request: Request, stored: str) -> str:
+    """
+    Convert a Scan.image_url (a storage key, see upload_rel_path) into the
+    URL clients fetch it from: /uploads/<rel>, a CDN URL, or a presigned
+    object-storage URL.
+    """
+    return get_storage().url(request, upload_rel_path(stored))
+
+
+def thumbnail_urls(request: Request, stored: str) -> dict[str, str]:
     """
-    Convert a stored path (either absolute path inside UPLOAD_DIR, or a string that
-    already starts with 'uploads/') into a public URL at /uploads/<rel>.
+    {size: URL} for every configured thumbnail size of a stored upload.
+    Local storage renders missing thumbnails on request; elsewhere, sizes
+    not known to be rendered get the original's URL until they are.
     """
-    # Normalize base
-    uploads_root = Path(settings.UPLOAD_DIR).resolve()
-
-    p = Path(stored_path)
-    # Try to compute relative path under uploads/
-    rel: str | None = None
-    try:
-        rel = p.resolve().relative_to(uploads_root).as_posix()
-    except Exception:
-        s = str(stored_path).replace("\\", "/")
-        # handle old rows that stored "./uploads/..."
-        if "/uploads/" in s:
-            rel = s.split("/uploads/", 1)[1]
-        elif s.startswith("uploads/"):
-            rel = s.split("uploads/", 1)[1]
-        else:
-            # final fallback: just the filename (may break if not under uploads)
-            rel = p.name
-
-    # starlette StaticFiles mount name is "uploads"
-    return str(request.url_for("uploads", path=rel))
+    if not settings.THUMBNAIL_SIZES:
+        return {}
+    rel = upload_rel_path(stored)
+    storage = get_storage()
+    if storage.name != "local" and not THUMBNAILS.is_ready(rel):
+        THUMBNAILS.submit(rel)  # checks storage, renders what is missing
+        original = storage.url(request, rel)
+        return {str(size): original for size in settings.THUMBNAIL_SIZES}
+    return {
+        str(size): storage.url(request, thumbnail_rel_path(rel, size))
+        for size in settings.THUMBNAIL_SIZES
+    }
@@ -0,0 +1,116 @@
+"""
+Parity check and latency/memory comparison between inference backends.
+
+    python -m benchmarks.backends --keras models/plant_disease_model.keras \
+        --onnx models/plant_disease_model.onnx [--batch-sizes 1 8 32] [--iters 20]
+
+Parity: both backends see the same random batch; exits non-zero if the max
+absolute probability difference exceeds --atol or any argmax disagrees.
+Each backend is loaded in a fresh subprocess so import + load memory is
+measured in isolation.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+def _child(args):
+    from app.ml.backends import create_backend
+
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    backend = create_backend(args.backend, args.path)
+    backend.load()
+    load_s = time.perf_counter() - t0
+    rss_loaded = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    spec = backend.input_spec()
+    rng = np.random.default_rng(0)
+    latency = {}
+    for n in args.batch_sizes:
+        x = rng.random((n, spec.height, spec.width, spec.channels), dtype=np.float32)
+        backend.predict_batch(x)  # first call traces/allocates
+        times = []
+        for _ in range(args.iters):
+            t = time.perf_counter()
+            backend.predict_batch(x)
+            times.append(time.perf_counter() - t)
+        times.sort()
+        latency[n] = {
+            "p50_ms": times[len(times) // 2] * 1000,
+            "p99_ms": times[min(len(times) - 1, int(len(times) * 0.99))] * 1000,
+        }
+
+    # parity sample: fixed seed so every backend sees identical input
+    x = np.random.default_rng(42).random(
+        (8, spec.height, spec.width, spec.channels), dtype=np.float32
+    )
+    np.save(args.parity_out, backend.predict_batch(x))
+
+    print(
+        json.dumps(
+            {
+                "backend": args.backend,
+                "version": backend.version(),
+                "load_s": load_s,
+                "rss_after_import_mb": rss0 / 1024,
+                "rss_after_load_mb": rss_loaded / 1024,
+                "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                "latency": latency,
+            }
+        )
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare inference backends")
+    ap.add_argument("--keras", help="path to .keras model")
+    ap.add_argument("--onnx", help="path to exported .onnx model")
+    ap.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    ap.add_argument("--iters", type=int, default=20)
+    ap.add_argument("--atol", type=float, default=1e-4)
+    ap.add_argument("--backend", help=argparse.SUPPRESS)
+    ap.add_argument("--path", help=argparse.SUPPRESS)
+    ap.add_argument("--parity-out", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.backend:
+        return _child(args)
+
+    targets = [(name, path) for name, path in (("keras", args.keras), ("onnx", args.onnx)) if path]
+    if not targets:
+        ap.error("give at least one of --keras / --onnx")
+
+    outputs = {}
+    with tempfile.TemporaryDirectory() as d:
+        for name, path in targets:
+            parity_out = f"{d}/{name}.npy"
+            cmd = [sys.executable, "-m", "benchmarks.backends", "--backend", name]
+            cmd += ["--path", path, "--parity-out", parity_out, "--iters", str(args.iters)]
+            cmd += ["--batch-sizes", *map(str, args.batch_sizes)]
+            r = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+            outputs[name] = np.load(parity_out)
+            print(
+                f"{name:>6}  load={r['load_s']:6.2f}s  rss_loaded={r['rss_after_load_mb']:7.1f}MB"
+                f"  peak_rss={r['peak_rss_mb']:7.1f}MB"
+            )
+            for n, lat in r["latency"].items():
+                print(f"        batch={n:<3} p50={lat['p50_ms']:8.2f}ms  p99={lat['p99_ms']:8.2f}ms")
+
+    if len(outputs) == 2:
+        a, b = outputs["keras"], outputs["onnx"]
+        diff = float(np.max(np.abs(a - b)))
+        agree = bool(np.all(a.argmax(1) == b.argmax(1)))
+        ok = diff <= args.atol and agree
+        print(f"parity: max_abs_diff={diff:.2e} argmax_agree={agree} -> {'OK' if ok else 'FAIL'}")
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
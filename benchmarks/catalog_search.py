@@ -0,0 +1,171 @@
+"""
+Compare the old ILIKE '%term%' admin catalog search with the indexed one.
+
+  ilike : substring scan over label/display_name and title/instructions
+  fts   : app.services.search (FTS5 on SQLite, tsvector + pg_trgm on Postgres)
+
+Builds a synthetic catalog (default 20k diseases + 80k treatments across
+three locales) in a throwaway SQLite file, or in --database-url (tables are
+created there, so point it at a scratch database).
+
+    python -m benchmarks.catalog_search --diseases 20000 --treatments 80000 --iters 50
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+# a few real terms plus a long tail of synthetic words, drawn Zipf-style so
+# term selectivity looks like natural text rather than a 60-word vocabulary
+WORDS = (
+    "blight whitefly neem spray powdery mildew copper leaf spot rust wilt rot "
+    "mosaic curl canker scab borer mite aphid thrips fungus virus tomato potato"
+).split()
+TERMS = ("blight", "whitefly", "neem spray", "powdery mil", "copper")
+LOCALES = ("en", "si", "ta")
+
+
+def _vocabulary(rng: random.Random, size: int = 20_000) -> tuple[list[str], list[float]]:
+    syllables = [a + b for a in "bcdfghklmnprstvz" for b in "aeiou"]
+    tail = {"".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(size)}
+    words = list(tail)
+    # interleave the real terms at mid ranks so they match ~0.1-1% of rows
+    for i, w in enumerate(WORDS):
+        words.insert(200 + i * 40, w)
+    cum = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    return words, cum
+
+
+def _text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choices(_VOCAB[0], cum_weights=_VOCAB[1], k=n))
+
+
+_VOCAB = _vocabulary(random.Random(1))
+
+
+def populate(engine, n_diseases: int, n_treatments: int, chunk: int = 5000):
+    from app.db.base import Base
+    from app.db.models import Disease, Treatment
+
+    Base.metadata.create_all(engine)
+    rng = random.Random(0)
+    disease_ids = [str(uuid.uuid4()) for _ in range(n_diseases)]
+    with engine.begin() as conn:
+        for start in range(0, n_diseases, chunk):
+            conn.execute(
+                insert(Disease),
+                [
+                    {
+                        "id": disease_ids[i],
+                        "label": f"{_text(rng, 2).replace(' ', '-')}-{i}",
+                        "display_name": _text(rng, 3).title(),
+                        "description": _text(rng, 30),
+                    }
+                    for i in range(start, min(start + chunk, n_diseases))
+                ],
+            )
+        for start in range(0, n_treatments, chunk):
+            conn.execute(
+                insert(Treatment),
+                [
+                    {
+                        "disease_id": rng.choice(disease_ids),
+                        "type": rng.choice(("organic", "chemical")),
+                        "title": _text(rng, 4).capitalize(),
+                        "instructions": _text(rng, 40),
+                        "locale": rng.choice(LOCALES),
+                    }
+                    for _ in range(start, min(start + chunk, n_treatments))
+                ],
+            )
+
+
+def ilike_diseases(db: Session, term: str, limit: int):
+    from app.db.models import Disease
+
+    q = db.query(Disease).filter(
+        Disease.label.ilike(f"%{term}%") | Disease.display_name.ilike(f"%{term}%")
+    )
+    q.count()
+    return q.order_by(Disease.display_name.asc()).limit(limit).all()
+
+
+def ilike_treatments(db: Session, term: str, limit: int):
+    from app.db.models import Treatment
+
+    q = db.query(Treatment).filter(
+        Treatment.title.ilike(f"%{term}%") | Treatment.instructions.ilike(f"%{term}%")
+    )
+    q.count()
+    return q.order_by(Treatment.title.asc()).limit(limit).all()
+
+
+def _time(fn, db, iters: int, limit: int) -> list[float]:
+    times = []
+    for i in range(iters):
+        term = TERMS[i % len(TERMS)]
+        t0 = time.perf_counter()
+        fn(db, term, limit)
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return times
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--diseases", type=int, default=20_000)
+    ap.add_argument("--treatments", type=int, default=80_000)
+    ap.add_argument("--iters", type=int, default=50)
+    ap.add_argument("--page-size", type=int, default=20)
+    ap.add_argument("--database-url", help="scratch database (default: temp SQLite file)")
+    args = ap.parse_args()
+
+    from app.services import search
+
+    tmp = None
+    url = args.database_url
+    if not url:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        tmp.close()
+        url = f"sqlite:///{tmp.name}"
+    engine = create_engine(url)
+    try:
+        t0 = time.perf_counter()
+        populate(engine, args.diseases, args.treatments)
+        t1 = time.perf_counter()
+        if engine.dialect.name == "postgresql":
+            search.create_search_indexes(engine)
+        search.ensure_search_index(engine)
+        t2 = time.perf_counter()
+        print(
+            f"{engine.dialect.name}: {args.diseases + args.treatments} rows "
+            f"loaded in {t1 - t0:.1f}s, search index built in {t2 - t1:.1f}s"
+        )
+
+        cases = [
+            ("diseases", "ilike", ilike_diseases),
+            ("diseases", "fts", lambda db, t, n: search.search_diseases(db, t, n, 0)),
+            ("treatments", "ilike", ilike_treatments),
+            ("treatments", "fts", lambda db, t, n: search.search_treatments(db, t, n, 0)),
+        ]
+        with Session(engine) as db:
+            for table, mode, fn in cases:
+                fn(db, TERMS[0], args.page_size)  # warm the page cache
+                times = _time(fn, db, args.iters, args.page_size)
+                p50 = times[len(times) // 2] * 1000
+                p99 = times[min(len(times) - 1, int(len(times) * 0.99))] * 1000
+                print(f"{table:>10}  {mode:<5}  p50={p50:8.2f}ms  p99={p99:8.2f}ms")
+    finally:
+        engine.dispose()
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Concurrency ceiling of the scan history route: sync Session vs AsyncSession.
+
+  sync  : the pre-async handler shape - `def` route, sync Session from
+          get_db, user lookup + keyset page; every request holds one of the
+          threadpool's tokens for its whole DB round trip
+  async : the real GET /api/v1/scans on AsyncSession
+
+The principal cache is disabled in the server so both modes do the same DB
+work per request (user lookup + page query). The server runs in a separate
+uvicorn process; the load generator keeps N requests in flight per level
+and reports throughput and latency, so the ceiling is where req/s stops
+growing while p99 keeps climbing.
+
+    python -m benchmarks.concurrency --levels 1,16,64,256 --duration 5
+    python -m benchmarks.concurrency --database-url postgresql+psycopg://u:p@localhost/bench
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+
+
+def build_app():
+    """uvicorn --factory entry point: the real app plus the legacy sync route."""
+    import anyio
+    from fastapi import Depends, HTTPException
+    from fastapi.security import HTTPAuthorizationCredentials
+    from sqlalchemy.orm import Session
+
+    from app.core.security import _token_subject, bearer_scheme
+    from app.db.deps import get_db
+    from app.db.models import User
+    from app.api.v1.scans import scan_page, user_scans_query
+    from app.main import app
+
+    @app.get("/bench/sync/scans")
+    def list_scans_sync(
+        db: Session = Depends(get_db),
+        credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    ):
+        uid = _token_subject(credentials)
+        user = db.query(User).filter(User.id == uid).first()
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found for token")
+        items = db.scalars(scan_page(user_scans_query(user.id), 20, None)).all()
+        return {"success": True, "count": len(items)}
+
+    inner = app.router.lifespan_context
+    tokens = int(os.environ.get("BENCH_THREADPOOL_TOKENS", "40"))
+
+    @asynccontextmanager
+    async def lifespan(a):
+        anyio.to_thread.current_default_thread_limiter().total_tokens = tokens
+        async with inner(a) as state:
+            yield state
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+def seed(scans: int) -> str:
+    """Create one user with `scans` rows; returns an access token."""
+    import datetime
+
+    from app.core.security import create_access_token, hash_password
+    from app.db.base import SessionLocal, init_db
+    from app.db.models import Scan, User
+
+    init_db()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with SessionLocal() as db:
+        user = User(
+            email=f"bench-{time.time_ns()}@example.com",
+            password_hash=hash_password("x" * 8),
+        )
+        db.add(user)
+        db.flush()
+        db.add_all(
+            Scan(
+                user_id=user.id,
+                image_url="blobs/00/00/bench.jpg",
+                predicted_label="bench",
+                confidence=0.5,
+                model_version="bench",
+                created_at=now - datetime.timedelta(seconds=i),
+            )
+            for i in range(scans)
+        )
+        db.commit()
+        return create_access_token(user.id)
+
+
+async def _load(url: str, token: str, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        headers={"Authorization": f"Bearer {token}"}, limits=limits, timeout=60
+    ) as client:
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(url)
+                    ok = r.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - t0)
+                else:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "rps": n / elapsed,
+        "p50_ms": latencies[n // 2] * 1000 if n else float("nan"),
+        "p99_ms": latencies[min(n - 1, int(n * 0.99))] * 1000 if n else float("nan"),
+        "errors": errors,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(base: str, proc: subprocess.Popen, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit("server exited during startup")
+        try:
+            httpx.get(f"{base}/api/v1/health", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise SystemExit("server did not start")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--database-url", help="scratch database (default: temp SQLite file)")
+    ap.add_argument("--levels", default="1,8,32,64,128,256")
+    ap.add_argument("--duration", type=float, default=5.0, help="seconds per level")
+    ap.add_argument("--scans", type=int, default=200)
+    ap.add_argument("--threadpool-tokens", type=int, default=40)
+    ap.add_argument("--modes", default="sync,async")
+    args = ap.parse_args()
+
+    tmp = None
+    if not args.database_url:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        tmp.close()
+        args.database_url = f"sqlite:///{tmp.name}"
+    env = {
+        **os.environ,
+        "DATABASE_URL": args.database_url,
+        "AUTH_CACHE_TTL_S": "0",
+        "BENCH_THREADPOOL_TOKENS": str(args.threadpool_tokens),
+    }
+    os.environ.update(env)  # seed() imports app settings from the environment
+    token = seed(args.scans)
+
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    cmd = [
+        sys.executable, "-m", "uvicorn", "--factory", "benchmarks.concurrency:build_app",
+        "--port", str(port), "--log-level", "warning", "--no-access-log",
+    ]
+    proc = subprocess.Popen(cmd, env=env)
+    try:
+        _wait_ready(base, proc)
+        paths = {"sync": "/bench/sync/scans", "async": "/api/v1/scans"}
+        print(
+            f"{args.database_url.split(':', 1)[0]}, threadpool={args.threadpool_tokens}, "
+            f"{args.duration:.0f}s per level"
+        )
+        for mode in args.modes.split(","):
+            best = (0.0, 0)
+            for level in map(int, args.levels.split(",")):
+                r = asyncio.run(_load(base + paths[mode], token, level, args.duration))
+                best = max(best, (r["rps"], level))
+                print(
+                    f"{mode:>5}  c={level:<4}  {r['rps']:8.1f} req/s"
+                    f"  p50={r['p50_ms']:8.2f}ms  p99={r['p99_ms']:8.2f}ms"
+                    f"  errors={r['errors']}"
+                )
+            print(f"{mode:>5}  ceiling ~{best[0]:.1f} req/s (reached at c={best[1]})")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""
+Microbenchmarks for the ML and request hot paths, offline with a stub model.
+
+  preprocess_pil[FMT-WxH]     : Image.open on the upload bytes -> preprocess_pil
+  preprocess_engine[FMT-WxH]  : Preprocessor.batch on the same bytes (the live path)
+  topk_indices[N]             : top-5 of N class probabilities
+  public_upload_url[key|path] : stored Scan.image_url -> client URL
+  catalog[hit|miss]           : get_disease_and_treatments, cached / cache cleared
+  jwt_encode, jwt_decode      : create_access_token / decode_token
+  post_scan[new|repeat]       : POST /api/v1/scans through the ASGI app in-process;
+                                new = unseen image (storage write + predict),
+                                repeat = same bytes (prediction cache hit)
+
+The app runs against a throwaway SQLite database and upload directory, with
+the stub model from benchmarks.stub_model (--classes, --hidden and
+--img-size set its size and predict cost). Each case is timed like timeit:
+the loop count is calibrated so one round takes at least --min-time, and
+the median of --repeat rounds is the result.
+
+    python -m benchmarks.micro --save benchmarks/baseline.json
+    python -m benchmarks.micro --compare benchmarks/baseline.json [--threshold 0.15]
+    python -m benchmarks.micro --filter 'preprocess|post_scan'
+
+--compare exits 1 if any case's median is more than --threshold slower
+than in the baseline. Baselines are only comparable on the same machine
+with the same stub size; both are recorded in the file and a mismatch is
+reported.
+"""
+import argparse
+import asyncio
+import datetime
+import io
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.preprocess import make_image
+
+RESOLUTIONS = ((640, 480), (1920, 1080), (4000, 3000))
+FORMATS = ("JPEG", "PNG", "WEBP")
+
+
+def configure(tmp: str):
+    """Point the app at throwaway state; must run before anything imports app settings."""
+    os.environ.update(
+        {
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "UPLOAD_DIR": os.path.join(tmp, "uploads"),
+            "MODEL_BACKEND": "stub",
+            "MODEL_PATH": os.path.join(tmp, "stub_model.npz"),
+            "LABELS_PATH": os.path.join(tmp, "labels.json"),
+            "META_PATH": os.path.join(tmp, "meta.json"),
+            "MODEL_EAGER_LOAD": "false",
+            "INFERENCE_BATCHING": "false",
+            "SCAN_WRITE_BEHIND": "false",
+            "STORAGE_BACKEND": "local",
+            "STORAGE_PUBLIC_BASE_URL": "",
+            # background renders would bleed into whichever case runs next
+            "THUMBNAIL_SIZES": "[]",
+            "SECRET_KEY": "bench",
+        }
+    )
+
+
+def seed(classes: int) -> str:
+    """One user plus a disease with two treatments per stub label; returns the user id."""
+    from app.core.security import hash_password
+    from app.db.base import SessionLocal
+    from app.db.models import Disease, Treatment, User
+    from benchmarks.stub_model import stub_label
+
+    with SessionLocal() as db:
+        user = User(email="bench@example.com", password_hash=hash_password("x" * 8))
+        db.add(user)
+        for i in range(classes):
+            disease = Disease(
+                label=stub_label(i), display_name=f"Class {i}", description="Synthetic class."
+            )
+            db.add(disease)
+            db.flush()
+            db.add_all(
+                Treatment(
+                    disease_id=disease.id,
+                    type=kind,
+                    title=f"{kind} treatment {i}",
+                    instructions="Apply weekly.",
+                    locale="en",
+                )
+                for kind in ("organic", "chemical")
+            )
+        db.commit()
+        return user.id
+
+
+# ---------- cases ----------
+# each builder yields (name, factory); the factory does the setup and returns
+# the callable to time, so cases excluded by --filter cost nothing
+
+
+def preprocess_cases(img_size: int):
+    from app.ml.inference import preprocess_pil
+    from app.ml.preprocess import Preprocessor
+
+    size = (img_size, img_size)
+    for fmt in FORMATS:
+        for w, h in RESOLUTIONS:
+
+            def pil(w=w, h=h, fmt=fmt):
+                data = make_image(w, h, fmt)
+
+                def run():
+                    with Image.open(io.BytesIO(data)) as img:
+                        preprocess_pil(img, size)
+
+                return run
+
+            def engine(w=w, h=h, fmt=fmt):
+                data = make_image(w, h, fmt)
+                pre = Preprocessor(size, max_slots=1)
+
+                def run():
+                    with pre.batch([io.BytesIO(data)]):
+                        pass
+
+                return run
+
+            yield f"preprocess_pil[{fmt}-{w}x{h}]", pil
+            yield f"preprocess_engine[{fmt}-{w}x{h}]", engine
+
+
+def topk_cases(classes: int):
+    from app.ml.inference import topk_indices
+
+    def factory():
+        probs = np.random.default_rng(0).random(classes, dtype=np.float32)
+        probs /= probs.sum()
+        return lambda: topk_indices(probs)
+
+    yield f"topk_indices[{classes}]", factory
+
+
+def make_request():
+    """A bare GET request bound to the app, for helpers that build URLs with url_for."""
+    from starlette.requests import Request
+
+    from app.main import app
+
+    return Request(
+        {
+            "type": "http",
+            "app": app,
+            "router": app.router,
+            "method": "GET",
+            "scheme": "http",
+            "server": ("testserver", 80),
+            "root_path": "",
+            "path": "/api/v1/scans",
+            "query_string": b"",
+            "headers": [(b"host", b"testserver")],
+        }
+    )
+
+
+def url_cases():
+    from app.core.config import settings
+    from app.utils.urls import public_upload_url
+
+    key = "blobs/9f/86/9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08.jpg"
+    stored = {"key": key, "path": os.path.join(settings.UPLOAD_DIR, key)}
+    for kind, value in stored.items():
+
+        def factory(value=value):
+            request = make_request()
+            return lambda: public_upload_url(request, value)
+
+        yield f"public_upload_url[{kind}]", factory
+
+
+def catalog_cases(db):
+    from app.services.catalog import CATALOG_CACHE, get_disease_and_treatments
+    from benchmarks.stub_model import stub_label
+
+    label = stub_label(0)
+
+    def hit():
+        return lambda: get_disease_and_treatments(db, label, "en")
+
+    def miss():
+        def run():
+            CATALOG_CACHE.clear()
+            get_disease_and_treatments(db, label, "en")
+
+        return run
+
+    yield "catalog[hit]", hit
+    yield "catalog[miss]", miss
+
+
+def jwt_cases(user_id: str):
+    from app.core.security import create_access_token, decode_token
+
+    def encode():
+        return lambda: create_access_token(user_id)
+
+    def decode():
+        token = create_access_token(user_id)
+        return lambda: decode_token(token)
+
+    yield "jwt_encode", encode
+    yield "jwt_decode", decode
+
+
+def scan_cases(client, loop):
+    data = make_image(640, 480, "JPEG")
+    counter = iter(range(1 << 62))
+
+    def post(body: bytes):
+        r = loop.run_until_complete(
+            client.post("/api/v1/scans", files={"file": ("leaf.jpg", body, "image/jpeg")})
+        )
+        if r.status_code != 200 or not r.json()["success"]:
+            raise SystemExit(f"POST /api/v1/scans failed: {r.status_code} {r.text[:200]}")
+
+    def new():
+        # bytes after the JPEG end marker are ignored by the decoder but
+        # change the content hash, so every upload is stored and predicted
+        return lambda: post(data + next(counter).to_bytes(8, "big"))
+
+    def repeat():
+        return lambda: post(data)
+
+    yield "post_scan[new]", new
+    yield "post_scan[repeat]", repeat
+
+
+# ---------- timing + baselines ----------
+
+
+def measure(fn, min_time: float, repeat: int) -> dict:
+    fn()  # first call: lazy loads, caches, allocations
+    timer = timeit.Timer(fn)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    rounds = [t / number for t in timer.repeat(repeat, number)]
+    return {
+        "median_us": statistics.median(rounds) * 1e6,
+        "min_us": min(rounds) * 1e6,
+        "stdev_us": statistics.stdev(rounds) * 1e6 if len(rounds) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def _fmt(us: float) -> str:
+    if us >= 1e6:
+        return f"{us / 1e6:8.2f} s"
+    if us >= 1e3:
+        return f"{us / 1e3:8.2f}ms"
+    return f"{us:8.2f}us"
+
+
+def _git_rev() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def environment(args) -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "stub": {"classes": args.classes, "hidden": args.hidden, "img_size": args.img_size},
+        "min_time": args.min_time,
+        "repeat": args.repeat,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Print current vs baseline medians; returns the cases slower than `threshold`."""
+    for key in ("machine", "cpus", "stub"):
+        if baseline["environment"].get(key) != current["environment"].get(key):
+            print(
+                f"warning: baseline {key}={baseline['environment'].get(key)!r}, "
+                f"now {current['environment'].get(key)!r}; timings may not be comparable"
+            )
+    regressed = []
+    print(f"\n{'case':<36} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, r in current["results"].items():
+        b = baseline["results"].get(name)
+        if b is None:
+            print(f"{name:<36} {'-':>10} {_fmt(r['median_us'])} {'new':>8}")
+            continue
+        ratio = r["median_us"] / b["median_us"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        elif ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        print(
+            f"{name:<36} {_fmt(b['median_us'])} {_fmt(r['median_us'])} "
+            f"{(ratio - 1) * 100:+7.1f}%{flag}"
+        )
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print(f"not run (filtered out or removed): {', '.join(missing)}")
+    return regressed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--filter", default="", help="regex over case names")
+    ap.add_argument("--classes", type=int, default=38, help="stub model output classes")
+    ap.add_argument("--hidden", type=int, default=512, help="stub model hidden width")
+    ap.add_argument("--img-size", type=int, default=224)
+    ap.add_argument("--min-time", type=float, default=0.1, help="seconds per round")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--save", metavar="FILE", help="write results as a baseline")
+    ap.add_argument("--compare", metavar="FILE", help="baseline to compare against")
+    ap.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown (0.10 = 10%%)")
+    args = ap.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    selected = re.compile(args.filter)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(tmp)
+        # app imports read settings from the environment set above
+        import httpx
+
+        from app.core.security import create_access_token
+        from app.db.base import SessionLocal, async_engine
+        from app.main import app
+        from benchmarks import stub_model
+
+        stub_model.register()
+        stub_model.write_stub_model(args.classes, args.hidden, args.img_size)
+        user_id = seed(args.classes)
+
+        loop = asyncio.new_event_loop()
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://testserver",
+            headers={"Authorization": f"Bearer {create_access_token(user_id)}"},
+        )
+        results = {}
+        try:
+            with SessionLocal() as db:
+                cases = [
+                    *preprocess_cases(args.img_size),
+                    *topk_cases(args.classes),
+                    *url_cases(),
+                    *catalog_cases(db),
+                    *jwt_cases(user_id),
+                    *scan_cases(client, loop),
+                ]
+                for name, factory in cases:
+                    if not selected.search(name):
+                        continue
+                    r = measure(factory(), args.min_time, args.repeat)
+                    results[name] = r
+                    print(
+                        f"{name:<36} {_fmt(r['median_us'])}  min {_fmt(r['min_us'])}"
+                        f"  ±{_fmt(r['stdev_us']).strip():<9} ({r['number']} x {r['repeat']})"
+                    )
+        finally:
+            loop.run_until_complete(client.aclose())
+            loop.run_until_complete(async_engine.dispose())
+            loop.close()
+
+    current = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git": _git_rev(),
+        "environment": environment(args),
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        print(f"saved {len(results)} results to {args.save}")
+    if baseline is not None:
+        regressed = compare(baseline, current, args.threshold)
+        if regressed:
+            print(f"\n{len(regressed)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Compare the legacy preprocessing path with the zero-reopen engine.
+
+  legacy : write upload to disk -> Image.open(path) -> full decode -> preprocess_pil
+  engine : decode from the in-memory buffer with JPEG draft mode into pooled
+           uint8 buffers -> normalize once per batch
+
+Each mode runs in a fresh subprocess so peak RSS is comparable.
+
+    python -m benchmarks.preprocess --width 4000 --height 3000 --iters 20
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+IMG_SIZE = (224, 224)
+
+
+def make_image(width: int, height: int, fmt: str) -> bytes:
+    rng = np.random.default_rng(0)
+    # smooth gradient + noise compresses like a photo rather than pure noise
+    yy, xx = np.mgrid[0:height, 0:width]
+    base = np.stack([xx * 255 // width, yy * 255 // height, (xx + yy) % 256], -1)
+    noise = rng.integers(0, 24, size=(height, width, 3))
+    arr = np.clip(base + noise, 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, format=fmt, quality=90)
+    return buf.getvalue()
+
+
+def run_legacy(data: bytes, iters: int, batch: int) -> list[float]:
+    from app.ml.inference import preprocess_pil
+
+    times = []
+    with tempfile.TemporaryDirectory() as d:
+        for _ in range(iters):
+            t0 = time.perf_counter()
+            xs = []
+            for j in range(batch):
+                path = os.path.join(d, f"{j}.img")
+                with open(path, "wb") as f:
+                    f.write(data)
+                with Image.open(path) as pil:
+                    xs.append(preprocess_pil(pil, IMG_SIZE))
+            np.concatenate(xs)
+            times.append((time.perf_counter() - t0) / batch)
+    return times
+
+
+def run_engine(data: bytes, iters: int, batch: int) -> list[float]:
+    from app.ml.preprocess import Preprocessor
+
+    pre = Preprocessor(IMG_SIZE, max_slots=1)
+    srcs = [io.BytesIO(data) for _ in range(batch)]
+    times = []
+    for _ in range(iters):
+        t0 = time.perf_counter()
+        with pre.batch(srcs) as x:
+            x.sum()
+        times.append((time.perf_counter() - t0) / batch)
+    return times
+
+
+def _child(args):
+    with open(args.input, "rb") as f:
+        data = f.read()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    fn = run_legacy if args.mode == "legacy" else run_engine
+    times = fn(data, args.iters, args.batch)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    times.sort()
+    print(
+        json.dumps(
+            {
+                "mode": args.mode,
+                "format": args.format,
+                "resolution": f"{args.width}x{args.height}",
+                "batch": args.batch,
+                "p50_ms": times[len(times) // 2] * 1000,
+                "p99_ms": times[min(len(times) - 1, int(len(times) * 0.99))] * 1000,
+                # ru_maxrss is KiB on Linux
+                "peak_rss_mb": rss / 1024,
+                "rss_growth_mb": (rss - rss_before) / 1024,
+            }
+        )
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--width", type=int, default=4000)
+    ap.add_argument("--height", type=int, default=3000)
+    ap.add_argument("--format", default="JPEG", choices=["JPEG", "PNG", "WEBP"])
+    ap.add_argument("--iters", type=int, default=20)
+    ap.add_argument("--batch", type=int, default=1)
+    ap.add_argument(
+        "--mode", choices=["legacy", "engine", "generate"], help=argparse.SUPPRESS
+    )
+    ap.add_argument("--input", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.mode == "generate":
+        with open(args.input, "wb") as f:
+            f.write(make_image(args.width, args.height, args.format))
+        return
+    if args.mode:
+        return _child(args)
+
+    # generate the sample in its own process: ru_maxrss survives fork+exec,
+    # so doing it here would inflate the children's peak RSS
+    with tempfile.NamedTemporaryFile(suffix=".img", delete=False) as f:
+        pass
+    try:
+        for mode in ("generate", "legacy", "engine"):
+            cmd = [sys.executable, "-m", "benchmarks.preprocess", "--mode", mode]
+            cmd += ["--input", f.name, "--format", args.format]
+            cmd += ["--width", str(args.width), "--height", str(args.height)]
+            cmd += ["--iters", str(args.iters), "--batch", str(args.batch)]
+            out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+            if mode != "generate":
+                _report(json.loads(out))
+    finally:
+        os.unlink(f.name)
+
+
+def _report(r: dict):
+    print(
+        f"{r['mode']:>7}  {r['format']:<4} {r['resolution']:>10}  batch={r['batch']:<3}"
+        f" p50={r['p50_ms']:8.2f}ms  p99={r['p99_ms']:8.2f}ms"
+        f"  peak_rss={r['peak_rss_mb']:7.1f}MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
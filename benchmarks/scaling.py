@@ -0,0 +1,381 @@
+"""
+Database scaling harness: the real scan, admin and catalog queries at growing data sizes.
+
+For each --sizes step the database is topped up with synthetic rows, then
+the route handlers (list_scans, get_scan, admin list_diseases /
+list_treatments) and the catalog lookup are called directly on an
+AsyncSession, and p50/p99 plus the plan of every statement each case ran
+are reported.
+
+Data shape:
+  users      : scans / --scans-per-user (10M scans -> 1M users)
+  scans      : user drawn Zipf-style by rank (--skew), so a few heavy users
+               own long histories and most have a handful; one of --labels
+               disease labels, also skewed; created_at spread over a year
+  catalog    : --diseases diseases and --treatments treatments in three
+               locales (benchmarks.catalog_search text), loaded once
+
+Request inputs follow the same skew: "any user" is drawn like a scan's
+owner, so heavy users are hit about as often as real traffic hits them.
+
+Ids are derived from the row number, so loading resumes where it stopped:
+rerun against the same --database-url and only missing rows are inserted.
+
+    python -m benchmarks.scaling --sizes 100k,1m,10m
+    python -m benchmarks.scaling --database-url postgresql://u:p@localhost/bench --sizes 1m,10m
+"""
+import argparse
+import asyncio
+import datetime
+import hashlib
+import os
+import random
+import tempfile
+import time
+import uuid
+
+import numpy as np
+from sqlalchemy import event, func, insert, select, text
+
+from benchmarks.catalog_search import LOCALES, TERMS
+
+CHUNK = 20_000
+
+
+def _id(kind: str, n: int) -> str:
+    # stable per row number (resumable loads) but spread like uuid4 in the indexes
+    return str(uuid.UUID(bytes=hashlib.md5(f"{kind}:{n}".encode()).digest(), version=4))
+
+
+def _size(s: str) -> int:
+    s = s.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(s[-1])
+    return int(float(s[:-1]) * scale) if scale else int(s)
+
+
+def _zipf_cdf(n: int, skew: float) -> np.ndarray:
+    w = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** skew
+    cdf = np.cumsum(w)
+    return cdf / cdf[-1]
+
+
+# ---------- loading ----------
+
+
+def _count(engine, table) -> int:
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(table))
+
+
+def load_catalog(engine, n_diseases: int, n_treatments: int) -> float:
+    from app.db.models import Disease
+    from app.services import search
+    from benchmarks.catalog_search import populate
+
+    if _count(engine, Disease.__table__):
+        return 0.0
+    t0 = time.perf_counter()
+    populate(engine, n_diseases, n_treatments)
+    if engine.dialect.name == "postgresql":
+        search.create_search_indexes(engine)
+    search.ensure_search_index(engine)
+    return time.perf_counter() - t0
+
+
+def load_users(engine, stop: int):
+    from app.core.security import hash_password
+    from app.db.models import User
+
+    start = _count(engine, User.__table__)
+    if start >= stop:
+        return
+    password_hash = hash_password("x" * 8)
+    for a in range(start, stop, CHUNK):
+        with engine.begin() as conn:
+            conn.execute(
+                insert(User),
+                [
+                    {
+                        "id": _id("user", n),
+                        "email": f"user{n}@example.com",
+                        "password_hash": password_hash,
+                    }
+                    for n in range(a, min(a + CHUNK, stop))
+                ],
+            )
+
+
+def load_scans(engine, stop: int, n_users: int, labels: list[str], skew: float):
+    from app.db.models import Scan
+
+    start = _count(engine, Scan.__table__)
+    if start < stop:
+        # random-order inserts into the secondary index dominate a bulk load;
+        # building it once afterwards is several times faster
+        for index in Scan.__table__.indexes:
+            index.drop(engine, checkfirst=True)
+    users = _zipf_cdf(n_users, skew)
+    label_cdf = _zipf_cdf(len(labels), 1.0)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    year_us = 365 * 86400 * 10**6
+    for a in range(start, stop, CHUNK):
+        n = min(CHUNK, stop - a)
+        rng = np.random.default_rng(a)  # per chunk, so a resumed load draws the same rows
+        owner = np.searchsorted(users, rng.random(n))
+        label = np.searchsorted(label_cdf, rng.random((n, 5)))
+        age = rng.integers(0, year_us, n)
+        conf = rng.uniform(0.35, 0.99, n)
+        rows = []
+        for i in range(n):
+            digest = hashlib.sha256(b"%d" % (a + i)).hexdigest()
+            c = float(conf[i])
+            top = [labels[j] for j in label[i]]
+            rows.append(
+                {
+                    "id": _id("scan", a + i),
+                    "user_id": _id("user", int(owner[i])),
+                    "image_url": f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg",
+                    "predicted_label": top[0],
+                    "confidence": c,
+                    "top_k": [
+                        {"label": l, "confidence": c / (k + 1)} for k, l in enumerate(top)
+                    ],
+                    "model_version": "plant_disease_model.keras@2026-01-01T00:00:00",
+                    "created_at": now - datetime.timedelta(microseconds=int(age[i])),
+                }
+            )
+        with engine.begin() as conn:
+            conn.execute(insert(Scan), rows)
+    for index in Scan.__table__.indexes:
+        index.create(engine, checkfirst=True)
+
+
+def analyze(engine):
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+# ---------- cases ----------
+
+
+class StatementLog:
+    """Records the statements an engine runs while `capturing` is set."""
+
+    def __init__(self, sync_engine):
+        self.capturing = False
+        self.statements: list[tuple[str, object]] = []
+        event.listen(sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.capturing:
+            self.statements.append((statement, parameters))
+
+
+async def explain(conn, statement: str, parameters, analyze: bool) -> list[str]:
+    if conn.dialect.name == "sqlite":
+        rows = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        # (id, parent, notused, detail); indent by depth in the plan tree
+        depth, lines = {0: -1}, []
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, -1) + 1
+            lines.append("  " * depth[node] + detail)
+        return lines
+    prefix = "EXPLAIN (ANALYZE, BUFFERS)" if analyze else "EXPLAIN"
+    rows = await conn.exec_driver_sql(f"{prefix} {statement}", parameters)
+    return [r[0] for r in rows]
+
+
+async def build_cases(engine, n_scans: int, n_users: int, skew: float, rng: random.Random):
+    """(name, call(db)) pairs; each call awaits one handler as a request would."""
+    from app.api.v1.admin import list_diseases, list_treatments
+    from app.api.v1.scans import get_scan, list_scans
+    from app.core.principals import Principal
+    from app.db.base import AsyncSessionLocal
+    from app.db.models import Disease, Scan
+    from app.services.catalog import CATALOG_CACHE, get_disease_and_treatments
+    from benchmarks.micro import make_request
+
+    request = make_request()
+    users = _zipf_cdf(n_users, skew)
+
+    def principal(user_id: str) -> Principal:
+        return Principal(id=user_id, email="", full_name=None, is_admin=False)
+
+    def any_user() -> Principal:
+        return principal(_id("user", int(np.searchsorted(users, rng.random()))))
+
+    top_user = principal(_id("user", 0))
+
+    def page(user, cursor=None, page=None, label=None, include_total=False):
+        return lambda db: list_scans(
+            request, cursor=cursor, page=page, page_size=20, label=label,
+            include_total=include_total, db=db, user=user,
+        )
+
+    async with engine.connect() as conn:
+        owners = dict(
+            (
+                await conn.execute(
+                    select(Scan.id, Scan.user_id).where(
+                        Scan.id.in_([_id("scan", rng.randrange(n_scans)) for _ in range(500)])
+                    )
+                )
+            ).all()
+        )
+        labels = (await conn.scalars(select(Disease.label).limit(200))).all()
+        top_label = await conn.scalar(
+            select(Scan.predicted_label).where(Scan.user_id == top_user.id).limit(1)
+        )
+    scan_ids = list(owners)
+
+    # cursor of the top user's 10th page, walked once through the handler
+    cursor = None
+    async with AsyncSessionLocal() as db:
+        for _ in range(9):
+            cursor = (await page(top_user, cursor)(db))["meta"]["next_cursor"]
+
+    def one_scan(db):
+        scan_id = rng.choice(scan_ids)
+        return get_scan(scan_id, request, locale="en", db=db, user=principal(owners[scan_id]))
+
+    async def catalog(db):
+        CATALOG_CACHE.clear()  # measure the database, not the cache
+        return await db.run_sync(
+            get_disease_and_treatments, rng.choice(labels), rng.choice(LOCALES)
+        )
+
+    def admin_treatments(db, disease_label=None, locale=None, search=None):
+        return list_treatments(
+            page=1, page_size=50, disease_label=disease_label, locale=locale, type=None,
+            search=search, _="", db=db,
+        )
+
+    return [
+        ("list_scans[any user]", lambda db: page(any_user())(db)),
+        ("list_scans[top user]", page(top_user)),
+        ("list_scans[top user, page 10]", page(top_user, cursor)),
+        ("list_scans[top user, label]", page(top_user, label=top_label)),
+        ("list_scans[any user, total]", lambda db: page(any_user(), include_total=True)(db)),
+        ("list_scans[top user, offset p50]", page(top_user, page=50)),
+        ("get_scan", one_scan),
+        ("catalog lookup (uncached)", catalog),
+        (
+            "admin diseases[p1]",
+            lambda db: list_diseases(page=1, page_size=50, search=None, _="", db=db),
+        ),
+        (
+            "admin diseases[p100]",
+            lambda db: list_diseases(page=100, page_size=50, search=None, _="", db=db),
+        ),
+        ("admin treatments[p1]", admin_treatments),
+        (
+            "admin treatments[label+locale]",
+            lambda db: admin_treatments(db, disease_label=rng.choice(labels), locale="en"),
+        ),
+        ("admin treatments[search]", lambda db: admin_treatments(db, search=rng.choice(TERMS))),
+    ]
+
+
+async def run_cases(cases, log: StatementLog, iters: int, plans: bool, explain_analyze: bool):
+    from app.db.base import AsyncSessionLocal, async_engine
+
+    for name, call in cases:
+        log.statements.clear()
+        log.capturing = True
+        async with AsyncSessionLocal() as db:
+            await call(db)  # warm-up, and the statements to explain
+        log.capturing = False
+        times = []
+        for _ in range(iters):
+            t0 = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                await call(db)
+            times.append(time.perf_counter() - t0)
+        times.sort()
+        p50 = times[len(times) // 2] * 1000
+        p99 = times[min(len(times) - 1, int(len(times) * 0.99))] * 1000
+        print(f"  {name:<34} p50={p50:8.2f}ms  p99={p99:8.2f}ms")
+        if not plans:
+            continue
+        seen = set()
+        async with async_engine.connect() as conn:
+            for statement, parameters in log.statements:
+                if statement in seen or not statement.lstrip().upper().startswith("SELECT"):
+                    continue
+                seen.add(statement)
+                print(f"      {' '.join(statement.split())[:110]}")
+                for line in await explain(conn, statement, parameters, explain_analyze):
+                    print(f"        {line}")
+
+
+async def measure(args, n_scans: int, n_users: int):
+    from app.db.base import async_engine
+
+    log = StatementLog(async_engine.sync_engine)
+    cases = await build_cases(
+        async_engine, n_scans, n_users, args.skew, random.Random(args.seed)
+    )
+    try:
+        await run_cases(cases, log, args.iters, not args.no_plans, args.explain_analyze)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", log._record)
+        # pooled connections belong to this event loop; the next size gets a new one
+        await async_engine.dispose()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--database-url", help="scratch database (default: temp SQLite file)")
+    ap.add_argument("--sizes", default="100k,1m", help="scan counts, e.g. 100k,1m,10m")
+    ap.add_argument("--scans-per-user", type=float, default=10.0)
+    ap.add_argument("--skew", type=float, default=0.8, help="Zipf exponent of scans per user")
+    ap.add_argument("--labels", type=int, default=38, help="distinct predicted labels")
+    ap.add_argument("--diseases", type=int, default=2_000)
+    ap.add_argument("--treatments", type=int, default=100_000)
+    ap.add_argument("--iters", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=0, help="request input sampling")
+    ap.add_argument("--no-plans", action="store_true")
+    ap.add_argument(
+        "--explain-analyze", action="store_true", help="Postgres: EXPLAIN (ANALYZE, BUFFERS)"
+    )
+    args = ap.parse_args()
+
+    tmp = None
+    if not args.database_url:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        tmp.close()
+        args.database_url = f"sqlite:///{tmp.name}"
+    os.environ["DATABASE_URL"] = args.database_url  # app settings read the environment
+    # app.main creates the schema on import
+    from app.db.base import async_engine, engine
+    from app.db.models import Disease
+    from app.main import app  # noqa: F401
+
+    try:
+        t = load_catalog(engine, args.diseases, args.treatments)
+        if t:
+            print(f"catalog: {args.diseases} diseases + {args.treatments} treatments in {t:.1f}s")
+        with engine.connect() as conn:
+            labels = conn.scalars(
+                select(Disease.label).order_by(Disease.label).limit(args.labels)
+            ).all()
+        for n_scans in map(_size, args.sizes.split(",")):
+            n_users = max(1, int(n_scans / args.scans_per_user))
+            t0 = time.perf_counter()
+            load_users(engine, n_users)
+            load_scans(engine, n_scans, n_users, labels, args.skew)
+            analyze(engine)
+            print(
+                f"\n{engine.dialect.name}: {n_scans:,} scans, {n_users:,} users "
+                f"(loaded in {time.perf_counter() - t0:.1f}s)"
+            )
+            asyncio.run(measure(args, n_scans, n_users))
+    finally:
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+A stand-in model for benchmarks: no TensorFlow, no model file download.
+
+The stub average-pools the input into a GRID x GRID x 3 grid and runs it
+through a two-layer MLP (ReLU, softmax) whose width and class count are
+configurable, so predict cost can be dialled from negligible to
+CNN-like. Weights are random with a fixed seed and live in a .npz at
+MODEL_PATH, so the registry's version/mtime handling and the prediction
+cache behave as they do with a real model.
+
+Importing this module imports app settings: set MODEL_BACKEND=stub and
+the model paths in the environment first.
+"""
+import json
+
+import numpy as np
+
+from app.ml.backends.base import InferenceBackend, InputSpec
+
+GRID = 16
+
+
+class StubBackend(InferenceBackend):
+    name = "stub"
+
+    def load(self) -> None:
+        with np.load(self.path) as f:
+            self._w1, self._w2 = f["w1"], f["w2"]
+            self._size = int(f["img_size"])
+
+    def predict_batch(self, x: np.ndarray) -> np.ndarray:
+        n, h, w, c = x.shape
+        cell_h, cell_w = h // GRID, w // GRID
+        x = x[:, : cell_h * GRID, : cell_w * GRID]
+        feats = x.reshape(n, GRID, cell_h, GRID, cell_w, c).mean(axis=(2, 4)).reshape(n, -1)
+        logits = np.maximum(feats @ self._w1, 0) @ self._w2
+        logits -= logits.max(axis=1, keepdims=True)
+        e = np.exp(logits)
+        return e / e.sum(axis=1, keepdims=True)
+
+    def input_spec(self) -> InputSpec:
+        return InputSpec(self._size, self._size)
+
+
+def write_stub_model(classes: int, hidden: int, img_size: int):
+    """Write weights, labels.json and meta.json where MODEL_PATH/LABELS_PATH/META_PATH point."""
+    from app.core.config import settings
+
+    rng = np.random.default_rng(0)
+    with open(settings.MODEL_PATH, "wb") as f:
+        np.savez(
+            f,
+            w1=rng.standard_normal((GRID * GRID * 3, hidden), dtype=np.float32),
+            w2=rng.standard_normal((hidden, classes), dtype=np.float32),
+            img_size=img_size,
+        )
+    with open(settings.LABELS_PATH, "w") as f:
+        json.dump({str(i): stub_label(i) for i in range(classes)}, f)
+    with open(settings.META_PATH, "w") as f:
+        json.dump({"img_size": img_size}, f)
+
+
+def stub_label(i: int) -> str:
+    return f"Stub___class_{i:04d}"
+
+
+def register():
+    """Make MODEL_BACKEND=stub resolvable by app.ml.backends.create_backend."""
+    from app.ml.backends import BACKENDS
+
+    BACKENDS[StubBackend.name] = StubBackend
@@ -0,0 +1,59 @@
+"""
+Every test session runs against throwaway state: a temp SQLite database,
+upload directory and scan spool, and the benchmarks' stub model instead of
+the Keras one, set in the environment before anything imports app
+settings (app.core.config reads them at import).
+"""
+import os
+import tempfile
+
+TMP = tempfile.mkdtemp(prefix="plant-tests-")
+
+os.environ.update(
+    {
+        "DATABASE_URL": f"sqlite:///{os.path.join(TMP, 'test.db')}",
+        "UPLOAD_DIR": os.path.join(TMP, "uploads"),
+        "SCAN_SPOOL_DIR": os.path.join(TMP, "scan_spool"),
+        "MODEL_BACKEND": "stub",
+        "MODEL_PATH": os.path.join(TMP, "stub_model.npz"),
+        "LABELS_PATH": os.path.join(TMP, "labels.json"),
+        "META_PATH": os.path.join(TMP, "meta.json"),
+        "MODEL_DIR": TMP,
+        "MODEL_EAGER_LOAD": "false",
+        "INFERENCE_BATCHING": "false",
+        "SCAN_WRITE_BEHIND": "false",
+        "STORAGE_BACKEND": "local",
+        "STORAGE_PUBLIC_BASE_URL": "",
+        "THUMBNAIL_SIZES": "[]",
+        "SECRET_KEY": "test",
+        "BCRYPT_ROUNDS": "4",
+    }
+)
+
+import pytest  # noqa: E402
+
+from benchmarks.stub_model import register, write_stub_model  # noqa: E402
+
+write_stub_model(classes=8, hidden=16, img_size=64)
+register()
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Create the schema once; tests that touch tables clean up after themselves."""
+    from app.db.base import init_db
+
+    init_db()
+
+
+@pytest.fixture
+def db(database):
+    """A session on an empty schema; every table is reset after the test."""
+    from app.db.base import Base, SessionLocal, _seed_state_rows, engine
+
+    with SessionLocal() as session:
+        yield session
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    _seed_state_rows()
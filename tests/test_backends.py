@@ -0,0 +1,105 @@
+import json
+import os
+import re
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.ml.backends import BACKENDS, InputSpec, create_backend
+from benchmarks.stub_model import StubBackend
+
+# what tests/conftest.py wrote for the stub model
+with open(settings.LABELS_PATH) as f:
+    STUB_CLASSES = len(json.load(f))
+with open(settings.META_PATH) as f:
+    STUB_IMG_SIZE = json.load(f)["img_size"]
+
+
+@pytest.fixture
+def stub():
+    backend = create_backend("stub", settings.MODEL_PATH)
+    backend.load()
+    yield backend
+    backend.close()
+
+
+def test_create_backend_resolves_registered_names():
+    assert isinstance(create_backend("stub", "x"), StubBackend)
+    assert set(BACKENDS) >= {"keras", "onnx", "remote", "stub"}
+
+
+def test_create_backend_rejects_unknown_names():
+    with pytest.raises(RuntimeError, match="Unknown MODEL_BACKEND 'nope'"):
+        create_backend("nope", "x")
+
+
+def test_input_spec(stub):
+    assert stub.input_spec() == InputSpec(STUB_IMG_SIZE, STUB_IMG_SIZE, 3, "float32")
+
+
+@pytest.mark.parametrize("n", [1, 3, 8])
+def test_predict_batch_shape(stub, n):
+    spec = stub.input_spec()
+    x = np.random.default_rng(n).random((n, spec.height, spec.width, spec.channels), np.float32)
+    probs = stub.predict_batch(x)
+    assert probs.shape == (n, STUB_CLASSES)
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0, rtol=1e-5)
+
+
+def test_predict_batch_rows_are_independent(stub):
+    x = np.random.default_rng(0).random((4, STUB_IMG_SIZE, STUB_IMG_SIZE, 3), np.float32)
+    np.testing.assert_allclose(stub.predict_batch(x)[2:3], stub.predict_batch(x[2:3]), atol=1e-6)
+
+
+def test_version_tracks_file_name_and_mtime(stub):
+    version = stub.version()
+    assert re.fullmatch(rf"{re.escape(os.path.basename(settings.MODEL_PATH))}@\S+", version)
+    st = os.stat(settings.MODEL_PATH)
+    try:
+        os.utime(settings.MODEL_PATH, (st.st_atime, st.st_mtime + 60))
+        assert stub.version() != version
+    finally:
+        os.utime(settings.MODEL_PATH, (st.st_atime, st.st_mtime))
+
+
+def test_keras_and_onnx_agree(tmp_path):
+    tf = pytest.importorskip("tensorflow")
+    pytest.importorskip("tf2onnx")
+    pytest.importorskip("onnxruntime")
+    from app.scripts.export_onnx import export
+
+    tf.keras.utils.set_random_seed(0)
+    model = tf.keras.Sequential(
+        [
+            tf.keras.Input((32, 32, 3)),
+            tf.keras.layers.Conv2D(8, 3, activation="relu"),
+            tf.keras.layers.GlobalAveragePooling2D(),
+            tf.keras.layers.Dense(5, activation="softmax"),
+        ]
+    )
+    src = str(tmp_path / "model.keras")
+    model.save(src)
+    keras = create_backend("keras", src)
+    onnx = create_backend("onnx", export(src, str(tmp_path / "model.onnx")))
+    keras.load()
+    onnx.load()
+
+    assert keras.input_spec() == onnx.input_spec() == InputSpec(32, 32, 3)
+    for n in (1, 4):
+        x = np.random.default_rng(n).random((n, 32, 32, 3), np.float32)
+        np.testing.assert_allclose(onnx.predict_batch(x), keras.predict_batch(x), atol=1e-5)
+
+
+def test_warmup_covers_every_batch_route_size(monkeypatch):
+    from app.ml.loader import warmup_batch_sizes
+
+    monkeypatch.setattr(settings, "MODEL_WARMUP_BATCH_SIZES", [])
+    monkeypatch.setattr(settings, "MAX_BATCH_FILES", 12)
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING", True)
+    monkeypatch.setattr(settings, "INFERENCE_MAX_BATCH", 4)
+    assert warmup_batch_sizes() == list(range(1, 13))
+    monkeypatch.setattr(settings, "INFERENCE_MAX_BATCH", 16)
+    assert warmup_batch_sizes() == list(range(1, 17))
+    monkeypatch.setattr(settings, "MODEL_WARMUP_BATCH_SIZES", [8, 1, 8])
+    assert warmup_batch_sizes() == [1, 8]
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.ml.batching import BatchScheduler
+
+
+class StubModel:
+    """Records each batch; row i of the output is the input row's first pixel."""
+
+    def __init__(self, error: Exception | None = None):
+        self.batches: list[int] = []
+        self.error = error
+        self.lock = threading.Lock()
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        with self.lock:
+            self.batches.append(len(x))
+        if self.error is not None:
+            raise self.error
+        return x.reshape(len(x), -1)[:, :1]
+
+
+def rows(*values: float) -> np.ndarray:
+    return np.array(values, dtype=np.float32).reshape(-1, 1, 1, 1)
+
+
+@pytest.fixture
+def make_scheduler():
+    created = []
+
+    def make(model, **kwargs):
+        s = BatchScheduler(model, **kwargs)
+        created.append(s)
+        return s
+
+    yield make
+    for s in created:
+        s.close()
+
+
+def test_coalesces_up_to_max_batch(make_scheduler):
+    model = StubModel()
+    s = make_scheduler(model, max_batch_size=4, max_wait_ms=500)
+    futures = [s.submit(rows(i)) for i in range(4)]
+    results = [f.result(timeout=2) for f in futures]
+    assert model.batches == [4]
+    assert [r.tolist() for r in results] == [[[0.0]], [[1.0]], [[2.0]], [[3.0]]]
+
+
+def test_full_batch_does_not_wait_for_the_deadline(make_scheduler):
+    model = StubModel()
+    s = make_scheduler(model, max_batch_size=2, max_wait_ms=5000)
+    t0 = time.perf_counter()
+    futures = [s.submit(rows(i)) for i in range(2)]
+    for f in futures:
+        f.result(timeout=2)
+    assert time.perf_counter() - t0 < 1
+
+
+def test_flushes_partial_batch_on_timeout(make_scheduler):
+    model = StubModel()
+    s = make_scheduler(model, max_batch_size=8, max_wait_ms=20)
+    t0 = time.perf_counter()
+    out = s.predict(rows(7), timeout=2)
+    elapsed = time.perf_counter() - t0
+    assert model.batches == [1]
+    assert out.tolist() == [[7.0]]
+    assert 0.015 <= elapsed < 1
+
+
+def test_exception_reaches_every_future_in_the_batch(make_scheduler):
+    error = ValueError("model exploded")
+    s = make_scheduler(StubModel(error), max_batch_size=3, max_wait_ms=500)
+    futures = [s.submit(rows(i)) for i in range(3)]
+    for f in futures:
+        with pytest.raises(ValueError, match="model exploded"):
+            f.result(timeout=2)
+
+
+def test_scheduler_keeps_serving_after_a_failed_batch(make_scheduler):
+    model = StubModel(RuntimeError("once"))
+    s = make_scheduler(model, max_batch_size=1, max_wait_ms=0)
+    with pytest.raises(RuntimeError):
+        s.predict(rows(1), timeout=2)
+    model.error = None
+    assert s.predict(rows(2), timeout=2).tolist() == [[2.0]]
+
+
+def test_overflow_is_carried_into_the_next_batch(make_scheduler):
+    model = StubModel()
+    s = make_scheduler(model, max_batch_size=4, max_wait_ms=500)
+    first = s.submit(rows(1, 2, 3))
+    second = s.submit(rows(4, 5))  # 3 + 2 > 4: waits in _pending
+    assert first.result(timeout=2).tolist() == [[1.0], [2.0], [3.0]]
+    assert second.result(timeout=2).tolist() == [[4.0], [5.0]]
+    assert model.batches == [3, 2]
+
+
+def test_oversized_request_runs_alone(make_scheduler):
+    model = StubModel()
+    s = make_scheduler(model, max_batch_size=2, max_wait_ms=50)
+    out = s.predict(rows(1, 2, 3), timeout=2)
+    assert out.tolist() == [[1.0], [2.0], [3.0]]
+    assert model.batches == [3]
+
+
+def test_single_image_is_expanded_to_a_batch(make_scheduler):
+    model = StubModel()
+    s = make_scheduler(model, max_batch_size=4, max_wait_ms=0)
+    out = s.predict(np.full((1, 1, 1), 9.0, dtype=np.float32), timeout=2)
+    assert out.shape == (1, 1)
@@ -0,0 +1,35 @@
+import threading
+
+from app.db.base import SessionLocal, _seed_state_rows
+from app.services.catalog import bump_catalog_version, read_catalog_version
+
+
+def test_first_writes_race_without_integrity_errors(db):
+    start = read_catalog_version(db)
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def write():
+        with SessionLocal() as session:
+            barrier.wait()
+            try:
+                bump_catalog_version(session)
+                session.commit()
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    db.expire_all()
+    assert read_catalog_version(db) == start + 8
+
+
+def test_seeding_is_idempotent(db):
+    bump_catalog_version(db)
+    db.commit()
+    _seed_state_rows()
+    assert read_catalog_version(db) == 1
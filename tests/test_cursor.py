@@ -0,0 +1,110 @@
+import datetime
+import uuid
+
+import pytest
+from sqlalchemy import insert, text
+
+from app.api.v1.scans import scan_page, user_scans_query
+from app.db.models import Scan, User
+from app.scripts.normalize_scan_timestamps import normalize
+from app.utils.cursor import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    at = datetime.datetime(2025, 9, 14, 10, 0, 0, 123456, tzinfo=datetime.timezone.utc)
+    cursor = encode_cursor(at, "abc")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (at, "abc")
+
+
+def test_cursor_round_trip_naive_and_whole_second():
+    at = datetime.datetime(2025, 9, 14, 10, 0, 0)
+    assert decode_cursor(encode_cursor(at, "x")) == (at, "x")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["", "not-a-cursor", "W10", "WyJub3QgYSBkYXRlIiwiYSJd", "eyJhIjoxfQ"],
+)
+def test_decode_rejects_foreign_cursors(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def make_user(db) -> str:
+    user = User(email=f"{uuid.uuid4()}@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+def add_legacy_scans(db, user_id: str, created_at: list[str]):
+    # what the CURRENT_TIMESTAMP server default used to store
+    for i, at in enumerate(created_at):
+        db.execute(
+            text(
+                "INSERT INTO scans (id, user_id, image_url, predicted_label, confidence, created_at)"
+                " VALUES (:id, :user_id, 'k', 'x', 0.5, :at)"
+            ),
+            {"id": f"legacy-{i}", "user_id": user_id, "at": at},
+        )
+    db.commit()
+
+
+def walk(db, user_id: str, page_size: int) -> list[str]:
+    seen, position = [], None
+    for _ in range(100):
+        rows = db.scalars(scan_page(user_scans_query(user_id), page_size + 1, position)).all()
+        seen += [s.id for s in rows[:page_size]]
+        if len(rows) <= page_size:
+            return seen
+        last = rows[page_size - 1]
+        position = decode_cursor(encode_cursor(last.created_at, last.id))
+    raise AssertionError(f"cursor did not terminate: {seen[:20]}")
+
+
+def test_pagination_over_normalised_legacy_rows(db):
+    user_id = make_user(db)
+    add_legacy_scans(db, user_id, ["2025-09-14 10:00:00"] * 3 + ["2025-09-14 09:00:00"] * 2)
+    base = datetime.datetime(2025, 9, 14, 10, 0, 0)
+    for i, delta in enumerate([0, 500_000, -1]):
+        db.add(
+            Scan(
+                id=f"orm-{i}",
+                user_id=user_id,
+                image_url="k",
+                predicted_label="x",
+                confidence=0.5,
+                created_at=base + datetime.timedelta(microseconds=delta),
+            )
+        )
+    db.commit()
+
+    assert normalize(batch=2) == {"legacy": 5, "rewritten": 5}
+    assert normalize(batch=2) == {"legacy": 0, "rewritten": 0}
+
+    expected = [
+        "orm-1",  # 10:00:00.5
+        "orm-0",  # 10:00:00.000000, ties broken by id desc
+        "legacy-2",
+        "legacy-1",
+        "legacy-0",
+        "orm-2",  # 09:59:59.999999
+        "legacy-4",
+        "legacy-3",
+    ]
+    for page_size in (1, 2, 3, 8):
+        assert walk(db, user_id, page_size) == expected
+
+
+def test_server_default_matches_orm_format(db):
+    user_id = make_user(db)
+    db.execute(
+        insert(Scan).values(
+            id="core", user_id=user_id, image_url="k", predicted_label="x", confidence=0.5
+        )
+    )
+    db.commit()
+    stored = db.execute(text("SELECT created_at FROM scans WHERE id = 'core'")).scalar_one()
+    assert len(stored) == len("2025-09-14 10:00:00.000000")
+    assert normalize(batch=10)["legacy"] == 0
@@ -0,0 +1,29 @@
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.main import app
+
+
+def get(path: str) -> httpx.Response:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path)
+
+    return asyncio.run(run())
+
+
+def test_lazy_mode_is_ready_without_a_loaded_model(database):
+    r = get("/api/v1/health/ready")
+    assert r.status_code == 200
+    assert r.json()["payload"]["database"] is True
+    assert r.json()["payload"]["model_loaded"] is False
+
+
+def test_eager_mode_waits_for_the_model(database, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_EAGER_LOAD", True)
+    r = get("/api/v1/health/ready")
+    assert r.status_code == 503
+    assert r.json()["success"] is False
@@ -0,0 +1,105 @@
+import asyncio
+import io
+import uuid
+from pathlib import Path
+
+import httpx
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.models import User
+from app.main import app
+
+
+@pytest.fixture
+def auth(db) -> dict:
+    user = User(email=f"{uuid.uuid4()}@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    return {"Authorization": f"Bearer {create_access_token(user.id)}"}
+
+
+@pytest.fixture
+def one_mb(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_MB", 1)
+
+
+def post(path: str, headers: dict, **kwargs) -> httpx.Response:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(f"/api/v1{path}", headers=headers, **kwargs)
+
+    return asyncio.run(run())
+
+
+def jpeg(padding: int = 0) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 64), "green").save(buf, "JPEG")
+    return buf.getvalue() + b"\0" * padding
+
+
+def leftover_uploads() -> list[Path]:
+    return [p for p in Path(settings.UPLOAD_DIR).rglob("*.part")]
+
+
+def test_accepts_a_sniffed_image(auth):
+    r = post("/scans", auth, files={"file": ("leaf.txt", jpeg(), "text/plain")})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["success"] is True
+    assert body["payload"]["scan"]["image_url"].endswith(".jpg")
+
+
+def test_declared_body_over_the_limit_is_413(auth, one_mb):
+    r = post("/scans", auth, files={"file": ("big.jpg", jpeg(1024 * 1024), "image/jpeg")})
+    assert r.status_code == 413
+    assert leftover_uploads() == []
+
+
+def test_streamed_file_over_the_limit_is_413(auth, one_mb):
+    # the batch route's body limit fits 32 files: the per-file count trips
+    files = [("files", ("big.jpg", jpeg(1024 * 1024), "image/jpeg"))]
+    r = post("/scans/batch", auth, files=files)
+    assert r.status_code == 413
+    assert r.json()["detail"] == "File too large (>1 MB)"
+    assert leftover_uploads() == []
+
+
+def test_too_many_files_is_413(auth):
+    files = [("file", (f"{i}.jpg", jpeg(), "image/jpeg")) for i in range(2)]
+    r = post("/scans", auth, files=files)
+    assert r.status_code == 413
+    assert r.json()["detail"] == "Too many files (max 1 per request)"
+
+
+@pytest.mark.parametrize(
+    "content", [b"GIF89a" + b"\0" * 64, b"not an image at all", b"\xff\xd8"], ids=["gif", "text", "short"]
+)
+def test_unsupported_content_is_415_whatever_the_claimed_type(auth, content):
+    r = post("/scans", auth, files={"file": ("leaf.jpg", content, "image/jpeg")})
+    assert r.status_code == 415
+    assert leftover_uploads() == []
+
+
+def test_missing_file_field_is_422(auth):
+    r = post("/scans", auth, files={"other": ("leaf.jpg", jpeg(), "image/jpeg")})
+    assert r.status_code == 422
+    assert r.json()["detail"] == "Missing file field 'file'"
+
+
+def test_form_field_without_a_filename_is_422(auth):
+    r = post("/scans", auth, data={"file": "just text"}, files={"x": ("a", b"", "text/plain")})
+    assert r.status_code == 422
+
+
+def test_non_multipart_body_is_400(auth):
+    r = post("/scans", {**auth, "Content-Type": "image/jpeg"}, content=jpeg())
+    assert r.status_code == 400
+
+
+def test_body_is_not_read_without_credentials():
+    r = post("/scans", {}, files={"file": ("leaf.jpg", jpeg(), "image/jpeg")})
+    assert r.status_code in (401, 403)
@@ -0,0 +1,102 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from app.api.v1.admin import _allowed_model_path
+from app.core.config import settings
+from app.ml.registry import ModelRegistry
+from app.services.model_state import ModelStateWatcher, publish_model_state
+
+
+@pytest.fixture
+def v2():
+    """A second stub model version next to MODEL_PATH."""
+    path = os.path.join(settings.MODEL_DIR, "stub_model_v2.npz")
+    shutil.copy(settings.MODEL_PATH, path)
+    yield path
+    os.remove(path)
+
+
+def wait_for_reload(registry: ModelRegistry) -> dict:
+    deadline = time.monotonic() + 5
+    while registry.reload_state["state"] == "running":
+        assert time.monotonic() < deadline, "reload did not finish"
+        time.sleep(0.01)
+    return registry.reload_state
+
+
+def publish(db, *args) -> int:
+    generation = publish_model_state(db, *args)
+    db.commit()
+    return generation
+
+
+def test_model_path_must_stay_in_model_dir():
+    inside = os.path.join(settings.MODEL_DIR, "m.onnx")
+    assert _allowed_model_path(inside) == os.path.realpath(inside)
+    for path in ("/etc/passwd", os.path.join(settings.MODEL_DIR, "..", "m.onnx")):
+        with pytest.raises(ValueError, match="must be inside"):
+            _allowed_model_path(path)
+
+
+def test_reload_reaches_other_workers(db, v2):
+    worker = ModelRegistry()
+    worker.active()
+    watcher = ModelStateWatcher(worker, interval_s=60)
+    watcher.poll()
+    assert watcher.generation == 0
+
+    generation = publish(db, v2, "stub")
+    watcher.poll()
+    assert wait_for_reload(worker)["state"] == "done"
+    assert worker.active().path == v2
+    assert watcher.generation == generation
+
+    watcher.poll()  # already applied: no second load
+    assert worker.reload_state["state"] == "done"
+
+
+def test_rollback_reaches_other_workers(db, v2):
+    admin, worker = ModelRegistry(), ModelRegistry()
+    for registry in (admin, worker):
+        registry.active()
+        registry.load_and_activate(v2, "stub", [1])
+    watcher = ModelStateWatcher(worker, interval_s=60)
+
+    entry = admin.rollback()
+    assert entry.path == settings.MODEL_PATH
+    publish(db, entry.path, entry.backend_name, entry.version)
+    watcher.poll()
+    assert worker.active().version == entry.version
+    assert worker.reload_state["state"] == "idle"  # re-activated, nothing loaded
+
+
+def test_lazy_worker_loads_the_published_model_on_first_use(db, v2):
+    worker = ModelRegistry()
+    publish(db, v2, "stub")
+    ModelStateWatcher(worker, interval_s=60).poll()
+    assert not worker.is_loaded()
+    assert worker.active().path == v2
+
+
+def test_version_pinned_load_refuses_a_changed_file():
+    registry = ModelRegistry()
+    with pytest.raises(RuntimeError, match="is now"):
+        registry.load_and_activate(settings.MODEL_PATH, "stub", [1], version="gone@then")
+    assert not registry.is_loaded()
+
+
+def test_swap_does_not_wait_for_the_old_version_to_drain(v2, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_DRAIN_TIMEOUT_S", 5.0)
+    registry = ModelRegistry(max_loaded=1)
+    unloaded = threading.Event()
+    with registry.acquire() as old:
+        monkeypatch.setattr(old, "unload", unloaded.set)
+        t0 = time.perf_counter()
+        registry.load_and_activate(v2, "stub", [1])
+        assert time.perf_counter() - t0 < 1
+        assert not unloaded.is_set()  # still serving the pinned request
+    assert unloaded.wait(timeout=5)
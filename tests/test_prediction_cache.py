@@ -0,0 +1,101 @@
+import datetime
+import threading
+import time
+
+import pytest
+from sqlalchemy import update
+
+from app.db.models import PredictionCacheEntry
+from app.services.prediction_cache import PredictionCache
+
+TOP_K = [{"label": "x", "confidence": 0.9}]
+LONG_AGO = datetime.datetime(2020, 1, 1)
+
+
+@pytest.fixture
+def cache():
+    return PredictionCache(max_items=16, max_rows=100, touch_every=1000, touch_interval_s=3600)
+
+
+def age(db, digest: str):
+    db.execute(
+        update(PredictionCacheEntry)
+        .where(PredictionCacheEntry.content_hash == digest)
+        .values(last_used_at=LONG_AGO)
+    )
+    db.commit()
+
+
+def last_used(db, digest: str) -> datetime.datetime:
+    db.expire_all()
+    return db.get(PredictionCacheEntry, (digest, "v1")).last_used_at
+
+
+def test_memory_hit_refreshes_last_used_at(db, cache):
+    cache.put("a", "v1", TOP_K)
+    age(db, "a")
+    assert cache.get(db, "a", "v1") == TOP_K
+    assert last_used(db, "a") == LONG_AGO  # batched, not written yet
+    cache.flush_touches()
+    assert last_used(db, "a") > LONG_AGO
+
+
+def test_database_hit_refreshes_without_dirtying_the_request_session(db, cache):
+    cache.put("b", "v1", TOP_K)
+    cache.clear_memory()
+    age(db, "b")
+    assert cache.get(db, "b", "v1") == TOP_K
+    assert not db.dirty
+    cache.flush_touches()
+    assert last_used(db, "b") > LONG_AGO
+
+
+def wait_until(predicate):
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_touches_are_flushed_in_batches_off_the_calling_thread(db, monkeypatch):
+    cache = PredictionCache(max_items=16, max_rows=100, touch_every=3, touch_interval_s=3600)
+    flushed_on = []
+    flush = cache.flush_touches
+
+    def recording_flush():
+        flushed_on.append(threading.current_thread())
+        flush()
+
+    monkeypatch.setattr(cache, "flush_touches", recording_flush)
+    for digest in "cde":
+        cache.put(digest, "v1", TOP_K)
+        age(db, digest)
+    cache.start()
+    try:
+        cache.get(db, "c", "v1")
+        cache.get(db, "d", "v1")
+        time.sleep(0.05)
+        assert [last_used(db, d) for d in "cd"] == [LONG_AGO, LONG_AGO]
+        cache.get(db, "e", "v1")
+        wait_until(lambda: all(last_used(db, d) > LONG_AGO for d in "cde"))
+    finally:
+        cache.stop()
+    assert threading.current_thread() not in flushed_on[:-1]  # the last one is stop()
+
+
+def test_stop_writes_pending_touches(db, cache):
+    cache.put("g", "v1", TOP_K)
+    age(db, "g")
+    cache.start()
+    cache.get(db, "g", "v1")
+    cache.stop()
+    assert last_used(db, "g") > LONG_AGO
+
+
+def test_touch_of_a_pruned_row_is_harmless(db, cache):
+    cache.put("f", "v1", TOP_K)
+    cache.get(db, "f", "v1")
+    db.query(PredictionCacheEntry).delete()
+    db.commit()
+    cache.flush_touches()
+    assert cache.get(db, "missing", "v1") is None
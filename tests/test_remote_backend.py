@@ -0,0 +1,124 @@
+import multiprocessing as mp
+import threading
+import time
+import uuid
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.ml.backends import create_backend
+from app.ml.inference_server import serve
+
+SLOTS = 4
+
+
+@pytest.fixture
+def server(request, tmp_path, monkeypatch):
+    """An inference server on the stub model, forked from the test process (1 process by default)."""
+    monkeypatch.setattr(settings, "INFERENCE_SHM_NAME", f"plant_test_{uuid.uuid4().hex[:8]}")
+    monkeypatch.setattr(settings, "INFERENCE_SOCKET_PATH", str(tmp_path / "inference.sock"))
+    monkeypatch.setattr(settings, "INFERENCE_SHM_SLOTS", SLOTS)
+    monkeypatch.setattr(settings, "INFERENCE_CONNECT_TIMEOUT_S", 0.2)
+    processes = getattr(request, "param", 1)
+    proc = mp.get_context("fork").Process(target=serve, args=(processes, "stub"))
+    proc.start()
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            probe = create_backend("remote", "")
+            probe.load()
+            probe.close()
+            break
+        except (OSError, RuntimeError):
+            assert time.monotonic() < deadline, "inference server did not start"
+            time.sleep(0.05)
+    yield
+    proc.terminate()
+    proc.join(timeout=10)
+
+
+def client():
+    backend = create_backend("remote", "")
+    backend.load()
+    return backend
+
+
+def predict_concurrently(backend, threads: int):
+    spec = backend.input_spec()
+    x = np.zeros((1, spec.height, spec.width, spec.channels), np.float32)
+    barrier = threading.Barrier(threads)
+
+    def run():
+        barrier.wait()
+        assert backend.predict_batch(x).shape[0] == 1
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+
+def lease_all(n: int) -> list:
+    conns = [client()._checkout() for _ in range(n)]
+    for c in conns:
+        c.sock.close()
+    return conns
+
+
+def test_idle_pool_is_capped(server, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_IDLE_CONNECTIONS", 1)
+    backend = client()
+    predict_concurrently(backend, SLOTS)
+    assert len(backend._idle) == 1
+    # the other slots went back to the server: another worker can lease them
+    assert len(lease_all(SLOTS - 1)) == SLOTS - 1
+    backend.close()
+
+
+def test_idle_connections_expire(server, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_IDLE_CONNECTIONS", SLOTS)
+    monkeypatch.setattr(settings, "INFERENCE_IDLE_TIMEOUT_S", 0.2)
+    backend = client()
+    predict_concurrently(backend, SLOTS)
+    deadline = time.monotonic() + 5
+    while backend._idle:
+        assert time.monotonic() < deadline, "idle connections were not reaped"
+        time.sleep(0.05)
+    assert len(lease_all(SLOTS)) == SLOTS
+    backend.close()
+
+
+def test_every_slot_busy_is_refused(server, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_IDLE_CONNECTIONS", SLOTS)
+    backend = client()
+    predict_concurrently(backend, SLOTS)
+    assert len(backend._idle) == SLOTS
+    with pytest.raises(RuntimeError, match="refused"):
+        client()
+    backend.close()
+
+
+@pytest.mark.parametrize("server", [2], indirect=True)
+def test_a_saturated_process_leaves_connections_to_the_others(server):
+    # slots are split 0,2 / 1,3 between the two processes
+    backend = client()
+    held = [backend._checkout() for _ in range(SLOTS)]
+    assert sorted(c.slot for c in held) == list(range(SLOTS))
+    # free both slots of one process: the other has none, yet every
+    # connection must land on the process that has capacity
+    for _ in range(3):
+        freed = [c for c in held if c.slot % 2 == 0]
+        for c in freed:
+            c.sock.close()
+        held = [c for c in held if c.slot % 2] + [backend._connect() for _ in freed]
+        assert sorted(c.slot for c in held) == list(range(SLOTS))
+    spec = backend.input_spec()
+    x = np.ones((1, spec.height, spec.width, spec.channels), np.float32)
+    assert all(backend._run(c, x).shape[0] == 1 for c in held)
+    with pytest.raises(RuntimeError, match="no free slot"):
+        backend._connect()
+    for c in held:
+        c.sock.close()
+    backend.close()
@@ -0,0 +1,105 @@
+import io
+
+import pytest
+
+pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from app.core.config import settings  # noqa: E402
+from app.services.storage import S3Storage  # noqa: E402
+
+BUCKET = "plant-test"
+MiB = 1024 * 1024
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    monkeypatch.setattr(settings, "S3_BUCKET", BUCKET)
+    monkeypatch.setattr(settings, "S3_PREFIX", "uploads")
+    monkeypatch.setattr(settings, "S3_ENDPOINT_URL", "")
+    monkeypatch.setattr(settings, "S3_MULTIPART_CHUNK_MB", 5)
+    monkeypatch.setattr(settings, "STORAGE_PUBLIC_BASE_URL", "")
+    with moto.mock_aws():
+        storage = S3Storage()
+        storage._client.create_bucket(Bucket=BUCKET)
+        yield storage
+
+
+def test_small_object_is_one_put(s3, monkeypatch):
+    calls = []
+    monkeypatch.setattr(s3._client, "create_multipart_upload", lambda **kw: calls.append(kw))
+    src = io.BytesIO(b"jpeg bytes")
+    s3.put("blobs/ab/cd/abcd.jpg", src, "image/jpeg")
+    assert calls == []
+    assert not src.closed  # callers decode from it afterwards
+    head = s3._client.head_object(Bucket=BUCKET, Key="uploads/blobs/ab/cd/abcd.jpg")
+    assert head["ContentType"] == "image/jpeg"
+    assert "immutable" in head["CacheControl"]
+    assert s3.exists("blobs/ab/cd/abcd.jpg")
+    assert not s3.exists("blobs/ab/cd/missing.jpg")
+    assert s3.open("blobs/ab/cd/abcd.jpg").read() == b"jpeg bytes"
+    with pytest.raises(FileNotFoundError):
+        s3.open("blobs/ab/cd/missing.jpg")
+
+
+def test_object_above_the_part_size_is_uploaded_in_parts(s3, monkeypatch):
+    parts = []
+    upload_part = s3._client.upload_part
+
+    def counting_upload_part(**kw):
+        parts.append(len(kw["Body"]))
+        return upload_part(**kw)
+
+    monkeypatch.setattr(s3._client, "upload_part", counting_upload_part)
+    body = bytes(range(256)) * (11 * MiB // 256)
+    s3.put("blobs/ef/gh/efgh.png", io.BytesIO(body), "image/png")
+    assert parts == [5 * MiB, 5 * MiB, MiB]
+    assert s3.open("blobs/ef/gh/efgh.png").read() == body
+
+
+def test_failed_multipart_upload_is_aborted(s3, monkeypatch):
+    upload_part = s3._client.upload_part
+
+    def failing_upload_part(**kw):
+        if kw["PartNumber"] == 2:
+            raise ConnectionError("network down")
+        return upload_part(**kw)
+
+    monkeypatch.setattr(s3._client, "upload_part", failing_upload_part)
+    with pytest.raises(ConnectionError):
+        s3.put("blobs/ij/kl/ijkl.jpg", io.BytesIO(b"\0" * 11 * MiB), "image/jpeg")
+    assert s3._client.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+    assert not s3.exists("blobs/ij/kl/ijkl.jpg")
+
+
+def test_presigned_urls_are_reused_for_half_their_lifetime(s3, monkeypatch):
+    signed = []
+    presign = s3._client.generate_presigned_url
+
+    def counting_presign(*args, **kw):
+        signed.append(kw["Params"]["Key"])
+        return presign(*args, **kw)
+
+    monkeypatch.setattr(s3._client, "generate_presigned_url", counting_presign)
+    monkeypatch.setattr(settings, "S3_PRESIGN_CACHE_MAX_ITEMS", 2)
+    url = s3.url(None, "a.jpg")
+    assert "uploads/a.jpg" in url and "Signature" in url
+    assert s3.url(None, "a.jpg") == url
+    assert signed == ["uploads/a.jpg"]
+
+    s3.url(None, "b.jpg")
+    s3.url(None, "c.jpg")  # evicts a.jpg, the least recently used
+    assert s3.url(None, "c.jpg") and len(s3._urls) == 2
+    s3.url(None, "a.jpg")
+    assert signed == ["uploads/a.jpg", "uploads/b.jpg", "uploads/c.jpg", "uploads/a.jpg"]
+
+    s3._urls["a.jpg"] = (0.0, url)  # past half its lifetime
+    s3.url(None, "a.jpg")
+    assert signed[-1] == "uploads/a.jpg" and len(signed) == 5
+
+
+def test_public_base_url_skips_signing(s3, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_PUBLIC_BASE_URL", "https://cdn.example/")
+    assert s3.url(None, "a.jpg") == "https://cdn.example/uploads/a.jpg"
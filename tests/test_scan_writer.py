@@ -0,0 +1,150 @@
+import datetime
+import json
+import os
+import uuid
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.db.models import Scan, User
+from app.services import scan_writer
+from app.services.scan_writer import DEAD_LETTERED, ScanWriter, scan_row
+
+
+@pytest.fixture
+def user_id(db) -> str:
+    user = User(email=f"{uuid.uuid4()}@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+@pytest.fixture
+def writer(tmp_path):
+    """A writer whose background thread never runs: tests call _flush() themselves."""
+    w = ScanWriter(str(tmp_path / "spool"), batch=100, interval_s=3600, segment_bytes=1 << 20)
+    w.spool_dir.mkdir()
+    with w._lock:
+        w._open_segment()
+    yield w
+    if w._seg is not None:
+        w._seg.close()
+
+
+def scans(user_id: str, n: int, **overrides) -> list[Scan]:
+    fields = dict(user_id=user_id, image_url="k", predicted_label="x", confidence=0.5)
+    return [Scan(**{**fields, **overrides}) for _ in range(n)]
+
+
+def stored_ids(db) -> set[str]:
+    return set(db.scalars(select(Scan.id)))
+
+
+def successor(w: ScanWriter, batch: int = 10) -> ScanWriter:
+    """The writer of a process started after `w`'s, on the same spool."""
+    return ScanWriter(str(w.spool_dir), batch=batch, interval_s=3600, segment_bytes=1 << 20)
+
+
+def crash(w: ScanWriter):
+    # the process dies: its flock goes with it, nothing is flushed
+    w._seg.close()
+    w._seg = None
+
+
+def test_replay_after_crash_inserts_every_acknowledged_row(db, user_id, writer):
+    batch = scans(user_id, 3)
+    writer.submit(batch)
+    crash(writer)
+    with open(writer._seg_path, "ab") as f:
+        f.write(b'{"id": "torn')  # a half-written append that was never acknowledged
+
+    replacement = successor(writer, batch=2)
+    assert replacement.recover() == 3
+    assert stored_ids(db) == {s.id for s in batch}
+    assert list(writer.spool_dir.glob("scans-*.jsonl")) == []
+
+
+def test_replay_skips_rows_flushed_before_the_crash(db, user_id, writer):
+    first, second = scans(user_id, 2), scans(user_id, 2)
+    writer.submit(first)
+    writer._flush()
+    writer.submit(second)
+    crash(writer)
+    replacement = successor(writer)
+    assert replacement.recover() == 4  # the whole segment; first two are skipped in SQL
+    assert stored_ids(db) == {s.id for s in first + second}
+
+
+def test_live_segment_is_not_replayed(db, user_id, writer):
+    writer.submit(scans(user_id, 1))
+    other = successor(writer)
+    assert other.recover() == 0
+    assert stored_ids(db) == set()
+
+
+def dead_letters(w: ScanWriter) -> list[dict]:
+    path = w.spool_dir / "dead" / f"scans-{os.getpid()}.jsonl"
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_poison_row_is_dead_lettered_after_max_attempts(db, user_id, writer, monkeypatch):
+    monkeypatch.setattr(settings, "SCAN_WRITER_MAX_ATTEMPTS", 2)
+    good = scans(user_id, 4)
+    poison = scans(user_id, 1, predicted_label=None)  # NOT NULL violation
+    writer.submit(good[:2] + poison + good[2:])
+    before = DEAD_LETTERED.value
+
+    writer._flush()
+    writer._flush()
+    assert writer.queue_depth() == 5 and stored_ids(db) == set()
+    writer._flush()  # third attempt bisects
+
+    assert writer.queue_depth() == 0
+    assert stored_ids(db) == {s.id for s in good}
+    [dead] = dead_letters(writer)
+    assert dead["row"]["id"] == poison[0].id
+    assert "IntegrityError" in dead["error"]
+    assert DEAD_LETTERED.value == before + 1
+    assert writer.pending(poison[0].id) is None
+
+
+def test_poison_row_in_a_crashed_spool_does_not_block_replay(db, user_id, writer):
+    good = scans(user_id, 2)
+    poison = scans(user_id, 1, predicted_label=None)
+    writer.submit(good + poison)
+    crash(writer)
+    replacement = successor(writer)
+    assert replacement.recover() == 3
+    assert stored_ids(db) == {s.id for s in good}
+    assert [d["row"]["id"] for d in dead_letters(replacement)] == [poison[0].id]
+
+
+def test_transient_errors_are_retried_and_never_dead_lettered(db, user_id, writer, monkeypatch):
+    monkeypatch.setattr(settings, "SCAN_WRITER_MAX_ATTEMPTS", 1)
+    batch = scans(user_id, 3)
+    writer.submit(batch)
+
+    def database_down(rows):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(scan_writer, "insert_rows", database_down)
+    for _ in range(5):
+        writer._flush()
+    assert writer.queue_depth() == 3
+    assert dead_letters(writer) == []
+
+    monkeypatch.undo()
+    writer._flush()
+    assert stored_ids(db) == {s.id for s in batch}
+
+
+def test_spooled_row_round_trips(user_id):
+    [s] = scans(user_id, 1)
+    s.id = "abc"
+    s.created_at = datetime.datetime(2025, 9, 14, 10, 0, 0, 5, tzinfo=datetime.timezone.utc)
+    row = json.loads(json.dumps(scan_row(s), default=str))
+    assert scan_writer._db_row(row)["created_at"] == s.created_at
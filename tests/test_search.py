@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import delete, text
+
+from app.db.base import engine
+from app.db.models import Disease, Treatment
+from app.services import search
+
+
+def add_catalog(db):
+    """Rows written without the sync hooks, as an import or older release would."""
+    d = Disease(label="Tomato___Early_blight", display_name="Early blight", description="Rings")
+    db.add(d)
+    db.flush()
+    db.add(
+        Treatment(
+            disease_id=d.id, type="organic", title="Copper spray", instructions="Spray", locale="en"
+        )
+    )
+    db.commit()
+    return d
+
+
+def fts_rows(db) -> list[tuple[str, str]]:
+    return sorted(db.execute(text("SELECT kind, title FROM catalog_fts")).tuples())
+
+
+def test_sync_fills_a_non_empty_index(db):
+    db.execute(
+        text(
+            "INSERT INTO catalog_fts (kind, ref_id, title, body) "
+            "VALUES ('disease', 'stale', 'x', '')"
+        )
+    )
+    add_catalog(db)
+    search.ensure_search_index(engine)
+    assert fts_rows(db) == [
+        ("disease", "Tomato___Early_blight Early blight"),
+        ("treatment", "Copper spray"),
+    ]
+    diseases, total = search.search_diseases(db, "blight", 10, 0)
+    assert total == 1 and diseases[0].label == "Tomato___Early_blight"
+
+
+def test_sync_drops_rows_of_deleted_entries(db):
+    d = add_catalog(db)
+    search.ensure_search_index(engine)
+    db.execute(delete(Treatment))
+    db.execute(delete(Disease).where(Disease.id == d.id))
+    db.commit()
+    search.ensure_search_index(engine)
+    assert fts_rows(db) == []
+
+
+def test_sync_is_idempotent(db):
+    add_catalog(db)
+    search.ensure_search_index(engine)
+    search.ensure_search_index(engine)
+    assert len(fts_rows(db)) == 2
+
+
+@pytest.mark.parametrize(
+    "term, like", [("blight", "%blight%"), ("50%_off", r"%50\%\_off%"), ("a\\b", r"%a\\b%")]
+)
+def test_fuzzy_falls_back_to_escaped_ilike_without_pg_trgm(monkeypatch, term, like):
+    monkeypatch.setattr(search, "_has_trgm", False)
+    params = {"term": term}
+    where, rank = search._fuzzy(None, "title", params)
+    assert (where, rank) == ("(title) ILIKE :like", "0")
+    assert params["like"] == like
+
+
+def test_fuzzy_uses_trigrams_when_available(monkeypatch):
+    monkeypatch.setattr(search, "_has_trgm", True)
+    assert search._fuzzy(None, "title", {"term": "x"}) == (
+        "(title) % :term",
+        "similarity(title, :term)",
+    )
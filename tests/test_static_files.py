@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import io
+import uuid
+from pathlib import Path
+
+import httpx
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.db.models import Scan, User
+from app.main import app
+from app.services.storage import LocalStorage
+from app.services.storage.base import blob_rel_path
+from app.services.thumbnails import thumbnail_rel_path
+
+ROOT = Path(settings.UPLOAD_DIR)
+
+
+def get(path: str) -> httpx.Response:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path)
+
+    return asyncio.run(run())
+
+
+def store(rel: str):
+    buf = io.BytesIO()
+    Image.new("RGB", (200, 150), "green").save(buf, "JPEG")
+    buf.seek(0)
+    LocalStorage().put(rel, buf, "image/jpeg")
+
+
+def files() -> set[Path]:
+    return {p for p in ROOT.rglob("*") if p.is_file()}
+
+
+@pytest.fixture
+def blob(database, monkeypatch):
+    monkeypatch.setattr(settings, "THUMBNAIL_SIZES", [96])
+    rel = blob_rel_path(hashlib.sha256(uuid.uuid4().bytes).hexdigest(), ".jpg")
+    store(rel)
+    return rel
+
+
+def test_missing_thumbnail_of_a_blob_is_rendered(blob):
+    r = get(f"/uploads/{thumbnail_rel_path(blob, 96)}")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/webp"
+
+
+def test_thumbnails_of_thumbnails_are_not_rendered(blob):
+    thumb = thumbnail_rel_path(blob, 96)
+    assert get(f"/uploads/{thumb}").status_code == 200
+    before = files()
+    for nested in (thumbnail_rel_path(thumb, 96), thumbnail_rel_path(thumbnail_rel_path(thumb, 96), 96)):
+        assert get(f"/uploads/{nested}").status_code == 404
+    assert files() == before
+
+
+def test_unreferenced_files_are_not_rendered(blob):
+    stray = "0/2024/01/01/stray.jpg"
+    store(stray)
+    store("blobs/tmp/x.jpg")
+    before = files()
+    assert get(f"/uploads/{thumbnail_rel_path(stray, 96)}").status_code == 404
+    assert get(f"/uploads/{thumbnail_rel_path('blobs/tmp/x.jpg', 96)}").status_code == 404
+    assert files() == before
+
+
+def test_legacy_upload_a_scan_references_is_rendered(blob, db):
+    user = User(email=f"{uuid.uuid4()}@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    rel = f"{user.id}/2024/01/01/{uuid.uuid4()}.jpg"
+    store(rel)
+    db.add(
+        Scan(
+            user_id=user.id,
+            image_url=str(ROOT.resolve() / rel),
+            predicted_label="x",
+            confidence=0.5,
+        )
+    )
+    db.commit()
+    assert get(f"/uploads/{thumbnail_rel_path(rel, 96)}").status_code == 200
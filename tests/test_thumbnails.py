@@ -0,0 +1,83 @@
+import io
+import time
+
+import pytest
+from PIL import Image
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.services.storage import LocalStorage
+from app.services.thumbnails import ThumbnailQueue, thumbnail_rel_path
+from app.utils import urls
+
+REL = "blobs/ab/cd/abcd.jpg"
+REQUEST = Request({"type": "http", "headers": [], "path": "/", "query_string": b""})
+
+
+class BucketStorage(LocalStorage):
+    """Object storage stand-in: files on disk, URLs that cannot render on request."""
+
+    name = "bucket"
+
+    def url(self, request, rel: str) -> str:
+        return f"https://bucket.example/{rel}"
+
+
+@pytest.fixture
+def bucket(tmp_path, monkeypatch):
+    store = BucketStorage(str(tmp_path))
+    buf = io.BytesIO()
+    Image.new("RGB", (400, 300), "green").save(buf, "JPEG")
+    buf.seek(0)
+    store.put(REL, buf, "image/jpeg")
+    queue = ThumbnailQueue(workers=1, max_ready=2)
+    monkeypatch.setattr(settings, "THUMBNAIL_SIZES", [96, 320])
+    monkeypatch.setattr(urls, "get_storage", lambda: store)
+    monkeypatch.setattr("app.services.thumbnails.get_storage", lambda: store)
+    monkeypatch.setattr(urls, "THUMBNAILS", queue)
+    return store, queue
+
+
+def wait_until(predicate):
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_original_stands_in_until_thumbnails_exist(bucket):
+    store, queue = bucket
+    original = f"https://bucket.example/{REL}"
+    assert urls.thumbnail_urls(REQUEST, REL) == {"96": original, "320": original}
+
+    wait_until(lambda: queue.is_ready(REL))
+    assert all(store.exists(thumbnail_rel_path(REL, s)) for s in (96, 320))
+    assert urls.thumbnail_urls(REQUEST, REL) == {
+        "96": f"https://bucket.example/{thumbnail_rel_path(REL, 96)}",
+        "320": f"https://bucket.example/{thumbnail_rel_path(REL, 320)}",
+    }
+
+
+def test_failed_render_keeps_the_original(bucket):
+    _, queue = bucket
+    missing = "blobs/00/00/missing.jpg"
+    urls.thumbnail_urls(REQUEST, missing)
+    wait_until(lambda: not queue._pending)
+    assert not queue.is_ready(missing)
+    assert set(urls.thumbnail_urls(REQUEST, missing).values()) == {
+        f"https://bucket.example/{missing}"
+    }
+
+
+def test_ready_set_is_bounded(bucket):
+    _, queue = bucket
+    for rel in ("a", "b", "c"):
+        queue._ready[rel] = None
+    queue.submit(REL)
+    wait_until(lambda: queue.is_ready(REL))
+    assert len(queue._ready) == queue.max_ready
+
+
+def test_no_sizes_no_thumbnails(monkeypatch):
+    monkeypatch.setattr(settings, "THUMBNAIL_SIZES", [])
+    assert urls.thumbnail_urls(REQUEST, REL) == {}
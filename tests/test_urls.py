@@ -0,0 +1,118 @@
+import uuid
+
+import pytest
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.db.models import Scan, User
+from app.main import app
+from app.scripts.migrate_image_keys import migrate
+from app.utils.urls import legacy_rel_path, public_upload_url, upload_rel_path
+
+KEY = "blobs/ab/cd/abcd0123.jpg"
+DATED = "u1/2025/09/14/5b8f.jpg"
+
+
+def make_request(root_path: str = "") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "app": app,
+            "scheme": "http",
+            "server": ("testserver", 80),
+            "path": "/",
+            "root_path": root_path,
+            "headers": [(b"host", b"testserver")],
+            "query_string": b"",
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "stored, key",
+    [
+        (KEY, KEY),
+        ("thumbs/96/blobs/ab/cd/abcd0123.webp", "thumbs/96/blobs/ab/cd/abcd0123.webp"),
+        (f"{settings.UPLOAD_DIR}/{DATED}", DATED),
+        (f"./uploads/{DATED}", DATED),
+        (f"uploads/{DATED}", DATED),
+        (f"/srv/old-host/uploads/{DATED}", DATED),
+        (f"C:\\app\\uploads\\{DATED.replace('/', chr(92))}", DATED),
+        (DATED, DATED),
+        ("5b8f.jpg", "5b8f.jpg"),
+        ("/somewhere/else/5b8f.jpg", "/somewhere/else/5b8f.jpg"),
+    ],
+)
+def test_upload_rel_path(stored, key):
+    assert upload_rel_path(stored) == key
+
+
+@pytest.mark.parametrize(
+    "stored",
+    [f"{settings.UPLOAD_DIR}/{DATED}", f"./uploads/{DATED}", DATED, "/somewhere/else/x.jpg"],
+)
+def test_parsing_a_parsed_value_changes_nothing(stored):
+    once = legacy_rel_path(stored)
+    assert legacy_rel_path(once) == once
+
+
+@pytest.mark.parametrize("root_path", ["", "/api"])
+def test_public_upload_url_matches_url_for(root_path):
+    request = make_request(root_path)
+    assert public_upload_url(request, KEY) == str(request.url_for("uploads", path=KEY))
+    assert public_upload_url(request, f"uploads/{DATED}") == str(
+        request.url_for("uploads", path=DATED)
+    )
+
+
+def add_scans(db, values: list[str]) -> list[str]:
+    user = User(email=f"{uuid.uuid4()}@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    scans = [
+        Scan(user_id=user.id, image_url=v, predicted_label="x", confidence=0.5)
+        for v in values
+    ]
+    db.add_all(scans)
+    db.commit()
+    return [s.id for s in scans]
+
+
+def image_urls(db, ids: list[str]) -> list[str]:
+    db.expire_all()
+    return [db.get(Scan, i).image_url for i in ids]
+
+
+def test_migration_round_trips_legacy_rows(db):
+    values = [
+        KEY,
+        f"{settings.UPLOAD_DIR}/{DATED}",
+        f"uploads/{DATED}",
+        f"./uploads/u2/2025/09/15/aa.jpg",
+        "u3/2025/01/02/bb.jpg",
+    ]
+    ids = add_scans(db, values)
+    migrate(batch=2)
+    assert image_urls(db, ids) == [
+        KEY,
+        DATED,
+        DATED,
+        "u2/2025/09/15/aa.jpg",
+        "u3/2025/01/02/bb.jpg",
+    ]
+
+
+def test_migration_twice_changes_nothing(db):
+    ids = add_scans(db, [f"uploads/{DATED}", f"{settings.UPLOAD_DIR}/{DATED}", DATED])
+    first = migrate(batch=10)
+    after_first = image_urls(db, ids)
+    second = migrate(batch=10)
+    assert first["rewritten"] == 2
+    assert second["rewritten"] == 0
+    assert image_urls(db, ids) == after_first == [DATED] * 3
+
+
+def test_dry_run_writes_nothing(db):
+    ids = add_scans(db, [f"uploads/{DATED}"])
+    assert migrate(batch=10, dry_run=True)["rewritten"] == 1
+    assert image_urls(db, ids) == [f"uploads/{DATED}"]